@@ -0,0 +1,80 @@
+"""
+Admission control of the gateway.
+
+Every endpoint has its limiter: at most max_in_flight requests are handled at the same time, at most max_queued
+requests wait for the free slot (no longer than queue_timeout seconds). Other requests are rejected at once, gateway
+answers them with 503 and Retry-After, so traffic spikes don't pile up waiting coroutines and broker messages.
+"""
+import asyncio
+
+from prometheus_client import Counter, Gauge
+
+REQUESTS_IN_FLIGHT = Gauge("gateway_requests_in_flight", "Requests, that are handled now", ["endpoint"])
+REQUESTS_QUEUED = Gauge("gateway_requests_queued", "Requests, that wait for the free slot", ["endpoint"])
+REQUESTS_REJECTED = Counter(
+    "gateway_requests_rejected", "Requests, that were rejected by admission control", ["endpoint", "reason"]
+)
+
+
+class GatewayOverloadedError(Exception):
+    """Request is rejected, because endpoint is saturated"""
+
+    def __init__(self, endpoint: str, reason: str, retry_after: int):
+        super().__init__(f"Endpoint {endpoint} is overloaded ({reason})")
+        self.retry_after = retry_after
+
+
+class AdmissionLimiter:
+    """Limiter of the requests of one endpoint"""
+
+    def __init__(
+        self,
+        endpoint: str,
+        max_in_flight: int,
+        max_queued: int = 0,
+        queue_timeout: float = 1.0,
+        retry_after: int = 1
+    ):
+        """
+        :param endpoint: name of the endpoint (label of the metrics)
+        :param max_in_flight: maximum amount of requests, that are handled at the same time
+        :param max_queued: maximum amount of requests, that wait for the free slot
+        :param queue_timeout: maximum time (in seconds) of waiting for the free slot
+        :param retry_after: value of Retry-After (in seconds) of rejected requests
+        """
+        self._endpoint = endpoint
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._max_queued = max_queued
+        self._queued = 0
+        self._queue_timeout = queue_timeout
+        self._retry_after = retry_after
+
+    def _reject(self, reason: str):
+        REQUESTS_REJECTED.labels(self._endpoint, reason).inc()
+        raise GatewayOverloadedError(self._endpoint, reason, self._retry_after)
+
+    async def acquire(self):
+        """
+        Takes the slot of the request.
+        :raises GatewayOverloadedError: if there is no free slot and the queue is full, or slot wasn't freed in time
+        """
+        if self._slots.locked():
+            if self._queued >= self._max_queued:
+                self._reject("queue_full")
+            self._queued += 1
+            REQUESTS_QUEUED.labels(self._endpoint).inc()
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self._queue_timeout)
+            except asyncio.TimeoutError:
+                self._reject("queue_timeout")
+            finally:
+                self._queued -= 1
+                REQUESTS_QUEUED.labels(self._endpoint).dec()
+        else:
+            await self._slots.acquire()
+        REQUESTS_IN_FLIGHT.labels(self._endpoint).inc()
+
+    def release(self):
+        """Frees the slot of the request"""
+        REQUESTS_IN_FLIGHT.labels(self._endpoint).dec()
+        self._slots.release()
@@ -1,16 +1,20 @@
 # Author: Vodohleb04
-from typing import List, Dict
+from typing import Awaitable, Callable, Dict, List, Tuple
 
 import neo4j
 from aiologger.loggers.json import JsonLogger
 from neo4j import AsyncSession, exceptions
 
+from backend.agents.crud_agent.query_cache import NOTES_TAG, ROUTES_TAG
+
 
 logger = JsonLogger.with_default_handlers(
     level="INFO",
     serializer_kwargs={'ensure_ascii': False},
 )
 
+ROUTE_INDEX_ID_SEQUENCE = "route_index_id"  # Name of the counter node of index_id of routes
+
 
 class Creator:
     """
@@ -18,7 +22,55 @@ class Creator:
     Creator part of CRUDAgent. All write queries to knowledgebase are located here.
     Implements PureCreator.
     All methods work asynchronously.
+    Successful writes emit tags of the written nodes to the listeners (CRUDAgent invalidates its cache with them).
     """
+    _written_tags_listeners: List[Callable[[Tuple[str, ...]], Awaitable]] = []
+
+    @staticmethod
+    def add_written_tags_listener(listener: Callable[[Tuple[str, ...]], Awaitable]):
+        """
+        :param listener: async function, that gets tags of the nodes, that were written
+        """
+        Creator._written_tags_listeners.append(listener)
+
+    @staticmethod
+    async def _emit_written_tags(*tags: str):
+        for listener in Creator._written_tags_listeners:
+            await listener(tags)
+
+    @staticmethod
+    async def _allocate_route_index_ids(tx, amount: int) -> int:
+        """
+        Transaction handler, that allocates amount of consecutive index_id of routes from the counter node.
+        Counter is created with the last used index_id on the first call. Allocation is committed in its own short
+        transaction, so concurrent writers wait for the lock of the counter only for this transaction. index_id of the
+        failed writes aren't reused (index_id may have gaps).
+
+        :return: first allocated index_id
+        """
+        result = await tx.run(
+            """
+            MERGE (sequence: Sequence {name: $sequence_name})
+                ON CREATE SET sequence.last_value = coalesce(
+                    head(COLLECT {
+                        MATCH (route: Route)
+                            WHERE route.index_id IS NOT null
+                        RETURN route.index_id AS index_id
+                            ORDER BY index_id DESC
+                            LIMIT 1
+                    }),
+                    0
+                )
+            SET sequence.last_value = sequence.last_value + $amount
+            RETURN sequence.last_value - $amount + 1 AS first_index_id
+            """,
+            sequence_name=ROUTE_INDEX_ID_SEQUENCE,
+            amount=amount
+        )
+        record = await result.single()
+        if record is None:
+            raise exceptions.Neo4jError("Unexpected behaviour: index_id of routes weren't allocated.")
+        return record["first_index_id"]
 
     @staticmethod
     async def _write_user(tx, user_login: str):
@@ -44,6 +96,32 @@ class Creator:
             await logger.error(f"Error while writing user account, args: {e.args[0]}")
             return {"result": False}
 
+    @staticmethod
+    async def _write_users(tx, user_logins: List[str]):
+        """Transaction handler for write_users"""
+        result = await tx.run(
+            """
+            UNWIND $user_logins AS user_login
+                CREATE (newUserAccount: UserAccount {login: user_login})
+            """,
+            user_logins=user_logins
+        )
+        result_summary = await (result.consume())
+        counters = result_summary.counters
+        if counters.nodes_created != len(user_logins):
+            raise exceptions.Neo4jError("Unexpected behaviour: Wrong amount of nodes, that were created.")
+
+    @staticmethod
+    async def write_users(session: AsyncSession, user_logins: List[str]) -> Dict[str, bool]:
+        """Writes all the users in one transaction (nothing is written, if any of them can't be written)"""
+        try:
+            result = await session.execute_write(Creator._write_users, user_logins)
+            await logger.debug(f"method:\twrite_users,\nresult:\t{result}")
+            return {"result": True}
+        except Exception as e:
+            await logger.error(f"Error while writing user accounts, args: {e.args[0]}")
+            return {"result": False}
+
     @staticmethod
     async def _write_note(tx, guide_login: str, country_names: List[str], note_title, note_category_names):
         """Transaction handler for write_note"""
@@ -123,14 +201,98 @@ class Creator:
                 Creator._write_note, guide_login, country_names, note_title, note_category_names
             )
             await logger.debug(f"method:\twrite_note,\nresult:\t{result}")
+            await Creator._emit_written_tags(NOTES_TAG)
             return {"result": True}
         except Exception as e:
             await logger.error(f"Error while writing note, args: {e.args[0]}")
             return {"result": False}
 
+    @staticmethod
+    async def _write_notes(tx, guides_notes: List[Dict]):
+        """
+        Transaction handler for write_notes
+
+        :param guides_notes: notes grouped by their guides, List[Dict["guide_login": str, "notes": List[Dict]]]
+        """
+        result = await tx.run(
+            """
+            UNWIND $guides_notes AS guide_notes
+                MATCH (guideAccount: UserAccount&GuideAccount {login: guide_notes.guide_login})
+                SET guideAccount.last_note_id_code = guideAccount.last_note_id_code + size(guide_notes.notes)
+                WITH
+                    guideAccount,
+                    guide_notes.notes AS notes,
+                    guideAccount.last_note_id_code - size(guide_notes.notes) AS last_note_id_code,
+                    datetime() AS now_time
+
+            UNWIND range(0, size(notes) - 1) AS note_number
+                WITH
+                    guideAccount,
+                    notes[note_number] AS note_info,
+                    last_note_id_code + note_number + 1 AS note_id_code,
+                    now_time
+                CREATE (guideAccount)-[:AUTHOR]->(note: Note {
+                    title: note_info.note_title, created_at: now_time, last_update: now_time, id_code: note_id_code
+                })
+                SET note.path_list = COLLECT {
+                    UNWIND note_info.country_names AS country_name
+                        MATCH (region: Region {name: country_name})
+                        RETURN 'notes/' + toString(region.id_code) + '/' + toString(guideAccount.id_code) + '/' + toString(note_id_code) + '/'
+                }
+                WITH note, note_info
+                CALL {
+                    WITH note, note_info
+                    UNWIND note_info.note_category_names AS note_category_name
+                        MATCH (noteCategory: NoteCategory {name: note_category_name})
+                        CREATE (note)-[:NOTE_REFERS]->(noteCategory)
+                }
+            RETURN sum(size(note.path_list)) AS path_list_size
+            """,
+            guides_notes=guides_notes
+        )
+        record = await result.single()
+        path_list_size = record["path_list_size"] if record is not None else 0
+        result_summary = await (result.consume())
+        counters = result_summary.counters
+        notes = [note for guide_notes in guides_notes for note in guide_notes["notes"]]
+        if counters.nodes_created != len(notes):
+            raise exceptions.Neo4jError(
+                "Unexpected behaviour: Wrong amount of nodes, that were created. Probably some of the given guides aren\'t exist"
+            )
+        if counters.relationships_created != sum(len(note["note_category_names"]) + 1 for note in notes):
+            raise exceptions.Neo4jError("Unexpected behaviour: Wrong amount of relationships, that were created.")
+        if path_list_size != sum(len(note["country_names"]) for note in notes):
+            raise exceptions.Neo4jError(
+                "Unexpected behaviour: Wrong amount of paths were added to nodes. Probably some of the given countries aren\'t exist"
+            )
+
+    @staticmethod
+    async def write_notes(session: AsyncSession, notes: List[Dict]) -> Dict[str, bool]:
+        """
+        Writes all the notes in one transaction (nothing is written, if any of them can't be written).
+        Guides, countries and categories are matched by their exact names.
+
+        :param notes: List[Dict["guide_login": str, "country_names": List[str], "note_title": str,
+            "note_category_names": List[str]]]
+        """
+        notes_of_guides: Dict[str, List[Dict]] = {}
+        for note in notes:
+            notes_of_guides.setdefault(note["guide_login"], []).append(note)
+        guides_notes = [
+            {"guide_login": guide_login, "notes": notes_of_guide} for guide_login, notes_of_guide in notes_of_guides.items()
+        ]
+        try:
+            result = await session.execute_write(Creator._write_notes, guides_notes)
+            await logger.debug(f"method:\twrite_notes,\nresult:\t{result}")
+            await Creator._emit_written_tags(NOTES_TAG)
+            return {"result": True}
+        except Exception as e:
+            await logger.error(f"Error while writing notes, args: {e.args[0]}")
+            return {"result": False}
+
     @staticmethod
     async def _write_route_for_note(
-        tx, note_title: str, landmark_info_position_dicts: List[Dict[str, str | int | float]]
+        tx, note_title: str, index_id: int, landmark_info_position_dicts: List[Dict[str, str | int | float]]
     ):
         """Transaction handler for write_route_for_note"""
         result = await tx.run(
@@ -141,19 +303,7 @@ class Creator:
                 ORDER BY note.title
                 LIMIT 1
                 
-            OPTIONAL MATCH (route: Route)
-            WITH note, route
-                ORDER BY route.index_id DESC
-                LIMIT 1
-            WITH 
-                note,
-                CASE 
-                    WHEN route IS null THEN 0
-                    WHEN route.index_id IS null THEN 0
-                    ELSE route.index_id
-                END AS last_route_index_id
-            
-            CREATE (route: Route {index_id: last_route_index_id + 1})<-[:ROUTE_FOR_NOTE]-(note)
+            CREATE (route: Route {index_id: $index_id})<-[:ROUTE_FOR_NOTE]-(note)
             WITH route
             
             UNWIND $landmark_info_position_dicts AS landmark_info_position_dict
@@ -172,6 +322,7 @@ class Creator:
 
             """,
             note_title=note_title,
+            index_id=index_id,
             landmark_info_position_dicts=landmark_info_position_dicts
         )
         result_summary = await (result.consume())
@@ -191,18 +342,84 @@ class Creator:
         session: AsyncSession, note_title: str, landmark_info_position_dicts: List[Dict[str, str | int | float]]
     ) -> Dict[str, bool]:
         try:
+            index_id = await session.execute_write(Creator._allocate_route_index_ids, 1)
             result = await session.execute_write(
-                Creator._write_route_for_note, note_title, landmark_info_position_dicts
+                Creator._write_route_for_note, note_title, index_id, landmark_info_position_dicts
             )
             await logger.debug(f"method:\twrite_route_for_note,\nresult:\t{result}")
+            await Creator._emit_written_tags(NOTES_TAG, ROUTES_TAG)
             return {"result": True}
         except Exception as e:
             await logger.error(f"Error while writing route for note, args: {e.args[0]}")
             return {"result": False}
 
+    @staticmethod
+    async def _write_routes_for_notes(tx, routes: List[Dict]):
+        """
+        Transaction handler for write_routes_for_notes
+
+        :param routes: routes with allocated "index_id"
+        """
+        result = await tx.run(
+            """
+            UNWIND $routes AS route_info
+                MATCH (note: Note {title: route_info.note_title})
+                CREATE (route: Route {index_id: route_info.index_id})<-[:ROUTE_FOR_NOTE]-(note)
+                WITH route, route_info
+                CALL {
+                    WITH route, route_info
+                    UNWIND route_info.landmark_info_position_dicts AS landmark_info_position_dict
+                        MATCH (landmark: Landmark {
+                            name: landmark_info_position_dict.name,
+                            longitude: landmark_info_position_dict.longitude,
+                            latitude: landmark_info_position_dict.latitude
+                        })
+                        CREATE (route)-[:PART_OF_ROUTE {position: landmark_info_position_dict.position}]->(landmark)
+                }
+            """,
+            routes=routes
+        )
+        result_summary = await (result.consume())
+        counters = result_summary.counters
+        route_parts_amount = sum(len(route["landmark_info_position_dicts"]) for route in routes)
+
+        if counters.nodes_created != len(routes):
+            raise exceptions.Neo4jError(
+                "Unexpected behaviour: Wrong amount of nodes, that were created. Probably some of the given notes aren\'t exist"
+            )
+        if counters.relationships_created != route_parts_amount + len(routes):
+            raise exceptions.Neo4jError("Unexpected behaviour: Wrong amount of relationships, that were created.")
+        if counters.properties_set != route_parts_amount + len(routes):  # index_id and position
+            raise exceptions.Neo4jError(
+                "Unexpected behaviour: Wrong amount properties that were set. Probably some of the given landmarks aren\'t exist"
+            )
+
+    @staticmethod
+    async def write_routes_for_notes(session: AsyncSession, routes: List[Dict]) -> Dict[str, bool | List[int]]:
+        """
+        Writes all the routes in one transaction (nothing is written, if any of them can't be written).
+        index_id of all the routes are allocated from the counter at once. Landmarks are matched by their exact
+        name and coordinates.
+
+        :param routes: List[Dict["note_title": str, "landmark_info_position_dicts": List[Dict]]]
+        :return: Dict["result": bool, "index_ids": List[int]] - index_ids of the written routes in order of routes
+        """
+        try:
+            first_index_id = await session.execute_write(Creator._allocate_route_index_ids, len(routes))
+            routes = [
+                {**route, "index_id": first_index_id + route_number} for route_number, route in enumerate(routes)
+            ]
+            result = await session.execute_write(Creator._write_routes_for_notes, routes)
+            await logger.debug(f"method:\twrite_routes_for_notes,\nresult:\t{result}")
+            await Creator._emit_written_tags(NOTES_TAG, ROUTES_TAG)
+            return {"result": True, "index_ids": [route["index_id"] for route in routes]}
+        except Exception as e:
+            await logger.error(f"Error while writing routes, args: {e.args[0]}")
+            return {"result": False, "index_ids": []}
+
     @staticmethod
     async def _write_route_saved_by_user(
-            tx, user_login: str, landmark_info_position_dicts: List[Dict[str, str | int | float]]
+            tx, user_login: str, index_id: int, landmark_info_position_dicts: List[Dict[str, str | int | float]]
     ):
         """Transaction handler for write_route_saved_by_user"""
         result = await tx.run(
@@ -212,19 +429,7 @@ class Creator:
                 ORDER BY userAccount.login ASC
                 LIMIT 1
             
-            OPTIONAL MATCH (route: Route)
-            WITH userAccount, route
-                ORDER BY route.index_id DESC
-                LIMIT 1
-            WITH 
-                userAccount,
-                CASE 
-                    WHEN route IS null THEN 0
-                    WHEN route.index_id IS null THEN 0
-                    ELSE route.index_id
-                END AS last_route_index_id
-            
-            CREATE (route: Route {index_id: last_route_index_id + 1})<-[:ROUTE_SAVED_BY_USER]-(userAccount)
+            CREATE (route: Route {index_id: $index_id})<-[:ROUTE_SAVED_BY_USER]-(userAccount)
             WITH route
             
             UNWIND $landmark_info_position_dicts AS landmark_info_position_dict
@@ -242,6 +447,7 @@ class Creator:
                 CREATE (route)-[:PART_OF_ROUTE {position: landmark_info_position_dict.position}]->(landmark)
             """,
             user_login=user_login,
+            index_id=index_id,
             landmark_info_position_dicts=landmark_info_position_dicts
         )
         result_summary = await (result.consume())
@@ -261,15 +467,81 @@ class Creator:
         session: AsyncSession, user_login: str, landmark_info_position_dicts: List[Dict[str, str | int | float]]
     ) -> Dict[str, bool]:
         try:
+            index_id = await session.execute_write(Creator._allocate_route_index_ids, 1)
             result = await session.execute_write(
-                Creator._write_route_saved_by_user, user_login, landmark_info_position_dicts
+                Creator._write_route_saved_by_user, user_login, index_id, landmark_info_position_dicts
             )
             await logger.debug(f"method:\twrite_route_saved_by_user,\nresult:\t{result}")
+            await Creator._emit_written_tags(ROUTES_TAG)
             return {"result": True}
         except Exception as e:
             await logger.error(f"Error while writing route for note, args: {e.args[0]}")
             return {"result": False}
 
+    @staticmethod
+    async def _write_routes_saved_by_user(tx, routes: List[Dict]):
+        """
+        Transaction handler for write_routes_saved_by_user
+
+        :param routes: routes with allocated "index_id"
+        """
+        result = await tx.run(
+            """
+            UNWIND $routes AS route_info
+                MATCH (userAccount: UserAccount {login: route_info.user_login})
+                CREATE (route: Route {index_id: route_info.index_id})<-[:ROUTE_SAVED_BY_USER]-(userAccount)
+                WITH route, route_info
+                CALL {
+                    WITH route, route_info
+                    UNWIND route_info.landmark_info_position_dicts AS landmark_info_position_dict
+                        MATCH (landmark: Landmark {
+                            name: landmark_info_position_dict.name,
+                            longitude: landmark_info_position_dict.longitude,
+                            latitude: landmark_info_position_dict.latitude
+                        })
+                        CREATE (route)-[:PART_OF_ROUTE {position: landmark_info_position_dict.position}]->(landmark)
+                }
+            """,
+            routes=routes
+        )
+        result_summary = await (result.consume())
+        counters = result_summary.counters
+        route_parts_amount = sum(len(route["landmark_info_position_dicts"]) for route in routes)
+
+        if counters.nodes_created != len(routes):
+            raise exceptions.Neo4jError(
+                "Unexpected behaviour: Wrong amount of nodes, that were created. Probably some of the given users aren\'t exist"
+            )
+        if counters.relationships_created != route_parts_amount + len(routes):
+            raise exceptions.Neo4jError("Unexpected behaviour: Wrong amount of relationships, that were created.")
+        if counters.properties_set != route_parts_amount + len(routes):  # index_id and position
+            raise exceptions.Neo4jError(
+                "Unexpected behaviour: Wrong amount properties that were set. Probably some of the given landmarks aren\'t exist"
+            )
+
+    @staticmethod
+    async def write_routes_saved_by_user(session: AsyncSession, routes: List[Dict]) -> Dict[str, bool | List[int]]:
+        """
+        Writes all the routes in one transaction (nothing is written, if any of them can't be written).
+        index_id of all the routes are allocated from the counter at once. Landmarks are matched by their exact
+        name and coordinates.
+
+        :param routes: List[Dict["user_login": str, "landmark_info_position_dicts": List[Dict]]]
+        :return: Dict["result": bool, "index_ids": List[int]] - index_ids of the written routes in order of routes
+        """
+        try:
+            first_index_id = await session.execute_write(Creator._allocate_route_index_ids, len(routes))
+            routes = [
+                {**route, "index_id": first_index_id + route_number} for route_number, route in enumerate(routes)
+            ]
+            result = await session.execute_write(Creator._write_routes_saved_by_user, routes)
+            await logger.debug(f"method:\twrite_routes_saved_by_user,\nresult:\t{result}")
+            await Creator._emit_written_tags(ROUTES_TAG)
+            return {"result": True, "index_ids": [route["index_id"] for route in routes]}
+        except Exception as e:
+            await logger.error(f"Error while writing routes, args: {e.args[0]}")
+            return {"result": False, "index_ids": []}
+
     @staticmethod
     async def _write_saved_relationship_for_existing_route(tx, user_login: str, index_id: int):
         """Transaction handler for write_saved_relationship_for_existing_route"""
@@ -301,6 +573,7 @@ class Creator:
                 Creator._write_saved_relationship_for_existing_route, user_login, index_id
             )
             await logger.debug(f"method:\twrite_saved_relationship_for_existing_route,\nresult:\t{result}")
+            await Creator._emit_written_tags(ROUTES_TAG)
             return {"result": True}
         except Exception as e:
             await logger.error(f"Error while writing route for note, args: {e.args[0]}")
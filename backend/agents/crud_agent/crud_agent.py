@@ -4,14 +4,16 @@ CRUD Agent modul
 https://sefon.pro/mp3/474614-sektor-gaza-narkoman/
 """
 import asyncio
-from typing import Dict, List
+from typing import Dict, List, Tuple
 from jsonschema import ValidationError, validate
-from neo4j import AsyncDriver
+from neo4j import READ_ACCESS, AsyncDriver, AsyncSession
 from aiologger.loggers.json import JsonLogger
 from backend.agents.crud_agent.pure_crud_agent import PureCRUDAgent
 from backend.agents.crud_agent.reader import Reader
 from backend.agents.crud_agent.creator import Creator
 from backend.agents.crud_agent.crud_json_validation import *
+from backend.agents.crud_agent.page_cursor import decode_cursor
+from backend.agents.crud_agent.query_cache import LANDMARKS_TAG, NOTES_TAG, ROUTES_TAG, QueryCache
 
 
 logger = JsonLogger.with_default_handlers(
@@ -21,15 +23,112 @@ logger = JsonLogger.with_default_handlers(
 
 
 class CRUDAgent(PureCRUDAgent):
+    STREAM_CHUNK_SIZE = 1000  # Default amount of records in the chunk of the streaming queries
+    # Reads of get_batch: method -> (schema of params, transaction handler, keys of its args in json_params, tags of
+    # the cache)
+    BATCH_READS = {
+        "get_categories_of_region": (
+            get_categories_of_region_json,
+            Reader._read_categories_of_region,
+            ("region_name", "optional_limit", "prefix_search"),
+            (LANDMARKS_TAG,)
+        ),
+        "get_landmarks_in_map_sectors": (
+            get_landmarks_in_map_sectors_json,
+            Reader._read_landmarks_in_map_sectors,
+            ("map_sectors_names", "optional_limit", "prefix_search"),
+            (LANDMARKS_TAG,)
+        ),
+        "get_landmarks_refers_to_categories": (
+            get_landmarks_refers_to_categories_json,
+            Reader._read_landmarks_refers_to_categories,
+            ("categories_names", "optional_limit", "prefix_search"),
+            ()
+        ),
+        "get_landmarks_by_coordinates_and_name": (
+            get_landmarks_by_coordinates_and_name_json,
+            Reader._read_landmarks_by_coordinates_and_name,
+            ("coordinates_name_list", "optional_limit"),
+            ()
+        ),
+        "get_landmarks_by_name_list": (
+            get_landmarks_by_name_list_json, Reader._read_landmarks_by_name_list, ("landmark_names",), ()
+        ),
+        "get_landmarks_by_paths": (
+            get_landmarks_by_paths_json, Reader._read_landmarks_by_paths, ("landmarks_paths",), ()
+        ),
+        "get_landmarks_by_name": (
+            get_landmarks_by_name_json, Reader._read_landmarks_by_name, ("landmark_name", "limit"), ()
+        ),
+        "get_landmarks_of_categories_in_region": (
+            get_landmarks_of_categories_in_region_json,
+            Reader._read_landmarks_of_categories_in_region,
+            ("region_name", "categories_names", "optional_limit", "prefix_search"),
+            ()
+        ),
+        "get_landmarks_by_region": (
+            get_landmarks_by_region_json,
+            Reader._read_landmarks_by_region,
+            ("region_name", "optional_limit", "prefix_search"),
+            ()
+        ),
+        "get_map_sectors_of_points": (
+            get_map_sectors_of_points,
+            Reader._read_map_sectors_of_points,
+            ("coordinates_of_points", "optional_limit"),
+            ()
+        ),
+        "get_map_sectors_structure_of_region": (
+            get_map_sectors_structure_of_region,
+            Reader._read_map_sectors_structure_of_region,
+            ("region_name", "prefix_search"),
+            (LANDMARKS_TAG,)
+        ),
+        "get_landmarks_of_categories_in_map_sectors": (
+            get_landmarks_of_categories_in_map_sectors,
+            Reader._read_landmarks_of_categories_in_map_sectors,
+            ("map_sectors_names", "categories_names", "optional_limit", "prefix_search"),
+            ()
+        ),
+        "get_route_landmarks_by_index_id": (
+            get_route_landmarks_by_index_id, Reader._read_route_landmarks_by_index_id, ("index_id",), (ROUTES_TAG,)
+        ),
+        "get_routes_saved_by_user": (
+            get_routes_saved_by_user, Reader._read_routes_saved_by_user, ("user_login",), (ROUTES_TAG,)
+        ),
+        "get_range_of_routes_saved_by_user": (
+            get_range_of_routes_saved_by_user,
+            Reader._read_range_of_routes_saved_by_user,
+            ("user_login", "skip", "limit"),
+            (ROUTES_TAG,)
+        ),
+        "get_note_by_title": (get_note_by_title, Reader._read_note_by_title, ("note_title",), (NOTES_TAG,)),
+        "get_notes_in_range": (get_notes_in_range, Reader._read_notes_in_range, ("skip", "limit"), (NOTES_TAG,)),
+        "get_notes_of_categories_in_range": (
+            get_notes_of_categories_in_range,
+            Reader._read_notes_of_categories_in_range,
+            ("note_categories_names", "skip", "limit"),
+            (NOTES_TAG,)
+        ),
+        "get_recommendations_by_coordinates": (
+            get_recommendations_by_coordinates,
+            Reader._read_recommendations_by_coordinates,
+            ("coordinates_of_points", "limit"),
+            ()
+        )
+    }
     _single_crud = None
     _kb_driver = None
     _knowledgebase_name = None
+    _query_cache = None
 
     @classmethod
     async def close(cls):
         if cls._kb_driver:
             await cls._kb_driver.close()
             await logger.info("Driver closed")
+        if cls._query_cache:
+            await cls._query_cache.close()
 
     @classmethod
     def get_crud(cls):
@@ -48,31 +147,51 @@ class CRUDAgent(PureCRUDAgent):
             return False
 
     @classmethod
-    def _class_init(cls, async_kb_driver: AsyncDriver, knowledgebase_name: str):
+    def _class_init(cls, async_kb_driver: AsyncDriver, knowledgebase_name: str, query_cache: QueryCache | None):
         """
         :param async_kb_driver: async driver of knowledge base
         :param knowledgebase_name: name of knowledgebase to query
+        :param query_cache: cache of the read queries, writes of Creator invalidate it. Queries aren't cached, if it's
+        None
         """
         cls._kb_driver = async_kb_driver
         cls._knowledgebase_name = knowledgebase_name
+        cls._query_cache = query_cache
+        if query_cache is not None:
+            Creator.add_written_tags_listener(query_cache.invalidate)
 
-    def __init__(self, async_kb_driver: AsyncDriver, knowledgebase_name: str):
+    def __init__(self, async_kb_driver: AsyncDriver, knowledgebase_name: str, query_cache: QueryCache | None = None):
         """
         :param async_kb_driver: async driver of knowledge base
         :param knowledgebase_name: name of knowledgebase to query
+        :param query_cache: cache of the read queries (check query_cache.py). Queries aren't cached, if it's None
         """
         if not self._single_crud:
-            self._class_init(async_kb_driver, knowledgebase_name)
+            self._class_init(async_kb_driver, knowledgebase_name, query_cache)
             self._single_crud = self
         else:
             raise RuntimeError("Unexpected behaviour, this class can have only one instance")
 
+    @classmethod
+    async def _cached(cls, method: str, json_params: Dict, tags: Tuple[str, ...], session_runner, *args):
+        """Runs session_runner(*args) through the cache of the queries, if agent has it"""
+        if cls._query_cache is None:
+            return await session_runner(*args)
+        return await cls._query_cache.get_or_load(method, json_params, tags, session_runner, *args)
+
+    @classmethod
+    def _stream_session(cls, chunk_size: int) -> AsyncSession:
+        """Read session of the streaming queries, driver fetches records of the query by chunks of chunk_size"""
+        return cls._kb_driver.session(
+            database=cls._knowledgebase_name, fetch_size=chunk_size, default_access_mode=READ_ACCESS
+        )
+
     # Read queries
     @classmethod
     async def get_categories_of_region(cls, json_params: Dict):
-        async def session_runner(region_name: str, optional_limit: int = None):
+        async def session_runner(region_name: str, optional_limit: int = None, prefix_search: bool = False):
             async with cls._kb_driver.session(database=cls._knowledgebase_name) as session:
-                return await Reader.read_categories_of_region(session, region_name, optional_limit)
+                return await Reader.read_categories_of_region(session, region_name, optional_limit, prefix_search)
 
         try:
             validate(json_params, get_categories_of_region_json)
@@ -80,7 +199,15 @@ class CRUDAgent(PureCRUDAgent):
             if json_params["optional_limit"] and json_params["optional_limit"] <= 0:
                 raise ValidationError("optional_limit can\'t be less or equal to zero")
             return await asyncio.shield(
-                session_runner(json_params["region_name"], json_params["optional_limit"])
+                cls._cached(
+                    "get_categories_of_region",
+                    json_params,
+                    (LANDMARKS_TAG,),
+                    session_runner,
+                    json_params["region_name"],
+                    json_params["optional_limit"],
+                    json_params.get("prefix_search", False)
+                )
             )
         except ValidationError as ex:
             await logger.error(f"Validation error on json, args: {ex.args[0]}, json_params: {json_params}")
@@ -88,9 +215,11 @@ class CRUDAgent(PureCRUDAgent):
 
     @classmethod
     async def get_landmarks_in_map_sectors(cls, json_params: Dict):
-        async def session_runner(map_sectors_names: List[str], optional_limit: int = None):
+        async def session_runner(map_sectors_names: List[str], optional_limit: int = None, prefix_search: bool = False):
             async with cls._kb_driver.session(database=cls._knowledgebase_name) as session:
-                return await Reader.read_landmarks_in_map_sectors(session, map_sectors_names, optional_limit)
+                return await Reader.read_landmarks_in_map_sectors(
+                    session, map_sectors_names, optional_limit, prefix_search
+                )
 
         try:
             validate(json_params, get_landmarks_in_map_sectors_json)
@@ -98,7 +227,15 @@ class CRUDAgent(PureCRUDAgent):
             if json_params["optional_limit"] and json_params["optional_limit"] <= 0:
                 raise ValidationError("optional_limit can\'t be less or equal to zero")
             return await asyncio.shield(
-                session_runner(json_params["map_sectors_names"], json_params["optional_limit"])
+                cls._cached(
+                    "get_landmarks_in_map_sectors",
+                    json_params,
+                    (LANDMARKS_TAG,),
+                    session_runner,
+                    json_params["map_sectors_names"],
+                    json_params["optional_limit"],
+                    json_params.get("prefix_search", False)
+                )
             )
         except ValidationError as ex:
             await logger.error(f"get_landmarks_in_map_sectors. "
@@ -107,10 +244,10 @@ class CRUDAgent(PureCRUDAgent):
 
     @classmethod
     async def get_landmarks_refers_to_categories(cls, json_params: Dict):
-        async def session_runner(map_sectors_names: List[str], optional_limit: int = None):
+        async def session_runner(categories_names: List[str], optional_limit: int = None, prefix_search: bool = False):
             async with cls._kb_driver.session(database=cls._knowledgebase_name) as session:
                 return await Reader.read_landmarks_refers_to_categories(
-                    session, map_sectors_names, optional_limit
+                    session, categories_names, optional_limit, prefix_search
                 )
 
         try:
@@ -119,13 +256,33 @@ class CRUDAgent(PureCRUDAgent):
             if json_params["optional_limit"] and json_params["optional_limit"] <= 0:
                 raise ValidationError("optional_limit can\'t be less or equal to zero")
             return await asyncio.shield(
-                session_runner(json_params["categories_names"], json_params["optional_limit"])
+                session_runner(
+                    json_params["categories_names"],
+                    json_params["optional_limit"],
+                    json_params.get("prefix_search", False)
+                )
             )
         except ValidationError as ex:
             await logger.error(f"get_landmarks_refers_to_categories. "
                                f"Validation error on json, args: {ex.args[0]}, json_params: {json_params}")
             return []  # raise ValidationError
 
+    @classmethod
+    async def stream_landmarks_refers_to_categories(cls, json_params: Dict):
+        try:
+            validate(json_params, stream_landmarks_refers_to_categories_json)
+        except ValidationError as ex:
+            await logger.error(f"stream_landmarks_refers_to_categories. "
+                               f"Validation error on json, args: {ex.args[0]}, json_params: {json_params}")
+            return  # raise ValidationError
+
+        chunk_size = json_params.get("chunk_size", cls.STREAM_CHUNK_SIZE)
+        async with cls._stream_session(chunk_size) as session:
+            async for chunk in Reader.stream_landmarks_refers_to_categories(
+                session, json_params["categories_names"], chunk_size, json_params.get("prefix_search", False)
+            ):
+                yield chunk
+
     @classmethod
     async def get_landmarks_by_coordinates_and_name(cls, json_params: Dict):
         async def session_runner(
@@ -165,6 +322,22 @@ class CRUDAgent(PureCRUDAgent):
                                f"Validation error on json, args: {ex.args[0]}, json_params: {json_params}")
             return []  # raise ValidationError
 
+    @classmethod
+    async def get_landmarks_by_paths(cls, json_params: Dict):
+        async def session_runner(landmarks_paths: List[str]):
+            async with cls._kb_driver.session(database=cls._knowledgebase_name) as session:
+                return await Reader.read_landmarks_by_paths(session, landmarks_paths)
+
+        try:
+            validate(json_params, get_landmarks_by_paths_json)
+            return await asyncio.shield(
+                session_runner(json_params["landmarks_paths"])
+            )
+        except ValidationError as ex:
+            await logger.error(f"get_landmarks_by_paths. "
+                               f"Validation error on json, args: {ex.args[0]}, json_params: {json_params}")
+            return []  # raise ValidationError
+
     @classmethod
     async def get_landmarks_by_name(cls, json_params: Dict):
         async def session_runner(landmark_name: str, limit: int):
@@ -183,10 +356,12 @@ class CRUDAgent(PureCRUDAgent):
 
     @classmethod
     async def get_landmarks_of_categories_in_region(cls, json_params: Dict):
-        async def session_runner(region_name: str, categories_names: List[str], optional_limit: int = None):
+        async def session_runner(
+            region_name: str, categories_names: List[str], optional_limit: int = None, prefix_search: bool = False
+        ):
             async with cls._kb_driver.session(database=cls._knowledgebase_name) as session:
                 return await Reader.read_landmarks_of_categories_in_region(
-                    session, region_name, categories_names, optional_limit
+                    session, region_name, categories_names, optional_limit, prefix_search
                 )
 
         try:
@@ -196,7 +371,10 @@ class CRUDAgent(PureCRUDAgent):
                 raise ValidationError("optional_limit can\'t be less or equal to zero")
             return await asyncio.shield(
                 session_runner(
-                    json_params["region_name"], json_params["categories_names"], json_params["optional_limit"]
+                    json_params["region_name"],
+                    json_params["categories_names"],
+                    json_params["optional_limit"],
+                    json_params.get("prefix_search", False)
                 )
             )
         except ValidationError as ex:
@@ -206,9 +384,9 @@ class CRUDAgent(PureCRUDAgent):
 
     @classmethod
     async def get_landmarks_by_region(cls, json_params: Dict):
-        async def session_runner(region_name: str, optional_limit: int = None):
+        async def session_runner(region_name: str, optional_limit: int = None, prefix_search: bool = False):
             async with cls._kb_driver.session(database=cls._knowledgebase_name) as session:
-                return await Reader.read_landmarks_by_region(session, region_name, optional_limit)
+                return await Reader.read_landmarks_by_region(session, region_name, optional_limit, prefix_search)
 
         try:
             validate(json_params, get_landmarks_by_region_json)
@@ -216,13 +394,31 @@ class CRUDAgent(PureCRUDAgent):
             if json_params["optional_limit"] and json_params["optional_limit"] <= 0:
                 raise ValidationError("optional_limit can\'t be less or equal to zero")
             return await asyncio.shield(
-                session_runner(json_params["region_name"], json_params["optional_limit"])
+                session_runner(
+                    json_params["region_name"], json_params["optional_limit"], json_params.get("prefix_search", False)
+                )
             )
         except ValidationError as ex:
             await logger.error(f"get_landmarks_by_region. "
                                f"Validation error on json, args: {ex.args[0]}, json_params: {json_params}")
             return []  # raise ValidationError
 
+    @classmethod
+    async def stream_landmarks_by_region(cls, json_params: Dict):
+        try:
+            validate(json_params, stream_landmarks_by_region_json)
+        except ValidationError as ex:
+            await logger.error(f"stream_landmarks_by_region. "
+                               f"Validation error on json, args: {ex.args[0]}, json_params: {json_params}")
+            return  # raise ValidationError
+
+        chunk_size = json_params.get("chunk_size", cls.STREAM_CHUNK_SIZE)
+        async with cls._stream_session(chunk_size) as session:
+            async for chunk in Reader.stream_landmarks_by_region(
+                session, json_params["region_name"], chunk_size, json_params.get("prefix_search", False)
+            ):
+                yield chunk
+
     @classmethod
     async def get_map_sectors_of_points(cls, json_params: Dict):
         async def session_runner(coordinates_of_points: List[Dict[str, float]], optional_limit: int = None):
@@ -245,14 +441,21 @@ class CRUDAgent(PureCRUDAgent):
 
     @classmethod
     async def get_map_sectors_structure_of_region(cls, json_params: Dict):
-        async def session_runner(region_name: str):
+        async def session_runner(region_name: str, prefix_search: bool = False):
             async with cls._kb_driver.session(database=cls._knowledgebase_name) as session:
-                return await Reader.read_map_sectors_structure_of_region(session, region_name)
+                return await Reader.read_map_sectors_structure_of_region(session, region_name, prefix_search)
 
         try:
             validate(json_params, get_map_sectors_structure_of_region)
             return await asyncio.shield(
-                session_runner(json_params["region_name"])
+                cls._cached(
+                    "get_map_sectors_structure_of_region",
+                    json_params,
+                    (LANDMARKS_TAG,),
+                    session_runner,
+                    json_params["region_name"],
+                    json_params.get("prefix_search", False)
+                )
             )
         except ValidationError as ex:
             await logger.error(f"get_map_sectors_structure_of_region. "
@@ -261,10 +464,15 @@ class CRUDAgent(PureCRUDAgent):
 
     @classmethod
     async def get_landmarks_of_categories_in_map_sectors(cls, json_params: Dict):
-        async def session_runner(map_sectors_names: List[str], categories_names: List[str], optional_limit: int = None):
+        async def session_runner(
+            map_sectors_names: List[str],
+            categories_names: List[str],
+            optional_limit: int = None,
+            prefix_search: bool = False
+        ):
             async with cls._kb_driver.session(database=cls._knowledgebase_name) as session:
                 return await Reader.read_landmarks_of_categories_in_map_sectors(
-                    session, map_sectors_names, categories_names, optional_limit
+                    session, map_sectors_names, categories_names, optional_limit, prefix_search
                 )
 
         try:
@@ -276,7 +484,8 @@ class CRUDAgent(PureCRUDAgent):
                 session_runner(
                     json_params["map_sectors_names"],
                     json_params["categories_names"],
-                    json_params["optional_limit"]
+                    json_params["optional_limit"],
+                    json_params.get("prefix_search", False)
                 )
             )
         except ValidationError as ex:
@@ -293,7 +502,13 @@ class CRUDAgent(PureCRUDAgent):
         try:
             validate(json_params, get_route_landmarks_by_index_id)
             return await asyncio.shield(
-                session_runner(json_params["index_id"])
+                cls._cached(
+                    "get_route_landmarks_by_index_id",
+                    json_params,
+                    (ROUTES_TAG,),
+                    session_runner,
+                    json_params["index_id"]
+                )
             )
         except ValidationError as ex:
             await logger.error(f"get_route_landmarks_by_index_id. "
@@ -309,7 +524,9 @@ class CRUDAgent(PureCRUDAgent):
         try:
             validate(json_params, get_routes_saved_by_user)
             return await asyncio.shield(
-                session_runner(json_params["user_login"])
+                cls._cached(
+                    "get_routes_saved_by_user", json_params, (ROUTES_TAG,), session_runner, json_params["user_login"]
+                )
             )
         except ValidationError as ex:
             await logger.error(f"get_routes_saved_by_user. "
@@ -329,7 +546,11 @@ class CRUDAgent(PureCRUDAgent):
             if json_params["limit"] <= 0:
                 raise ValidationError("limit can\'t be less or equal to zero")
             return await asyncio.shield(
-                session_runner(
+                cls._cached(
+                    "get_range_of_routes_saved_by_user",
+                    json_params,
+                    (ROUTES_TAG,),
+                    session_runner,
                     json_params["user_login"],
                     json_params["skip"],
                     json_params["limit"]
@@ -349,7 +570,7 @@ class CRUDAgent(PureCRUDAgent):
         try:
             validate(json_params, get_note_by_title)
             return await asyncio.shield(
-                session_runner(json_params["note_title"])
+                cls._cached("get_note_by_title", json_params, (NOTES_TAG,), session_runner, json_params["note_title"])
             )
         except ValidationError as ex:
             await logger.error(f"get_note_by_title. "
@@ -369,7 +590,11 @@ class CRUDAgent(PureCRUDAgent):
             if json_params["limit"] <= 0:
                 raise ValidationError("limit can\'t be less or equal to zero")
             return await asyncio.shield(
-                session_runner(
+                cls._cached(
+                    "get_notes_in_range",
+                    json_params,
+                    (NOTES_TAG,),
+                    session_runner,
                     json_params["skip"],
                     json_params["limit"]
                 )
@@ -392,7 +617,11 @@ class CRUDAgent(PureCRUDAgent):
             if json_params["limit"] <= 0:
                 raise ValidationError("limit can\'t be less or equal to zero")
             return await asyncio.shield(
-                session_runner(
+                cls._cached(
+                    "get_notes_of_categories_in_range",
+                    json_params,
+                    (NOTES_TAG,),
+                    session_runner,
                     json_params["note_categories_names"],
                     json_params["skip"],
                     json_params["limit"]
@@ -403,6 +632,83 @@ class CRUDAgent(PureCRUDAgent):
                                f"Validation error on json, args: {ex.args[0]}, json_params: {json_params}")
             return []  # raise ValidationError
 
+    @staticmethod
+    def _page_after(kind: str, json_params: Dict) -> Dict | None:
+        """Returns key of the last item of the previous page from the cursor of json_params"""
+        if json_params.get("cursor") is None:
+            return None
+        try:
+            return decode_cursor(kind, json_params["cursor"])
+        except ValueError as ex:
+            raise ValidationError(ex.args[0])
+
+    @classmethod
+    async def get_notes_page(cls, json_params: Dict):
+        async def session_runner(after: Dict | None, limit: int):
+            async with cls._kb_driver.session(database=cls._knowledgebase_name) as session:
+                return await Reader.read_notes_page(session, after, limit)
+
+        try:
+            validate(json_params, get_notes_page)
+            after = cls._page_after("notes", json_params)
+            return await asyncio.shield(
+                cls._cached("get_notes_page", json_params, (NOTES_TAG,), session_runner, after, json_params["limit"])
+            )
+        except ValidationError as ex:
+            await logger.error(f"get_notes_page. "
+                               f"Validation error on json, args: {ex.args[0]}, json_params: {json_params}")
+            return {"items": [], "next_cursor": None}  # raise ValidationError
+
+    @classmethod
+    async def get_notes_of_categories_page(cls, json_params: Dict):
+        async def session_runner(note_categories_names: List[str], after: Dict | None, limit: int):
+            async with cls._kb_driver.session(database=cls._knowledgebase_name) as session:
+                return await Reader.read_notes_of_categories_page(session, note_categories_names, after, limit)
+
+        try:
+            validate(json_params, get_notes_of_categories_page)
+            after = cls._page_after("notes", json_params)
+            return await asyncio.shield(
+                cls._cached(
+                    "get_notes_of_categories_page",
+                    json_params,
+                    (NOTES_TAG,),
+                    session_runner,
+                    json_params["note_categories_names"],
+                    after,
+                    json_params["limit"]
+                )
+            )
+        except ValidationError as ex:
+            await logger.error(f"get_notes_of_categories_page. "
+                               f"Validation error on json, args: {ex.args[0]}, json_params: {json_params}")
+            return {"items": [], "next_cursor": None}  # raise ValidationError
+
+    @classmethod
+    async def get_page_of_routes_saved_by_user(cls, json_params: Dict):
+        async def session_runner(user_login: str, after: Dict | None, limit: int):
+            async with cls._kb_driver.session(database=cls._knowledgebase_name) as session:
+                return await Reader.read_page_of_routes_saved_by_user(session, user_login, after, limit)
+
+        try:
+            validate(json_params, get_page_of_routes_saved_by_user)
+            after = cls._page_after("routes_saved_by_user", json_params)
+            return await asyncio.shield(
+                cls._cached(
+                    "get_page_of_routes_saved_by_user",
+                    json_params,
+                    (ROUTES_TAG,),
+                    session_runner,
+                    json_params["user_login"],
+                    after,
+                    json_params["limit"]
+                )
+            )
+        except ValidationError as ex:
+            await logger.error(f"get_page_of_routes_saved_by_user. "
+                               f"Validation error on json, args: {ex.args[0]}, json_params: {json_params}")
+            return {"items": [], "next_cursor": None}  # raise ValidationError
+
     @classmethod
     async def get_recommendations_by_coordinates(cls, json_params: Dict):
         async def session_runner(coordinates_of_points: List[Dict[str, float]], limit: int):
@@ -423,6 +729,64 @@ class CRUDAgent(PureCRUDAgent):
                                f"Validation error on json, args: {ex.args[0]}, json_params: {json_params}")
             return []  # raise ValidationError
 
+    @classmethod
+    async def _batch_read(cls, method: str, params: Dict) -> Tuple | None:
+        """
+        Validates params of the read of the batch in the same way as the read method does it.
+        :return: (method, params, transaction handler, its args, tags of the cache) or None, if read is invalid
+        """
+        try:
+            if method not in cls.BATCH_READS:
+                raise ValidationError(f"{method} can\'t be read in batch")
+            schema, handler, keys, tags = cls.BATCH_READS[method]
+            validate(params, schema)
+            if "optional_limit" in keys:
+                params["optional_limit"] = params.get("optional_limit", None)
+                if params["optional_limit"] and params["optional_limit"] <= 0:
+                    raise ValidationError("optional_limit can\'t be less or equal to zero")
+            if "skip" in keys and params["skip"] < 0:
+                raise ValidationError("skip can\'t be less than zero")
+            if "limit" in keys and params["limit"] <= 0:
+                raise ValidationError("limit can\'t be less or equal to zero")
+        except ValidationError as ex:
+            await logger.error(f"get_batch. "
+                               f"Validation error on json, args: {ex.args[0]}, method: {method}, params: {params}")
+            return None
+        args = [params.get(key, False) if key == "prefix_search" else params[key] for key in keys]
+        return method, params, handler, args, tags
+
+    @classmethod
+    async def get_batch(cls, json_params: Dict):
+        async def batch_transaction(tx, reads: List[Tuple | None]):
+            results = []
+            for read in reads:
+                if read is None:
+                    results.append([])
+                    continue
+                method, params, handler, args, tags = read
+                if tags:
+                    results.append(await cls._cached(method, params, tags, handler, tx, *args))
+                else:
+                    results.append(await handler(tx, *args))
+            return results
+
+        async def session_runner(reads: List[Tuple | None]):
+            if all(read is None for read in reads):
+                return [[] for _ in reads]
+            async with cls._kb_driver.session(database=cls._knowledgebase_name) as session:
+                return await session.execute_read(batch_transaction, reads)
+
+        try:
+            validate(json_params, get_batch_json)
+            reads = [await cls._batch_read(read["method"], read["params"]) for read in json_params["reads"]]
+            return await asyncio.shield(
+                session_runner(reads)
+            )
+        except ValidationError as ex:
+            await logger.error(f"get_batch. "
+                               f"Validation error on json, args: {ex.args[0]}, json_params: {json_params}")
+            return []  # raise ValidationError
+
 
     # Write queries
 
@@ -523,3 +887,69 @@ class CRUDAgent(PureCRUDAgent):
             await logger.error(f"put_saved_relationship_for_existing_route. "
                                f"Validation error on json, args: {ex.args[0]}, json_params: {json_params}")
             return {"result": False}  # raise ValidationError
+
+    # Bulk write queries
+
+    @classmethod
+    async def put_users(cls, json_params: Dict):
+        async def session_runner(user_logins: List[str]):
+            async with cls._kb_driver.session(database=cls._knowledgebase_name) as session:
+                return await Creator.write_users(session, user_logins)
+
+        try:
+            validate(json_params, put_users)
+            return await asyncio.shield(
+                session_runner(json_params["user_logins"])
+            )
+        except ValidationError as ex:
+            await logger.error(f"put_users. "
+                               f"Validation error on json, args: {ex.args[0]}, json_params: {json_params}")
+            return {"result": False}  # raise ValidationError
+
+    @classmethod
+    async def put_notes(cls, json_params: Dict):
+        async def session_runner(notes: List[Dict]):
+            async with cls._kb_driver.session(database=cls._knowledgebase_name) as session:
+                return await Creator.write_notes(session, notes)
+
+        try:
+            validate(json_params, put_notes)
+            return await asyncio.shield(
+                session_runner(json_params["notes"])
+            )
+        except ValidationError as ex:
+            await logger.error(f"put_notes. "
+                               f"Validation error on json, args: {ex.args[0]}, json_params: {json_params}")
+            return {"result": False}  # raise ValidationError
+
+    @classmethod
+    async def put_routes_for_notes(cls, json_params: Dict):
+        async def session_runner(routes: List[Dict]):
+            async with cls._kb_driver.session(database=cls._knowledgebase_name) as session:
+                return await Creator.write_routes_for_notes(session, routes)
+
+        try:
+            validate(json_params, put_routes_for_notes)
+            return await asyncio.shield(
+                session_runner(json_params["routes"])
+            )
+        except ValidationError as ex:
+            await logger.error(f"put_routes_for_notes. "
+                               f"Validation error on json, args: {ex.args[0]}, json_params: {json_params}")
+            return {"result": False, "index_ids": []}  # raise ValidationError
+
+    @classmethod
+    async def put_routes_saved_by_user(cls, json_params: Dict):
+        async def session_runner(routes: List[Dict]):
+            async with cls._kb_driver.session(database=cls._knowledgebase_name) as session:
+                return await Creator.write_routes_saved_by_user(session, routes)
+
+        try:
+            validate(json_params, put_routes_saved_by_user)
+            return await asyncio.shield(
+                session_runner(json_params["routes"])
+            )
+        except ValidationError as ex:
+            await logger.error(f"put_routes_saved_by_user. "
+                               f"Validation error on json, args: {ex.args[0]}, json_params: {json_params}")
+            return {"result": False, "index_ids": []}  # raise ValidationError
@@ -11,6 +11,201 @@ from backend.broker.agents_broker import AgentsBroker
 
 if __name__ == '__main__':
 
+    async def call(agent_task, json_params):
+        """Calls agent task and returns its return value"""
+        return (await AbstractAgentsBroker.call_agent_task(agent_task, json_params)).return_value
+
+    async def note_by_title(note_title):
+        """Returns note of exact title or None"""
+        notes = await call(crud_tasks.note_by_title_task, {"note_title": note_title})
+        notes = [note["note"] for note in notes if note["note"] is not None and note["note"]["title"] == note_title]
+        assert len(notes) <= 1, notes
+        return notes[0] if notes else None
+
+    async def amount_of_routes_saved_by_user(user_login):
+        routes = await call(crud_tasks.routes_saved_by_user_task, {"user_login": user_login})
+        return len([route for route in routes if route["route"] is not None])
+
+    async def test_bulk_writes():
+        """Checks bulk writes of notes and routes and pagination of the written notes"""
+        from backend.agents.crud_agent.creator import ROUTE_INDEX_ID_SEQUENCE
+        from backend.agents.crud_agent.crud_agent import CRUDAgent
+        from backend.agents.crud_agent.page_cursor import decode_cursor
+
+        run_id = datetime.datetime.now().strftime("%Y%m%d%H%M%S%f")
+        # Guide accounts aren't created by crud agent, both guides must exist in kb
+        guide_logins = ("Алан Смити", "Test guide")
+        landmark_info_position_dicts = [
+            {"name": "Минская ратуша", "position": 0, "latitude": 53.90333, "longitude": 27.55611},
+            {"name": "Минск — город-герой", "position": 1, "latitude": 53.9159, "longitude": 27.5381}
+        ]
+
+        # Notes of several guides in one batch: id_code of notes of each guide continue last_note_id_code of the guide
+        last_note_id_codes = {}
+        guide_path_parts = {}
+        for batch_number, guides_of_notes in enumerate((
+                (guide_logins[0], guide_logins[1], guide_logins[0], guide_logins[1], guide_logins[0]),
+                (guide_logins[1], guide_logins[0])
+        )):
+            notes = [
+                {
+                    "guide_login": guide_login,
+                    "country_names": ["Беларусь"],
+                    "note_title": f"Bulk test {run_id} {batch_number} {note_number}",
+                    "note_category_names": ["Test Category"]
+                } for note_number, guide_login in enumerate(guides_of_notes)
+            ]
+            assert (await call(crud_tasks.post_notes_task, {"notes": notes}))["result"]
+            for note_info in notes:
+                note = await note_by_title(note_info["note_title"])
+                assert note is not None, note_info
+                guide_login = note_info["guide_login"]
+                if guide_login in last_note_id_codes:
+                    assert note["id_code"] == last_note_id_codes[guide_login] + 1, (note_info, note)
+                last_note_id_codes[guide_login] = note["id_code"]
+
+                assert len(note["path_list"]) == 1, note
+                path_parts = note["path_list"][0].split("/")
+                assert path_parts[0] == "notes" and path_parts[3:] == [str(note["id_code"]), ""], note
+                assert guide_path_parts.setdefault(guide_login, path_parts[:3]) == path_parts[:3], note
+        assert guide_path_parts[guide_logins[0]][2] != guide_path_parts[guide_logins[1]][2], guide_path_parts
+        print("Notes of several guides are fine")
+
+        # Nothing is written, if any of the notes can't be written
+        for broken_note in (
+                {"guide_login": f"No guide {run_id}", "country_names": ["Беларусь"]},
+                {"guide_login": guide_logins[0], "country_names": [f"No country {run_id}"]}
+        ):
+            notes = [
+                {
+                    "guide_login": guide_logins[1],
+                    "country_names": ["Беларусь"],
+                    "note_title": f"Bulk test {run_id} rollback 0",
+                    "note_category_names": ["Test Category"]
+                },
+                {**broken_note, "note_title": f"Bulk test {run_id} rollback 1", "note_category_names": []}
+            ]
+            assert not (await call(crud_tasks.post_notes_task, {"notes": notes}))["result"]
+            for note_info in notes:
+                assert await note_by_title(note_info["note_title"]) is None, note_info
+        notes = [
+            {
+                "guide_login": guide_login,
+                "country_names": ["Беларусь"],
+                "note_title": f"Bulk test {run_id} after rollback {guide_login}",
+                "note_category_names": ["Test Category"]
+            } for guide_login in guide_logins
+        ]
+        assert (await call(crud_tasks.post_notes_task, {"notes": notes}))["result"]
+        for note_info in notes:
+            note = await note_by_title(note_info["note_title"])
+            assert note["id_code"] == last_note_id_codes[note_info["guide_login"]] + 1, (note_info, note)
+        print("Rollback of notes is fine")
+
+        # Notes of one batch share last_update, so pages of limit 2 are split between the notes with the same
+        # last_update (they are ordered by title). Notes of the batch are the newest ones (don't run the test with
+        # other writers of notes)
+        titles = [f"Bulk test {run_id} page {note_number}" for note_number in range(5)]
+        notes = [
+            {
+                "guide_login": guide_logins[note_number % 2],
+                "country_names": ["Беларусь"],
+                "note_title": title,
+                "note_category_names": ["Test Category"]
+            } for note_number, title in reversed(list(enumerate(titles)))
+        ]
+        assert (await call(crud_tasks.post_notes_task, {"notes": notes}))["result"]
+        for agent_task, json_params in (
+                (crud_tasks.notes_page_task, {}),
+                (crud_tasks.notes_of_categories_page_task, {"note_categories_names": ["Test Category"]})
+        ):
+            page_titles = []
+            cursor = None
+            for _ in range(3):
+                page = await call(agent_task, {**json_params, "cursor": cursor, "limit": 2})
+                assert len(page["items"]) == 2 and page["next_cursor"] is not None, page
+                cursor = page["next_cursor"]
+                assert decode_cursor("notes", cursor)["title"] == page["items"][-1]["note"]["title"]
+                page_titles.extend(item["note"]["title"] for item in page["items"])
+            assert page_titles[:5] == titles, page_titles
+            assert page_titles[5] not in titles, page_titles
+        print("Pages of notes of one batch are fine")
+
+        # Counter of index_id is seeded by the max index_id of the routes, concurrent allocations don't intersect
+        user_login = f"Bulk test user {run_id}"
+        assert (await call(crud_tasks.post_users_task, {"user_logins": [user_login]}))["result"]
+        async with CRUDAgent._kb_driver.session(database=CRUDAgent._knowledgebase_name) as session:
+            result = await session.run(
+                "MATCH (sequence: Sequence {name: $sequence_name}) DELETE sequence",
+                sequence_name=ROUTE_INDEX_ID_SEQUENCE
+            )
+            await result.consume()
+            result = await session.run("MATCH (route: Route) RETURN max(route.index_id) AS max_index_id")
+            max_index_id = (await result.single())["max_index_id"] or 0
+        written_routes = await asyncio.gather(
+            *(
+                call(
+                    crud_tasks.post_routes_saved_by_user_task,
+                    {
+                        "routes": [
+                            {"user_login": user_login, "landmark_info_position_dicts": landmark_info_position_dicts}
+                        ] * 3
+                    }
+                ) for _ in range(4)
+            ),
+            *(
+                call(
+                    crud_tasks.post_routes_for_notes_task,
+                    {
+                        "routes": [
+                            {
+                                "note_title": f"Bulk test {run_id} 0 {note_number}",
+                                "landmark_info_position_dicts": landmark_info_position_dicts
+                            } for note_number in range(2 * call_number, 2 * call_number + 2)
+                        ]
+                    }
+                ) for call_number in range(2)
+            )
+        )
+        index_ids = []
+        for routes in written_routes:
+            assert routes["result"], written_routes
+            first_index_id = routes["index_ids"][0]
+            assert routes["index_ids"] == list(range(first_index_id, first_index_id + len(routes["index_ids"]))), \
+                written_routes
+            index_ids.extend(routes["index_ids"])
+        assert sorted(index_ids) == list(range(max_index_id + 1, max_index_id + 1 + 4 * 3 + 2 * 2)), written_routes
+        assert await amount_of_routes_saved_by_user(user_login) == 4 * 3
+        print("Allocation of index_id is fine")
+
+        # Nothing is written, if any of the routes can't be written
+        for broken_route in (
+                {"user_login": f"No user {run_id}", "landmark_info_position_dicts": landmark_info_position_dicts},
+                {
+                    "user_login": user_login,
+                    "landmark_info_position_dicts": [
+                        {"name": f"No landmark {run_id}", "position": 0, "latitude": 0.0, "longitude": 0.0}
+                    ]
+                }
+        ):
+            routes = await call(
+                crud_tasks.post_routes_saved_by_user_task,
+                {
+                    "routes": [
+                        {"user_login": user_login, "landmark_info_position_dicts": landmark_info_position_dicts},
+                        broken_route
+                    ]
+                }
+            )
+            assert routes == {"result": False, "index_ids": []}, routes
+            assert await amount_of_routes_saved_by_user(user_login) == 4 * 3
+        routes = await call(
+            crud_tasks.post_routes_saved_by_user_task,
+            {"routes": [{"user_login": user_login, "landmark_info_position_dicts": landmark_info_position_dicts}]}
+        )
+        assert routes["result"] and routes["index_ids"][0] > max(index_ids), routes
+        print("Rollback of routes is fine")
+
     #async def test(login, password):
     async def test():
 
@@ -128,6 +323,8 @@ if __name__ == '__main__':
         pprint(res4.return_value)
         pprint(res5.return_value)
 
+        await test_bulk_writes()
+
 
 
 
@@ -4,6 +4,7 @@ from neo4j import AsyncGraphDatabase
 from backend.agents.crud_agent.reader import Reader
 from backend.agents.crud_agent.creator import Creator
 from backend.agents.crud_agent.crud_agent import CRUDAgent
+from backend.agents.crud_agent.query_cache import QueryCache
 
 # with open("backend/agents/crud_agent/basic_login.json", 'r') as fout:
 #     basic_login = json.load(fout)
@@ -14,5 +15,7 @@ if CRUDAgent.crud_exists():
     print("Crud was not created")  # TODO remove
 else:
     driver = AsyncGraphDatabase.driver('bolt://localhost:7687', auth=("neo4j", "ostisGovno"))
-    CRUD_AGENT = CRUDAgent(driver, 'neo4j')
+    # Local tier of the cache keeps results for a minute, shared tier is kept in Redis of the broker
+    query_cache = QueryCache(max_entries=4096, ttl=60, redis_url="redis://localhost:6379", redis_ttl=600)
+    CRUD_AGENT = CRUDAgent(driver, 'neo4j', query_cache)
     print("Crud was created")  # TODO remove
@@ -7,10 +7,11 @@ get_categories_of_region_json = \
         "type": "object",
         "properties": {
             "region_name": {"type": "string"},
-            "optional_limit": {"type": ["number", "null"]}
+            "optional_limit": {"type": ["number", "null"]},
+            "prefix_search": {"type": "boolean"}
         },
         "required": ["region_name"],
-        "maxProperties": 2,
+        "maxProperties": 3,
         "additionalProperties": False
     }
 
@@ -30,10 +31,11 @@ get_landmarks_in_map_sectors_json = \
                     "additionalProperties": False
                 },
             "optional_limit": {"type": ["number", "null"]},
+            "prefix_search": {"type": "boolean"},
             "additionalProperties": False
         },
         "required": ["map_sectors_names"],
-        "maxProperties": 2,
+        "maxProperties": 3,
         "additionalProperties": False
     }
 
@@ -53,10 +55,33 @@ get_landmarks_refers_to_categories_json = \
                     "additionalProperties": False
                 },
             "optional_limit": {"type": ["number", "null"]},
+            "prefix_search": {"type": "boolean"},
             "additionalProperties": False
         },
         "required": ["categories_names"],
-        "maxProperties": 2,
+        "maxProperties": 3,
+        "additionalProperties": False
+    }
+
+"""
+stream_landmarks_refers_to_categories
+"""
+stream_landmarks_refers_to_categories_json = \
+    {
+        "type": "object",
+        "properties": {
+            "categories_names":
+                {
+                    "type": "array",
+                    "items": {
+                        "type": "string"
+                    }
+                },
+            "chunk_size": {"type": "integer", "minimum": 1},
+            "prefix_search": {"type": "boolean"}
+        },
+        "required": ["categories_names"],
+        "maxProperties": 3,
         "additionalProperties": False
     }
 
@@ -112,6 +137,26 @@ get_landmarks_by_name_list_json = \
         "additionalProperties": False
     }
 
+"""
+get_landmarks_by_paths
+"""
+get_landmarks_by_paths_json = \
+    {
+        "type": "object",
+        "properties": {
+            "landmarks_paths":
+                {
+                    "type": "array",
+                    "items": {
+                        "type": "string"
+                    }
+                }
+        },
+        "required": ["landmarks_paths"],
+        "maxProperties": 1,
+        "additionalProperties": False
+    }
+
 """
 get_landmarks_by_name
 """
@@ -146,10 +191,11 @@ get_landmarks_of_categories_in_region_json = \
                         "type": "string"
                     },
                 },
-            "optional_limit": {"type": ["number", "null"]}
+            "optional_limit": {"type": ["number", "null"]},
+            "prefix_search": {"type": "boolean"}
         },
         "required": ["categories_names", "region_name"],
-        "maxProperties": 3,
+        "maxProperties": 4,
         "additionalProperties": False
     }
 
@@ -162,10 +208,28 @@ get_landmarks_by_region_json = \
         "type": "object",
         "properties": {
             "region_name": {"type": "string"},
-            "optional_limit": {"type": ["number", "null"]}
+            "optional_limit": {"type": ["number", "null"]},
+            "prefix_search": {"type": "boolean"}
         },
         "required": ["region_name"],
-        "maxProperties": 2,
+        "maxProperties": 3,
+        "additionalProperties": False
+    }
+
+
+"""
+stream_landmarks_by_region
+"""
+stream_landmarks_by_region_json = \
+    {
+        "type": "object",
+        "properties": {
+            "region_name": {"type": "string"},
+            "chunk_size": {"type": "integer", "minimum": 1},
+            "prefix_search": {"type": "boolean"}
+        },
+        "required": ["region_name"],
+        "maxProperties": 3,
         "additionalProperties": False
     }
 
@@ -205,10 +269,11 @@ get_map_sectors_structure_of_region = \
     {
         "type": "object",
         "properties": {
-            "region_name": {"type": "string"}
+            "region_name": {"type": "string"},
+            "prefix_search": {"type": "boolean"}
         },
         "required": ["region_name"],
-        "maxProperties": 1,
+        "maxProperties": 2,
         "additionalProperties": False
     }
 
@@ -229,10 +294,11 @@ get_landmarks_of_categories_in_map_sectors = \
                 "items": {"type": "string"}
 
             },
-            "optional_limit": {"type": ["null", "number"]}
+            "optional_limit": {"type": ["null", "number"]},
+            "prefix_search": {"type": "boolean"}
         },
         "required": ["map_sectors_names", "categories_names"],
-        "maxProperties": 3,
+        "maxProperties": 4,
         "additionalProperties": False
     }
 
@@ -330,6 +396,58 @@ get_notes_of_categories_in_range = \
         "additionalProperties": False
     }
 
+"""
+get_notes_page
+"""
+get_notes_page = \
+    {
+        "type": "object",
+        "properties": {
+            "cursor": {"type": ["string", "null"]},
+            "limit": {"type": "integer", "minimum": 1}
+        },
+        "required": ["limit"],
+        "maxProperties": 2,
+        "additionalProperties": False
+    }
+
+"""
+get_notes_of_categories_page
+"""
+get_notes_of_categories_page = \
+    {
+        "type": "object",
+        "properties": {
+            "note_categories_names": {
+                "type": "array",
+                "items": {
+                    "type": "string"
+                }
+            },
+            "cursor": {"type": ["string", "null"]},
+            "limit": {"type": "integer", "minimum": 1}
+        },
+        "required": ["note_categories_names", "limit"],
+        "maxProperties": 3,
+        "additionalProperties": False
+    }
+
+"""
+get_page_of_routes_saved_by_user
+"""
+get_page_of_routes_saved_by_user = \
+    {
+        "type": "object",
+        "properties": {
+            "user_login": {"type": "string"},
+            "cursor": {"type": ["string", "null"]},
+            "limit": {"type": "integer", "minimum": 1}
+        },
+        "required": ["user_login", "limit"],
+        "maxProperties": 3,
+        "additionalProperties": False
+    }
+
 """
 get_recommendations_by_coordinates
 """
@@ -361,6 +479,33 @@ get_recommendations_by_coordinates = \
         "additionalProperties": False
     }
 
+"""
+get_batch
+"""
+get_batch_json = \
+    {
+        "type": "object",
+        "properties": {
+            "reads": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "method": {"type": "string"},
+                        "params": {"type": "object"}
+                    },
+                    "required": ["method", "params"],
+                    "maxProperties": 2,
+                    "additionalProperties": False
+                },
+                "maxItems": 64
+            }
+        },
+        "required": ["reads"],
+        "maxProperties": 1,
+        "additionalProperties": False
+    }
+
 # Write validation
 """
 put_user
@@ -471,3 +616,80 @@ saved_relationship_for_existing_route = \
         "maxProperties": 2,
         "additionalProperties": False
     }
+
+# Bulk write validation
+"""
+put_users
+"""
+put_users = \
+    {
+        "type": "object",
+        "properties": {
+            "user_logins": {
+                "type": "array",
+                "items": {"type": "string"},
+                "minItems": 1,
+                "maxItems": 1000
+            }
+        },
+        "required": ["user_logins"],
+        "maxProperties": 1,
+        "additionalProperties": False
+    }
+
+"""
+put_notes
+"""
+put_notes = \
+    {
+        "type": "object",
+        "properties": {
+            "notes": {
+                "type": "array",
+                "items": put_note,
+                "minItems": 1,
+                "maxItems": 1000
+            }
+        },
+        "required": ["notes"],
+        "maxProperties": 1,
+        "additionalProperties": False
+    }
+
+"""
+put_routes_for_notes
+"""
+put_routes_for_notes = \
+    {
+        "type": "object",
+        "properties": {
+            "routes": {
+                "type": "array",
+                "items": put_route_for_note,
+                "minItems": 1,
+                "maxItems": 1000
+            }
+        },
+        "required": ["routes"],
+        "maxProperties": 1,
+        "additionalProperties": False
+    }
+
+"""
+put_routes_saved_by_user
+"""
+put_routes_saved_by_user = \
+    {
+        "type": "object",
+        "properties": {
+            "routes": {
+                "type": "array",
+                "items": put_route_saved_by_user,
+                "minItems": 1,
+                "maxItems": 1000
+            }
+        },
+        "required": ["routes"],
+        "maxProperties": 1,
+        "additionalProperties": False
+    }
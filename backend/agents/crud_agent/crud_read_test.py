@@ -15,6 +15,126 @@ from backend.broker.agents_broker import AgentsBroker
 
 if __name__ == '__main__':
 
+    async def call(agent_task, json_params):
+        """Calls agent task and returns its return value"""
+        return (await AbstractAgentsBroker.call_agent_task(agent_task, json_params)).return_value
+
+    async def walk_pages(agent_task, json_params, limit):
+        """Returns all the pages, that were got by following next_cursor from the first page"""
+        pages = []
+        cursor = None
+        while True:
+            page = await call(agent_task, {**json_params, "cursor": cursor, "limit": limit})
+            assert len(page["items"]) <= limit, page
+            pages.append(page)
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return pages
+
+    async def test_pages():
+        """Checks keyset pagination on the notes and routes, that are written by this test"""
+        from jsonschema import ValidationError
+        from backend.agents.crud_agent.crud_agent import CRUDAgent
+        from backend.agents.crud_agent.page_cursor import decode_cursor, encode_cursor
+
+        run_id = datetime.datetime.now().strftime("%Y%m%d%H%M%S%f")
+
+        # Cursors
+        cursor = encode_cursor("notes", {"last_update": "2024-01-01T00:00:00+00:00", "title": "Тест"})
+        assert decode_cursor("notes", cursor) == {"last_update": "2024-01-01T00:00:00+00:00", "title": "Тест"}
+        for kind, broken_cursor in (
+                ("notes", "xx"),
+                ("notes", "not a cursor"),
+                ("notes", encode_cursor("routes_saved_by_user", {"index_id": 1})),
+                ("routes_saved_by_user", cursor)
+        ):
+            try:
+                decode_cursor(kind, broken_cursor)
+                assert False, f"Cursor {broken_cursor} of {kind} was decoded"
+            except ValueError:
+                pass
+            try:
+                CRUDAgent._page_after(kind, {"cursor": broken_cursor, "limit": 2})
+                assert False, f"Cursor {broken_cursor} of {kind} was accepted"
+            except ValidationError:
+                pass
+        assert CRUDAgent._page_after("notes", {"cursor": None, "limit": 2}) is None
+        for agent_task, json_params in (
+                (crud_tasks.notes_page_task, {"cursor": "xx", "limit": 2}),
+                (
+                    crud_tasks.notes_page_task,
+                    {"cursor": encode_cursor("routes_saved_by_user", {"index_id": 1}), "limit": 2}
+                ),
+                (
+                    crud_tasks.page_of_routes_saved_by_user_task,
+                    {"user_login": "Test user", "cursor": cursor, "limit": 2}
+                )
+        ):
+            assert await call(agent_task, json_params) == {"items": [], "next_cursor": None}
+        print("Cursors are fine")
+
+        # Notes are written one by one, so the last one is the newest. Notes of the test are the newest ones (don't
+        # run the test with other writers of notes)
+        titles = [f"Pagination test {run_id} {note_number}" for note_number in range(5)]
+        for title in reversed(titles):
+            assert (await call(
+                crud_tasks.post_note_task,
+                {
+                    "guide_login": "Алан Смити",
+                    "country_names": ["Беларусь"],
+                    "note_title": title,
+                    "note_category_names": ["Test Category"]
+                }
+            ))["result"]
+        for agent_task, json_params in (
+                (crud_tasks.notes_page_task, {}),
+                (crud_tasks.notes_of_categories_page_task, {"note_categories_names": ["Test Category"]})
+        ):
+            page_titles = []
+            cursor = None
+            for _ in range(3):
+                page = await call(agent_task, {**json_params, "cursor": cursor, "limit": 2})
+                assert len(page["items"]) == 2 and page["next_cursor"] is not None, page
+                cursor = page["next_cursor"]
+                assert decode_cursor("notes", cursor)["title"] == page["items"][-1]["note"]["title"]
+                page_titles.extend(item["note"]["title"] for item in page["items"])
+            assert page_titles[:5] == titles, page_titles
+            assert page_titles[5] not in titles, page_titles
+        print("Pages of notes are fine")
+
+        # Last page of routes has exactly limit routes or less
+        user_login = f"Pagination test user {run_id}"
+        assert (await call(crud_tasks.post_user_task, {"user_login": user_login}))["result"]
+        for _ in range(4):
+            assert (await call(
+                crud_tasks.post_route_saved_by_user_task,
+                {
+                    "user_login": user_login,
+                    "landmark_info_position_dicts": [
+                        {"name": "Минская ратуша", "position": 0, "latitude": 53.90333, "longitude": 27.55611}
+                    ]
+                }
+            ))["result"]
+        index_ids = None
+        for limit, page_sizes in ((5, [4]), (4, [4]), (3, [3, 1]), (2, [2, 2]), (1, [1, 1, 1, 1])):
+            pages = await walk_pages(
+                crud_tasks.page_of_routes_saved_by_user_task, {"user_login": user_login}, limit
+            )
+            assert [len(page["items"]) for page in pages] == page_sizes, (limit, pages)
+            page_index_ids = [item["route"]["index_id"] for page in pages for item in page["items"]]
+            if index_ids is None:
+                index_ids = page_index_ids
+                assert index_ids == sorted(set(index_ids)), index_ids
+            assert page_index_ids == index_ids, (limit, page_index_ids)
+            for page in pages[:-1]:
+                assert decode_cursor("routes_saved_by_user", page["next_cursor"]) == \
+                       {"index_id": page["items"][-1]["route"]["index_id"]}
+        empty_pages = await walk_pages(
+            crud_tasks.page_of_routes_saved_by_user_task, {"user_login": f"No user {run_id}"}, 2
+        )
+        assert empty_pages == [{"items": [], "next_cursor": None}], empty_pages
+        print("Pages of routes are fine")
+
     #async def test(login, password):
     async def test():
 
@@ -346,6 +466,8 @@ if __name__ == '__main__':
         print("\n\nres18")
         pprint(res18.return_value)
 
+        await test_pages()
+
 
 
         # Closing Broker listeting (Such code will be located in main, not in agent)
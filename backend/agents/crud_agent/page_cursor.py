@@ -0,0 +1,35 @@
+# Author: Vodohleb04
+"""
+Opaque cursors of the keyset pagination of CRUDAgent.
+
+Cursor keeps the key of the last item of the page (e.g. last_update and title of the note), the next page starts right
+after this key, so the page is found by the range index instead of skipping all previous items. Cursor is url-safe
+base64 of JSON, callers must not build or parse it.
+"""
+import base64
+import binascii
+import json
+from typing import Dict
+
+
+def encode_cursor(kind: str, key: Dict) -> str:
+    """
+    :param kind: kind of the pages (cursor of one kind of pages can't be used with the others)
+    :param key: key of the last item of the page
+    """
+    data = json.dumps({"kind": kind, "key": key}, ensure_ascii=False, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_cursor(kind: str, cursor: str) -> Dict:
+    """
+    Returns key of the last item of the previous page.
+    :raises ValueError: if cursor is broken or it belongs to other kind of pages
+    """
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError("Cursor is broken")
+    if not isinstance(data, dict) or data.get("kind") != kind or not isinstance(data.get("key"), dict):
+        raise ValueError(f"Cursor isn't a cursor of {kind}")
+    return data["key"]
@@ -49,7 +49,8 @@ class PureCRUDAgent(ABC):
 
         :param json_params: Dict in form {
                 "region_name": str,
-                "optional_limit": int | None
+                "optional_limit": int | None,
+                "prefix_search": bool (optional) - if True, finds by the start of the names (exact names by default)
             }
         :return: Coroutine
             List[
@@ -70,7 +71,8 @@ class PureCRUDAgent(ABC):
 
         :param json_params: Dict in form {
                 "map_sectors_names": List[str],
-                "optional_limit": int | None
+                "optional_limit": int | None,
+                "prefix_search": bool (optional) - if True, finds by the start of the names (exact names by default)
             }
         :return: Coroutine
             List [
@@ -92,7 +94,8 @@ class PureCRUDAgent(ABC):
 
         :param json_params: Dict in form {
                 "categories_names": List[str],
-                "optional_limit": int | None
+                "optional_limit": int | None,
+                "prefix_search": bool (optional) - if True, finds by the start of the names (exact names by default)
             }
         :return: Coroutine
             List [
@@ -104,6 +107,30 @@ class PureCRUDAgent(ABC):
         """
         raise NotImplementedError
 
+    @classmethod
+    @abstractmethod
+    async def stream_landmarks_refers_to_categories(cls, json_params: Dict):
+        """
+        Streaming variant of get_landmarks_refers_to_categories. Yields landmarks by chunks as soon as they are fetched
+        from kb, so memory usage doesn't depend on the amount of the landmarks. Yields nothing, if json_params are
+        invalid.
+        Works asynchronously.
+
+        :param json_params: Dict in form {
+                "categories_names": List[str],
+                "chunk_size": int (optional) - maximum amount of landmarks in the chunk,
+                "prefix_search": bool (optional) - if True, finds by the start of the names (exact names by default)
+            }
+        :return: AsyncGenerator of the chunks
+            List [
+                {
+                    "landmark": Dict | None,
+                    "category": Dict | None
+                }
+            ]
+        """
+        raise NotImplementedError
+
     @classmethod
     @abstractmethod
     async def get_landmarks_by_coordinates_and_name(cls, json_params: Dict):
@@ -153,6 +180,28 @@ class PureCRUDAgent(ABC):
         """
         raise NotImplementedError
 
+    @classmethod
+    @abstractmethod
+    async def get_landmarks_by_paths(cls, json_params: Dict):
+        """
+        Returns from kb landmarks with given paths (path is unique key of the landmark, it consists of id_code of its
+        regions and its id_code). Landmarks are found by the uniqueness constraint of the path.
+        Works asynchronously.
+
+        :param json_params: Dict in form {
+                "landmarks_paths": List[str]
+            }
+        :return: Coroutine
+            List [
+                Dict[
+                    "landmark": Dict,
+                    "categories_names": List[str] | [] (empty list),
+                    "in_regions": List["str"] | []
+                ]
+            ],  where categories_names are categories of landmark, in_regions - names of regions, where landmark is located
+        """
+        raise NotImplementedError
+
     @classmethod
     @abstractmethod
     async def get_landmarks_by_name(cls, json_params: Dict):
@@ -186,7 +235,8 @@ class PureCRUDAgent(ABC):
         :param json_params: Dict in form {
                 "region_name": str,
                 "categories_names": List[str],
-                "optional_limit": int | None
+                "optional_limit": int | None,
+                "prefix_search": bool (optional) - if True, finds by the start of the names (exact names by default)
             }
         :return: Coroutine
             List [
@@ -208,7 +258,8 @@ class PureCRUDAgent(ABC):
 
         :param json_params: Dict in form {
                 "region_name": str,
-                "optional_limit": int | None
+                "optional_limit": int | None,
+                "prefix_search": bool (optional) - if True, finds by the start of the names (exact names by default)
             }
         :return: Coroutine
             List[
@@ -221,6 +272,30 @@ class PureCRUDAgent(ABC):
         """
         raise NotImplementedError
 
+    @classmethod
+    @abstractmethod
+    async def stream_landmarks_by_region(cls, json_params: Dict):
+        """
+        Streaming variant of get_landmarks_by_region. Yields landmarks by chunks as soon as they are fetched from kb,
+        so memory usage doesn't depend on the size of the region. Yields nothing, if json_params are invalid.
+        Works asynchronously.
+
+        :param json_params: Dict in form {
+                "region_name": str,
+                "chunk_size": int (optional) - maximum amount of landmarks in the chunk,
+                "prefix_search": bool (optional) - if True, finds by the start of the names (exact names by default)
+            }
+        :return: AsyncGenerator of the chunks
+            List[
+                Dict[
+                    "landmark": Dict | None,
+                    "located_at": Dict | None,
+                    "categories_names": List[str] | [] (empty list)
+                ]
+            ],  where "located_at" is the region, where landmark is located, categories_names are categories of landmark
+        """
+        raise NotImplementedError
+
     
     @classmethod
     @abstractmethod
@@ -257,7 +332,8 @@ class PureCRUDAgent(ABC):
 
 
             :param json_params: Dict in form {
-                "region_name": str
+                "region_name": str,
+                "prefix_search": bool (optional) - if True, finds by the start of the names (exact names by default)
             }
             :return: Coroutine
             List[
@@ -284,7 +360,8 @@ class PureCRUDAgent(ABC):
             :param json_params: Dict in form {
                 "map_sectors_names": List[str],
                 "categories_names": List[str],
-                "optional_limit": int | None
+                "optional_limit": int | None,
+                "prefix_search": bool (optional) - if True, finds by the start of the names (exact names by default)
             }
             :return: Coroutine
             List[
@@ -434,6 +511,90 @@ class PureCRUDAgent(ABC):
         """
         raise NotImplementedError
 
+    @classmethod
+    @abstractmethod
+    async def get_notes_page(cls, json_params: Dict):
+        """
+        Returns page of notes of all categories with their routes (with landmarks in the order that corresponds to
+        the order of appearance of landmarks in the route). Notes are ordered by last_update from the newest one.
+        Keyset pagination: the page starts right after the cursor, so time of the page doesn't depend on its depth
+        (unlike get_notes_in_range).
+        Works asynchronously.
+
+        :param json_params: Dict in form {
+                "cursor": str | None (optional) - next_cursor of the previous page, None for the first page,
+                "limit": int - maximum amount of notes in the page
+            }
+        :return: Coroutine
+            Dict[
+                "items": List[
+                    Dict[
+                        "note": Dict | None,
+                        "route": Dict | None,
+                        "route_landmarks": List[Dict | None] | None,
+                        "note_category_names": List[str | None] | None
+                    ]
+                ],
+                "next_cursor": str | None - cursor of the next page, None if it's the last page
+            ]
+        """
+        raise NotImplementedError
+
+    @classmethod
+    @abstractmethod
+    async def get_notes_of_categories_page(cls, json_params: Dict):
+        """
+        Returns page of notes of the given categories (exact names of the categories) with their routes. Notes are
+        ordered by last_update from the newest one. Keyset pagination (check get_notes_page).
+        Works asynchronously.
+
+        :param json_params: Dict in form {
+                "note_categories_names": List[str],
+                "cursor": str | None (optional) - next_cursor of the previous page, None for the first page,
+                "limit": int - maximum amount of notes in the page
+            }
+        :return: Coroutine
+            Dict[
+                "items": List[
+                    Dict[
+                        "note": Dict | None,
+                        "route": Dict | None,
+                        "route_landmarks": List[Dict | None] | None,
+                        "note_category_names": List[str | None] | None
+                    ]
+                ],
+                "next_cursor": str | None - cursor of the next page, None if it's the last page
+            ]
+        """
+        raise NotImplementedError
+
+    @classmethod
+    @abstractmethod
+    async def get_page_of_routes_saved_by_user(cls, json_params: Dict):
+        """
+        Returns page of routes saved by user (exact login of the user) with landmarks in the order that corresponds to
+        the order of appearance of landmarks in the route. Routes are ordered by index_id. Keyset pagination (check
+        get_notes_page).
+        Works asynchronously.
+
+        :param json_params: Dict in form {
+                "user_login": str,
+                "cursor": str | None (optional) - next_cursor of the previous page, None for the first page,
+                "limit": int - maximum amount of routes in the page
+            }
+        :return: Coroutine
+            Dict[
+                "items": List[
+                    Dict[
+                        "route": Dict | None,
+                        "route_landmarks": List[Dict | None] | None
+                    ]
+                ],
+                "next_cursor": str | None - cursor of the next page, None if it's the last page
+            ]
+        """
+        raise NotImplementedError
+
     @classmethod
     @abstractmethod
     async def get_recommendations_by_coordinates(cls, json_params: Dict):
@@ -463,6 +624,28 @@ class PureCRUDAgent(ABC):
 
     # Write queries
 
+    @classmethod
+    @abstractmethod
+    async def get_batch(cls, json_params: Dict):
+        """
+        Runs several reads in one session and one read transaction, so the reads pay setup of the session and the
+        transaction once. Reads are executed in the given order.
+        Works asynchronously.
+
+        :param json_params: Dict in form {
+                "reads": List[
+                    Dict[
+                        "method": str - name of the read method of the agent (get_*, except get_batch),
+                        "params": Dict - json_params of the method
+                    ]
+                ] (at most 64 reads)
+            }
+        :return: Coroutine
+            List - results of the reads in order of "reads", result of the read is the same as the result of its
+            method ([] if params of the read are invalid)
+        """
+        raise NotImplementedError
+
     @classmethod
     @abstractmethod
     async def put_user(cls, json_params: Dict):
@@ -558,3 +741,99 @@ class PureCRUDAgent(ABC):
                 Dict["result": bool] - True if everything is fine, False otherwise
         """
         raise NotImplementedError
+
+    @classmethod
+    @abstractmethod
+    async def put_users(cls, json_params: Dict):
+        """
+            Puts several users to kb in one transaction (nothing is put, if any of them can't be put).
+            Works asynchronously.
+
+            :param json_params: Dict in form {"user_logins": List[str]} (at most 1000 logins)
+            :return: Coroutine
+                Dict["result": bool] - True if everything is fine, False otherwise
+        """
+        raise NotImplementedError
+
+    @classmethod
+    @abstractmethod
+    async def put_notes(cls, json_params: Dict):
+        """
+            Puts several notes, created by guides, to kb in one transaction (nothing is put, if any of them can't be
+            put). Guides, countries and categories are matched by their exact names.
+            Works asynchronously.
+
+            :param json_params: Dict in form {
+                "notes": List[
+                    Dict[
+                        "guide_login": str,
+                        "country_names": List[str],
+                        "note_title": str,
+                        "note_category_names": List[str]
+                    ]
+                ] (at most 1000 notes)
+            }
+            :return: Coroutine
+                Dict["result": bool] - True if everything is fine, False otherwise
+        """
+        raise NotImplementedError
+
+    @classmethod
+    @abstractmethod
+    async def put_routes_for_notes(cls, json_params: Dict):
+        """
+            Puts several routes of notes to kb in one transaction (nothing is put, if any of them can't be put).
+            Notes and landmarks are matched by their exact titles, names and coordinates.
+            Works asynchronously.
+
+            :param json_params: Dict in form {
+                "routes": List[
+                    Dict[
+                        "note_title": str,
+                        "landmark_info_position_dicts": List[
+                            Dict [
+                                "name": str,
+                                "position": int,
+                                "latitude": float,
+                                "longitude": float
+                            ]
+                        ]
+                    ]
+                ] (at most 1000 routes)
+            }
+
+            :return: Coroutine
+                Dict["result": bool, "index_ids": List[int]] - result is True if everything is fine, False otherwise.
+                index_ids of the put routes in order of "routes"
+        """
+        raise NotImplementedError
+
+    @classmethod
+    @abstractmethod
+    async def put_routes_saved_by_user(cls, json_params: Dict):
+        """
+            Puts several routes saved by users to kb in one transaction (nothing is put, if any of them can't be put).
+            Users and landmarks are matched by their exact logins, names and coordinates.
+            Works asynchronously.
+
+            :param json_params: Dict in form {
+                "routes": List[
+                    Dict[
+                        "user_login": str,
+                        "landmark_info_position_dicts": List[
+                            Dict [
+                                "name": str,
+                                "position": int,
+                                "latitude": float,
+                                "longitude": float
+                            ]
+                        ]
+                    ]
+                ] (at most 1000 routes)
+            }
+
+            :return: Coroutine
+                Dict["result": bool, "index_ids": List[int]] - result is True if everything is fine, False otherwise.
+                index_ids of the put routes in order of "routes"
+        """
+        raise NotImplementedError
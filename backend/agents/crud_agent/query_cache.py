@@ -0,0 +1,227 @@
+# Author: Vodohleb04
+"""
+Read-through cache of the read queries of CRUDAgent.
+
+Results are cached by the name of the method and canonical json_params. Every entry has tags (kinds of the nodes, which
+its result depends on). Creator emits tags of the nodes, it has written, and entries with these tags are invalidated.
+
+Two tiers:
+    local  - LRU of the process (max_entries entries, every entry lives no longer than ttl seconds);
+    shared - optional Redis tier, that is shared by all processes of the agent. Redis keeps version of every tag,
+             invalidation increments versions of the tags, so entries of the shared tier written before the write are
+             ignored by all processes. Results, that can't be packed by NDArraySerializer, are kept only in the local
+             tier.
+With Redis, local entry keeps versions of its tags too, and local hit is checked against the current versions (one
+MGET), so write in any process invalidates local entries of all processes at once. Without Redis (or while it isn't
+available) other processes don't see invalidation, their local entries can be stale for ttl seconds at most.
+
+Cached results are shared by the callers, don't modify them.
+Metrics: crud_cache_requests_total{method, result} (hit ratio), crud_cache_evictions_total{reason},
+crud_cache_entries.
+"""
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Set, Tuple
+
+from aiologger.loggers.json import JsonLogger
+from prometheus_client import Counter, Gauge
+from redis.asyncio import Redis
+
+from backend.broker.payload_serializer import NDArraySerializer
+
+
+logger = JsonLogger.with_default_handlers(
+    level="INFO",
+    serializer_kwargs={'ensure_ascii': False},
+)
+
+CACHE_REQUESTS = Counter("crud_cache_requests", "Cached read queries of CRUDAgent", ["method", "result"])
+CACHE_EVICTIONS = Counter("crud_cache_evictions", "Entries removed from the local tier of the cache", ["reason"])
+CACHE_ENTRIES = Gauge("crud_cache_entries", "Entries in the local tier of the cache")
+
+LANDMARKS_TAG = "landmarks"  # Regions, map sectors, categories and landmarks (they are written by the importer only)
+NOTES_TAG = "notes"
+ROUTES_TAG = "routes"
+
+
+class QueryCache:
+    """Read-through cache with local LRU tier and optional shared Redis tier"""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 60.0,
+        redis_url: str | None = None,
+        redis_ttl: int = 600,
+        key_prefix: str = "crud_cache:"
+    ):
+        """
+        :param max_entries: maximum amount of entries of the local tier
+        :param ttl: lifetime (in seconds) of the entries of the local tier
+        :param redis_url: url of Redis of the shared tier. Shared tier isn't used, if it's None
+        :param redis_ttl: lifetime (in seconds) of the entries of the shared tier
+        :param key_prefix: prefix of the keys of the shared tier
+        """
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._redis = Redis.from_url(redis_url) if redis_url else None
+        self._redis_ttl = redis_ttl
+        self._key_prefix = key_prefix
+        self._serializer = NDArraySerializer()
+
+        # key -> (expiration time, tags, versions of the tags in Redis or None, value)
+        self._entries: OrderedDict[str, Tuple[float, Tuple[str, ...], List | None, Any]] = OrderedDict()
+        self._keys_of_tags: Dict[str, Set[str]] = {}
+        self._tags_generations: Dict[str, int] = {}  # Local invalidations of the tags
+
+    @staticmethod
+    def key(method: str, json_params: Dict) -> str | None:
+        """Returns key of the entry (method and canonical json_params) or None, if json_params can't be a key"""
+        try:
+            canonical_params = json.dumps(json_params, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        except (TypeError, ValueError):
+            return None
+        return f"{method}:{canonical_params}"
+
+    def _tag_version_key(self, tag: str) -> str:
+        return f"{self._key_prefix}tag:{tag}"
+
+    def _remove_entry(self, key: str, reason: str):
+        _, tags, _, _ = self._entries.pop(key)
+        for tag in tags:
+            keys = self._keys_of_tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    self._keys_of_tags.pop(tag)
+        CACHE_EVICTIONS.labels(reason).inc()
+        CACHE_ENTRIES.set(len(self._entries))
+
+    def _get_local(self, key: str) -> Tuple[bool, List | None, Any]:
+        """Returns (is found, versions of the tags of the entry, value)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None, None
+        if entry[0] <= time.monotonic():
+            self._remove_entry(key, "ttl")
+            return False, None, None
+        self._entries.move_to_end(key)
+        return True, entry[2], entry[3]
+
+    def _set_local(self, key: str, tags: Tuple[str, ...], versions: List | None, value: Any):
+        if key in self._entries:
+            self._remove_entry(key, "replaced")
+        self._entries[key] = (time.monotonic() + self._ttl, tags, versions, value)
+        for tag in tags:
+            self._keys_of_tags.setdefault(tag, set()).add(key)
+        while len(self._entries) > self._max_entries:
+            self._remove_entry(next(iter(self._entries)), "size")
+        CACHE_ENTRIES.set(len(self._entries))
+
+    async def _get_versions(self, tags: Tuple[str, ...]) -> List | None:
+        """Returns current versions of the tags or None, if Redis isn't available"""
+        try:
+            versions = await self._redis.mget([self._tag_version_key(tag) for tag in tags])
+        except Exception as ex:
+            await logger.warning(f"Shared tier of the cache isn't available, args: {ex!r}")
+            return None
+        return [int(version or 0) for version in versions]
+
+    async def _get_shared(self, key: str, tags: Tuple[str, ...]) -> Tuple[bool, Any, List]:
+        """Returns (is found, value, current versions of the tags)"""
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                pipe.get(self._key_prefix + key)
+                pipe.mget([self._tag_version_key(tag) for tag in tags])
+                packed_entry, versions = await pipe.execute()
+        except Exception as ex:
+            await logger.warning(f"Shared tier of the cache isn't available, args: {ex!r}")
+            return False, None, None
+        versions = [int(version or 0) for version in versions]
+        if packed_entry is None:
+            return False, None, versions
+        entry = self._serializer.loadb(packed_entry)
+        if entry["versions"] != versions:
+            return False, None, versions  # Tags were invalidated after the entry was written
+        return True, entry["value"], versions
+
+    async def _set_shared(self, key: str, versions: List, value: Any):
+        try:
+            packed_entry = self._serializer.dumpb({"versions": versions, "value": value})
+        except TypeError:
+            return  # Result is kept only in the local tier
+        try:
+            await self._redis.set(self._key_prefix + key, packed_entry, ex=self._redis_ttl)
+        except Exception as ex:
+            await logger.warning(f"Shared tier of the cache isn't available, args: {ex!r}")
+
+    async def get_or_load(
+        self,
+        method: str,
+        json_params: Dict,
+        tags: Tuple[str, ...],
+        loader: Callable[..., Awaitable],
+        *loader_args
+    ) -> Any:
+        """
+        Returns cached result of the query or loads it with loader(*loader_args) and caches it. Result, whose tags
+        were invalidated while it was loaded, isn't cached.
+
+        :param method: name of the read method of CRUDAgent
+        :param json_params: params of the method (they must be validated)
+        :param tags: tags of the nodes, which the result depends on
+        """
+        key = self.key(method, json_params)
+        if key is None:
+            CACHE_REQUESTS.labels(method, "uncacheable").inc()
+            return await loader(*loader_args)
+
+        is_found, entry_versions, value = self._get_local(key)
+        if is_found and self._redis is not None:
+            versions = await self._get_versions(tags)
+            if versions is not None and versions != entry_versions:
+                self._remove_entry(key, "invalidated")  # Tags were invalidated by another process
+                is_found = False
+        if is_found:
+            CACHE_REQUESTS.labels(method, "hit_local").inc()
+            return value
+
+        generations = [self._tags_generations.get(tag, 0) for tag in tags]
+        versions = None
+        if self._redis is not None:
+            is_found, value, versions = await self._get_shared(key, tags)
+            if is_found:
+                CACHE_REQUESTS.labels(method, "hit_shared").inc()
+                self._set_local(key, tags, versions, value)
+                return value
+
+        CACHE_REQUESTS.labels(method, "miss").inc()
+        value = await loader(*loader_args)
+        if generations != [self._tags_generations.get(tag, 0) for tag in tags]:
+            return value
+        self._set_local(key, tags, versions, value)
+        if versions is not None:
+            await self._set_shared(key, versions, value)
+        return value
+
+    async def invalidate(self, tags: Iterable[str]):
+        """Removes entries with the tags from the local tier and invalidates them in the shared tier"""
+        tags = tuple(tags)
+        for tag in tags:
+            self._tags_generations[tag] = self._tags_generations.get(tag, 0) + 1
+            for key in list(self._keys_of_tags.get(tag, ())):
+                self._remove_entry(key, "invalidated")
+        if self._redis is None or not tags:
+            return
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for tag in tags:
+                    pipe.incr(self._tag_version_key(tag))
+                await pipe.execute()
+        except Exception as ex:
+            await logger.error(f"Tags {tags} weren't invalidated in the shared tier of the cache, args: {ex!r}")
+
+    async def close(self):
+        if self._redis is not None:
+            await self._redis.aclose()
@@ -0,0 +1,100 @@
+# Author: Vodohleb04
+"""
+Checks of QueryCache: local and shared tiers, invalidation of the entries of all processes by the tags, that Creator
+emits, results loaded during invalidation, size of the local tier.
+Requires Redis (sudo docker run --name redis-broker -p 6379:6379 -d redis). Run from the directory of the project:
+
+    python -m backend.agents.crud_agent.query_cache_test
+"""
+import asyncio
+import datetime
+import itertools
+import uuid
+
+from backend.agents.crud_agent.creator import Creator
+from backend.agents.crud_agent.query_cache import LANDMARKS_TAG, NOTES_TAG, ROUTES_TAG, QueryCache
+
+REDIS_URL = "redis://localhost:6379"
+
+
+if __name__ == '__main__':
+
+    async def test():
+        loads = []
+        loads_counter = itertools.count()
+
+        async def load_notes(json_params, delay=0.0):
+            await asyncio.sleep(delay)
+            loads.append(json_params)
+            return [{"note": {"title": json_params["title"], "load": next(loads_counter)}}]
+
+        # Two caches with the same Redis emulate two processes of the agent
+        key_prefix = f"query_cache_test:{uuid.uuid4().hex}:"
+        first_cache = QueryCache(redis_url=REDIS_URL, key_prefix=key_prefix)
+        second_cache = QueryCache(redis_url=REDIS_URL, key_prefix=key_prefix)
+        Creator.add_written_tags_listener(first_cache.invalidate)
+
+        async def get(cache, title, delay=0.0):
+            json_params = {"title": title}
+            return await cache.get_or_load("get_notes", json_params, (NOTES_TAG,), load_notes, json_params, delay)
+
+        # Local hit, then shared hit in another process, params are compared regardless of the order of the keys
+        first_value = await get(first_cache, "a")
+        assert await get(first_cache, "a") is first_value
+        assert await get(second_cache, "a") == first_value
+        assert await second_cache.get_or_load(
+            "get_notes", {"b": 1, "a": 2}, (NOTES_TAG,), load_notes, {"title": "b"}
+        ) == await second_cache.get_or_load(
+            "get_notes", {"a": 2, "b": 1}, (NOTES_TAG,), load_notes, {"title": "c"}
+        )
+        assert [json_params["title"] for json_params in loads] == ["a", "b"], loads
+        print("Local and shared tiers are fine")
+
+        # Write in one process invalidates the entries of both processes
+        await Creator._emit_written_tags(NOTES_TAG, ROUTES_TAG)
+        loads.clear()
+        second_value = await get(second_cache, "a")
+        assert second_value != first_value and len(loads) == 1, (second_value, loads)
+        assert await get(first_cache, "a") == second_value and len(loads) == 1, loads
+        # Entries with other tags aren't invalidated
+        landmarks_value = await first_cache.get_or_load(
+            "get_landmarks", {}, (LANDMARKS_TAG,), load_notes, {"title": "landmarks"}
+        )
+        await first_cache.invalidate([NOTES_TAG])
+        assert await second_cache.get_or_load(
+            "get_landmarks", {}, (LANDMARKS_TAG,), load_notes, {"title": "other"}
+        ) == landmarks_value
+        print("Invalidation is fine")
+
+        # Result, that was loaded while its tags were invalidated, isn't cached
+        loads.clear()
+        load = asyncio.create_task(get(first_cache, "raced", delay=0.1))
+        await asyncio.sleep(0.05)
+        await first_cache.invalidate([NOTES_TAG])
+        await load
+        await get(first_cache, "raced")
+        assert len(loads) == 2, loads
+        print("Result loaded during invalidation isn't cached")
+
+        # Local tier keeps max_entries entries, cache without Redis works locally, params, that aren't JSON, aren't
+        # cached
+        local_cache = QueryCache(max_entries=2)
+        loads.clear()
+        for title in ("a", "b", "c", "a"):
+            await get(local_cache, title)
+        assert [json_params["title"] for json_params in loads] == ["a", "b", "c", "a"], loads
+        assert len(local_cache._entries) == 2, local_cache._entries
+        await get(local_cache, "a")
+        assert len(loads) == 4, loads
+        loads.clear()
+        for _ in range(2):
+            await local_cache.get_or_load(
+                "get_notes", {"at": datetime.datetime.now()}, (NOTES_TAG,), load_notes, {"title": "at"}
+            )
+        assert len(loads) == 2, loads
+        print("Local tier is fine")
+
+        for cache in (first_cache, second_cache, local_cache):
+            await cache.close()
+
+    asyncio.run(test())
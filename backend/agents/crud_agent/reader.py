@@ -1,8 +1,10 @@
 #Author: Vodohleb04
-from typing import List, Dict
+from typing import AsyncIterator, Dict, List, Tuple
 from aiologger.loggers.json import JsonLogger
 from neo4j import AsyncSession
 
+from backend.agents.crud_agent.page_cursor import encode_cursor
+
 
 logger = JsonLogger.with_default_handlers(
     level="INFO",
@@ -15,21 +17,66 @@ class Reader:
     Reader part of CRUDAgent. All read queries to knowledgebase are located here.
     Implements PureReader.
     All methods work asynchronously.
+    Landmarks are found by coordinates with point index of landmark.location (point in WGS-84): map sectors are
+    bounding boxes of the lookup, recommendations are looked up in RECOMMENDATIONS_RADIUS around the points.
     """
+    RECOMMENDATIONS_RADIUS = 10_000  # meters
+
+    @staticmethod
+    def _lookup_node(variable: str, label: str, key: str, value: str, prefix_search: bool) -> str:
+        """
+        Returns part of the query, that finds node by its unique key (uniqueness constraint of the key is used).
+        If prefix_search is True, the first node (in order of the key), whose key starts with the value, is found.
+        :param variable: variable of the node in the query
+        :param label: label of the node
+        :param key: unique property of the node
+        :param value: parameter ($name) or variable of the query with the value of the key
+        """
+        if not prefix_search:
+            return f"""
+            MATCH ({variable}: {label} {{{key}: {value}}})
+            """
+        imported_variable = "" if value.startswith("$") else f"WITH {value}"
+        return f"""
+            CALL {{
+                {imported_variable}
+                MATCH ({variable}: {label})
+                    WHERE {variable}.{key} STARTS WITH {value}
+                RETURN {variable}
+                    ORDER BY {variable}.{key}
+                    LIMIT 1
+            }}
+            """
 
+    @staticmethod
+    async def _stream_records(
+            session: AsyncSession, query: str, keys: Tuple[str, ...], chunk_size: int, **params
+    ) -> AsyncIterator[List[Dict]]:
+        """
+        Runs the read query in explicit transaction and yields its records in lists of chunk_size records. Records are
+        fetched from the knowledge base by the driver in batches of fetch_size of the session, so only the current
+        chunk is kept in memory. Transaction is rolled back, when the stream is closed.
+        """
+        async with await session.begin_transaction() as tx:
+            result = await tx.run(query, **params)
+            chunk = []
+            async for record in result:
+                chunk.append(record.data(*keys))
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+            await logger.debug(f"method:\t_stream_records,\nresult:\t{await result.consume()}")
 
     @staticmethod
-    async def _read_categories_of_region(tx, region_name: str, optional_limit: int = None):
+    async def _read_categories_of_region(
+            tx, region_name: str, optional_limit: int = None, prefix_search: bool = False
+    ):
         """Transaction handler for read_categories_of_region"""
         result = await tx.run(
+            Reader._lookup_node("region", "Region", "name", "$region_name", prefix_search) +
             """
-            CALL {
-                MATCH (region: Region)
-                    WHERE region.name STARTS WITH $region_name
-                RETURN region
-                    ORDER BY region.name
-                    LIMIT 1
-            }
             OPTIONAL MATCH  
                 (region)
                     -[:INCLUDE]->*
@@ -54,26 +101,32 @@ class Reader:
         return result_values
 
     @staticmethod
-    async def read_categories_of_region(session: AsyncSession, region_name: str, optional_limit: int = None):
-        result = await session.execute_read(Reader._read_categories_of_region, region_name, optional_limit)
+    async def read_categories_of_region(
+            session: AsyncSession, region_name: str, optional_limit: int = None, prefix_search: bool = False
+    ):
+        result = await session.execute_read(
+            Reader._read_categories_of_region, region_name, optional_limit, prefix_search
+        )
         await logger.debug(f"method:\tread_categories_of_region,\nresult:\t{result}")
         return result
 
     @staticmethod
-    async def _read_landmarks_in_map_sectors(tx, map_sectors_names: List[str], optional_limit: int = None):
-        """Transaction handler for read_categories_of_region"""
+    async def _read_landmarks_in_map_sectors(
+            tx, map_sectors_names: List[str], optional_limit: int = None, prefix_search: bool = False
+    ):
+        """Transaction handler for read_landmarks_in_map_sectors"""
         result = await tx.run(
             """
             UNWIND $map_sectors_names AS sector_name
-            CALL {
-                WITH sector_name
-                MATCH (sector: MapSector)
-                    WHERE sector.name STARTS WITH sector_name
-                RETURN sector
-                    ORDER BY sector.name
-                    LIMIT 1
-            }
-            OPTIONAL MATCH (landmark: Landmark)-[:IN_SECTOR]->(sector)
+            """ +
+            Reader._lookup_node("sector", "MapSector", "name", "sector_name", prefix_search) +
+            """
+            OPTIONAL MATCH (landmark: Landmark)
+                WHERE point.withinBBox(
+                    landmark.location,
+                    point({latitude: sector.br_latitude, longitude: sector.tl_longitude, crs:'WGS-84'}),
+                    point({latitude: sector.tl_latitude, longitude: sector.br_longitude, crs:'WGS-84'})
+                )
             RETURN
                 landmark,
                 sector,
@@ -102,9 +155,11 @@ class Reader:
 
     @staticmethod
     async def read_landmarks_in_map_sectors(
-            session: AsyncSession, map_sectors_names: List[str], optional_limit: int = None
+            session: AsyncSession, map_sectors_names: List[str], optional_limit: int = None, prefix_search: bool = False
     ):
-        result = await session.execute_read(Reader._read_landmarks_in_map_sectors, map_sectors_names, optional_limit)
+        result = await session.execute_read(
+            Reader._read_landmarks_in_map_sectors, map_sectors_names, optional_limit, prefix_search
+        )
         await logger.debug(f"method:\tread_landmarks_in_map_sectors,\nresult:\t{result}")
         return result
 
@@ -163,24 +218,26 @@ class Reader:
         return result
 
     @staticmethod
-    async def _read_landmarks_refers_to_categories(tx, categories_names: List[str], optional_limit: int = None):
-        """Transaction handler for read_landmarks_refers_to_categories"""
-        result = await tx.run(
+    def _landmarks_refers_to_categories_query(prefix_search: bool) -> str:
+        return (
             """
             UNWIND $categories_names AS category_name
-            CALL {
-                WITH category_name
-                MATCH (category: LandmarkCategory)
-                    WHERE category.name STARTS WITH category_name
-                RETURN category
-                    ORDER BY category.name
-                    LIMIT 1
-            }
+            """ +
+            Reader._lookup_node("category", "LandmarkCategory", "name", "category_name", prefix_search) +
+            """
             OPTIONAL MATCH (landmark: Landmark)-[:REFERS]->(category)
             RETURN DISTINCT landmark, category
                 ORDER BY landmark.name;
-            """,
-            categories_names=categories_names
+            """
+        )
+
+    @staticmethod
+    async def _read_landmarks_refers_to_categories(
+            tx, categories_names: List[str], optional_limit: int = None, prefix_search: bool = False
+    ):
+        """Transaction handler for read_landmarks_refers_to_categories"""
+        result = await tx.run(
+            Reader._landmarks_refers_to_categories_query(prefix_search), categories_names=categories_names
         )
         try:
             if optional_limit:
@@ -196,14 +253,28 @@ class Reader:
 
     @staticmethod
     async def read_landmarks_refers_to_categories(
-            session: AsyncSession, categories_names: List[str], optional_limit: int = None
+            session: AsyncSession, categories_names: List[str], optional_limit: int = None, prefix_search: bool = False
     ):
         result = await session.execute_read(
-            Reader._read_landmarks_refers_to_categories, categories_names, optional_limit
+            Reader._read_landmarks_refers_to_categories, categories_names, optional_limit, prefix_search
         )
         await logger.debug(f"method:\read_landmarks_refers_to_categories,\nresult:\t{result}")
         return result
 
+    @staticmethod
+    async def stream_landmarks_refers_to_categories(
+            session: AsyncSession, categories_names: List[str], chunk_size: int, prefix_search: bool = False
+    ) -> AsyncIterator[List[Dict]]:
+        """Streaming variant of read_landmarks_refers_to_categories, yields lists of chunk_size records"""
+        async for chunk in Reader._stream_records(
+            session,
+            Reader._landmarks_refers_to_categories_query(prefix_search),
+            ("landmark", "category"),
+            chunk_size,
+            categories_names=categories_names
+        ):
+            yield chunk
+
     @staticmethod
     async def _read_landmarks_by_name_list(tx, landmark_names: List[str]):
         """Transaction handler for read_landmarks_by_name_list"""
@@ -251,6 +322,43 @@ class Reader:
         await logger.debug(f"method:\tread_landmarks_by_names,\nresult:\t{result}")
         return result
 
+    @staticmethod
+    async def _read_landmarks_by_paths(tx, landmarks_paths: List[str]):
+        """Transaction handler for read_landmarks_by_paths"""
+        result = await tx.run(
+            """
+            UNWIND $landmarks_paths AS landmark_path
+            MATCH (landmark: Landmark {path: landmark_path})
+            OPTIONAL MATCH (region: Region)<-[:LOCATED]-(landmark)
+            RETURN
+                landmark,
+                COLLECT {
+                    MATCH (landmark)-[:REFERS]->(category:LandmarkCategory)
+                    RETURN category.name AS category_name
+                } AS categories_names,
+                COLLECT {
+                    MATCH in_regions_path=((region)<-[:INCLUDE*0..]-(:Country))
+                    UNWIND nodes(in_regions_path) AS in_region
+                    RETURN in_region.name
+                } AS in_regions;
+            """,
+            landmarks_paths=landmarks_paths
+        )
+        try:
+            result_values = [record.data("landmark", "categories_names", "in_regions") async for record in result]
+        except IndexError as ex:
+            await logger.error(f"Index error, args: {ex.args[0]}")
+            result_values = []
+
+        await logger.debug(f"method:\t_read_landmarks_by_paths,\nresult:\t{await result.consume()}")
+        return result_values
+
+    @staticmethod
+    async def read_landmarks_by_paths(session: AsyncSession, landmarks_paths: List[str]):
+        result = await session.execute_read(Reader._read_landmarks_by_paths, landmarks_paths)
+        await logger.debug(f"method:\tread_landmarks_by_paths,\nresult:\t{result}")
+        return result
+
     @staticmethod
     async def _read_landmarks_by_name(tx, landmark_name: str, limit: int):
         """Transaction handler for read_landmarks_by_name"""
@@ -294,25 +402,16 @@ class Reader:
 
     @staticmethod
     async def _read_landmarks_of_categories_in_region(
-            tx, region_name: str, categories_names: List[str], optional_limit
+            tx, region_name: str, categories_names: List[str], optional_limit, prefix_search: bool = False
     ):
         """Transaction handler for read_landmarks_of_categories_in_region"""
         result = await tx.run(
+            Reader._lookup_node("region", "Region", "name", "$region_name", prefix_search) +
             """
-            MATCH (region: Region)
-                WHERE region.name STARTS WITH $region_name
-            WITH region
-                ORDER BY region.name
-                LIMIT 1
             UNWIND $categories_names AS category_name
-            CALL {
-                WITH category_name
-                MATCH (category: LandmarkCategory)
-                    WHERE category.name STARTS WITH category_name
-                RETURN category
-                    ORDER BY category.name
-                    LIMIT 1
-            }
+            """ +
+            Reader._lookup_node("category", "LandmarkCategory", "name", "category_name", prefix_search) +
+            """
             OPTIONAL MATCH
                 (region)
                     -[:INCLUDE]->*
@@ -342,24 +441,23 @@ class Reader:
 
     @staticmethod
     async def read_landmarks_of_categories_in_region(
-            session: AsyncSession, region_name: str, categories_names: List[str], optional_limit: int = None
+            session: AsyncSession,
+            region_name: str,
+            categories_names: List[str],
+            optional_limit: int = None,
+            prefix_search: bool = False
     ):
         result = await session.execute_read(
-            Reader._read_landmarks_of_categories_in_region, region_name, categories_names, optional_limit
+            Reader._read_landmarks_of_categories_in_region, region_name, categories_names, optional_limit, prefix_search
         )
         await logger.debug(f"method:\tread_landmarks_of_categories_in_region,\nresult:\t{result}")
         return result
 
     @staticmethod
-    async def _read_landmarks_by_region(tx, region_name: str, optional_limit: int = None):
-        """Transaction handler for read_landmarks_by_region"""
-        result = await tx.run(
+    def _landmarks_by_region_query(prefix_search: bool) -> str:
+        return (
+            Reader._lookup_node("region", "Region", "name", "$region_name", prefix_search) +
             """
-            MATCH (region: Region)
-                WHERE region.name STARTS WITH $region_name
-            WITH region
-                ORDER BY region.name
-                LIMIT 1
             OPTIONAL MATCH
                 (region)
                     -[:INCLUDE]->*
@@ -373,9 +471,13 @@ class Reader:
                     RETURN category.name AS category_name
                 } AS categories_names,
                 final_region AS located_at;
-            """,
-            region_name=region_name
+            """
         )
+
+    @staticmethod
+    async def _read_landmarks_by_region(tx, region_name: str, optional_limit: int = None, prefix_search: bool = False):
+        """Transaction handler for read_landmarks_by_region"""
+        result = await tx.run(Reader._landmarks_by_region_query(prefix_search), region_name=region_name)
         try:
             if optional_limit:
                 result_values = [
@@ -394,11 +496,29 @@ class Reader:
         return result_values
 
     @staticmethod
-    async def read_landmarks_by_region(session: AsyncSession, region_name: str, optional_limit: int = None):
-        result = await session.execute_read(Reader._read_landmarks_by_region, region_name, optional_limit)
+    async def read_landmarks_by_region(
+            session: AsyncSession, region_name: str, optional_limit: int = None, prefix_search: bool = False
+    ):
+        result = await session.execute_read(
+            Reader._read_landmarks_by_region, region_name, optional_limit, prefix_search
+        )
         await logger.debug(f"method:\tread_landmarks_by_region,\nresult:\t{result}")
         return result
 
+    @staticmethod
+    async def stream_landmarks_by_region(
+            session: AsyncSession, region_name: str, chunk_size: int, prefix_search: bool = False
+    ) -> AsyncIterator[List[Dict]]:
+        """Streaming variant of read_landmarks_by_region, yields lists of chunk_size records"""
+        async for chunk in Reader._stream_records(
+            session,
+            Reader._landmarks_by_region_query(prefix_search),
+            ("landmark", "categories_names", "located_at"),
+            chunk_size,
+            region_name=region_name
+        ):
+            yield chunk
+
     @staticmethod
     async def _read_map_sectors_of_points(
             tx, coordinates_of_points: List[Dict[str, float]], optional_limit: int = None
@@ -444,16 +564,12 @@ class Reader:
         return result
 
     @staticmethod
-    async def _read_map_sectors_structure_of_region(tx, region_name: str):
+    async def _read_map_sectors_structure_of_region(tx, region_name: str, prefix_search: bool = False):
         """Transaction handler for read_map_sectors_structure_of_region"""
 
         result = await tx.run(
+            Reader._lookup_node("region", "Region", "name", "$region_name", prefix_search) +
             """
-            MATCH (region: Region)
-                WHERE region.name STARTS WITH $region_name
-            WITH region
-                ORDER BY region.name
-                LIMIT 1
             MATCH (region)-[:DIVIDED_ON_SECTORS]->(:CountryMapSectors)-[:INCLUDE_SECTOR]->(mapSector:MapSector)
             RETURN 
                 mapSector.name AS name,
@@ -482,43 +598,41 @@ class Reader:
         return result_values
 
     @staticmethod
-    async def read_map_sectors_structure_of_region(session: AsyncSession, region_name: str):
-        result = await session.execute_read(Reader._read_map_sectors_structure_of_region, region_name)
+    async def read_map_sectors_structure_of_region(
+            session: AsyncSession, region_name: str, prefix_search: bool = False
+    ):
+        result = await session.execute_read(
+            Reader._read_map_sectors_structure_of_region, region_name, prefix_search
+        )
         await logger.debug(f"method:\tread_map_sectors_structure_of_region,\nresult:\t{result}")
         return result
 
     @staticmethod
     async def _read_landmarks_of_categories_in_map_sectors(
-            tx, map_sectors_names: List[str], categories_names: List[str], optional_limit: int = None
+            tx,
+            map_sectors_names: List[str],
+            categories_names: List[str],
+            optional_limit: int = None,
+            prefix_search: bool = False
     ):
         """Transaction handler for read_landmarks_of_categories_in_map_sectors"""
         result = await tx.run(
             """
             UNWIND $map_sectors_names AS map_sector_name
-            CALL {
-                WITH map_sector_name
-                MATCH (mapSector: MapSector)
-                    WHERE mapSector.name STARTS WITH map_sector_name
-                RETURN mapSector
-                    ORDER BY mapSector.name
-                    LIMIT 1
-            }
+            """ +
+            Reader._lookup_node("mapSector", "MapSector", "name", "map_sector_name", prefix_search) +
+            """
             WITH mapSector
             UNWIND $categories_names AS category_name
-            CALL {
-                WITH category_name
-                MATCH (category: LandmarkCategory)
-                    WHERE category.name STARTS WITH category_name
-                RETURN category
-                    ORDER BY category.name
-                    LIMIT 1
-            }
-            OPTIONAL MATCH
-                (mapSector)
-                    <-[:IN_SECTOR]-
-                (landmark:Landmark)
-                    -[:REFERS]->
-                (category)
+            """ +
+            Reader._lookup_node("category", "LandmarkCategory", "name", "category_name", prefix_search) +
+            """
+            OPTIONAL MATCH (landmark:Landmark)-[:REFERS]->(category)
+                WHERE point.withinBBox(
+                    landmark.location,
+                    point({latitude: mapSector.br_latitude, longitude: mapSector.tl_longitude, crs:'WGS-84'}),
+                    point({latitude: mapSector.tl_latitude, longitude: mapSector.br_longitude, crs:'WGS-84'})
+                )
             RETURN landmark, mapSector AS map_sector, category;
             """,
             map_sectors_names=map_sectors_names,
@@ -540,13 +654,18 @@ class Reader:
 
     @staticmethod
     async def read_landmarks_of_categories_in_map_sectors(
-            session: AsyncSession, map_sectors_names: List[str], categories_names: List[str], optional_limit: int = None
+            session: AsyncSession,
+            map_sectors_names: List[str],
+            categories_names: List[str],
+            optional_limit: int = None,
+            prefix_search: bool = False
     ):
         result = await session.execute_read(
             Reader._read_landmarks_of_categories_in_map_sectors,
             map_sectors_names,
             categories_names,
-            optional_limit
+            optional_limit,
+            prefix_search
         )
         await logger.debug(f"method:\tread_landmarks_of_categories_in_map_sectors,\nresult:\t{result}")
         return result
@@ -813,40 +932,187 @@ class Reader:
         await logger.debug(f"method:\tread_notes_of_categories_in_range,\nresult:\t{result}")
         return result
 
+    @staticmethod
+    def _notes_page_query(match_notes: str, after: Dict | None, distinct: bool = False) -> str:
+        """
+        Returns query of the page of notes (notes are ordered by last_update from the newest, then by title).
+        :param match_notes: part of the query, that finds notes (node variable note)
+        :param after: key of the last note of the previous page or None for the first page
+        :param distinct: True, if match_notes can find the same note several times
+        """
+        if after is None:
+            after_condition = "note.last_update IS NOT NULL"
+        else:
+            # The first condition is the range seek of the index, the second one skips the notes of the previous page
+            # with the same last_update
+            after_condition = """
+                note.last_update <= datetime($after.last_update) AND
+                (note.last_update < datetime($after.last_update) OR note.title > $after.title)
+            """
+        return match_notes + f"""
+            WITH {"DISTINCT " if distinct else ""}note
+                WHERE {after_condition}
+            WITH note
+                ORDER BY note.last_update DESC, note.title ASC
+                LIMIT $limit
+            OPTIONAL MATCH (route: Route)<-[:ROUTE_FOR_NOTE]-(note)
+            RETURN
+                note,
+                route,
+                COLLECT {{
+                    OPTIONAL MATCH (landmark: Landmark)<-[part_of_route: PART_OF_ROUTE]-(route)
+                    RETURN landmark
+                        ORDER BY part_of_route.position ASC
+                }} AS route_landmarks,
+                COLLECT {{
+                    OPTIONAL MATCH (note_category: NoteCategory)<-[:NOTE_REFERS]-(note)
+                    RETURN note_category.name
+                }} AS note_category_names
+                    ORDER BY note.last_update DESC, note.title ASC
+            """
+
+    @staticmethod
+    async def _notes_page(result, limit: int) -> Dict:
+        """Collects page of notes from the result of the query with LIMIT limit + 1"""
+        items = []
+        next_cursor = None
+        async for record in result:
+            record = record.data("note", "route", "route_landmarks", "note_category_names")
+            if len(items) == limit:
+                last_note = items[-1]["note"]
+                next_cursor = encode_cursor(
+                    "notes", {"last_update": last_note["last_update"].iso_format(), "title": last_note["title"]}
+                )
+                break
+            items.append(record)
+        for record in items:
+            record["note"]["last_update"] = record["note"]["last_update"].to_native()
+        await logger.debug(f"method:\t_notes_page,\nresult:\t{await result.consume()}")
+        return {"items": items, "next_cursor": next_cursor}
+
+    @staticmethod
+    async def _read_notes_page(tx, after: Dict | None, limit: int):
+        """Transaction handler for read_notes_page"""
+        result = await tx.run(
+            Reader._notes_page_query(
+                """
+                MATCH (note: Note)
+                """,
+                after
+            ),
+            after=after, limit=limit + 1
+        )
+        return await Reader._notes_page(result, limit)
+
+    @staticmethod
+    async def read_notes_page(session, after: Dict | None, limit: int):
+        """
+        Keyset pagination of the notes, the page is found by range index of Note.last_update, so time of the page
+        doesn't depend on its depth.
+        :param after: key of the last note of the previous page (decoded cursor) or None for the first page
+        """
+        result = await session.execute_read(Reader._read_notes_page, after, limit)
+        await logger.debug(f"method:\tread_notes_page,\nresult:\t{result}")
+        return result
+
+    @staticmethod
+    async def _read_notes_of_categories_page(
+            tx, note_categories_names: List[str], after: Dict | None, limit: int
+    ):
+        """Transaction handler for read_notes_of_categories_page"""
+        result = await tx.run(
+            Reader._notes_page_query(
+                """
+                UNWIND $note_categories_names AS note_category_name
+                MATCH (note: Note)-[:NOTE_REFERS]->(note_category: NoteCategory {name: note_category_name})
+                """,
+                after,
+                distinct=True
+            ),
+            note_categories_names=note_categories_names, after=after, limit=limit + 1
+        )
+        return await Reader._notes_page(result, limit)
+
+    @staticmethod
+    async def read_notes_of_categories_page(
+            session, note_categories_names: List[str], after: Dict | None, limit: int
+    ):
+        """
+        Keyset pagination of the notes of the categories (categories are found by their exact names).
+        :param after: key of the last note of the previous page (decoded cursor) or None for the first page
+        """
+        result = await session.execute_read(
+            Reader._read_notes_of_categories_page, note_categories_names, after, limit
+        )
+        await logger.debug(f"method:\tread_notes_of_categories_page,\nresult:\t{result}")
+        return result
+
+    @staticmethod
+    async def _read_page_of_routes_saved_by_user(tx, user_login: str, after: Dict | None, limit: int):
+        """Transaction handler for read_page_of_routes_saved_by_user"""
+        result = await tx.run(
+            """
+            MATCH (userAccount: UserAccount {login: $user_login})
+            MATCH (route: Route)<-[:ROUTE_SAVED_BY_USER]-(userAccount)
+                WHERE $after IS NULL OR route.index_id > $after.index_id
+            WITH route
+                ORDER BY route.index_id
+                LIMIT $limit
+            RETURN
+                route,
+                COLLECT {
+                    OPTIONAL MATCH (landmark: Landmark)<-[part_of_route: PART_OF_ROUTE]-(route)
+                    RETURN landmark
+                        ORDER BY part_of_route.position ASC
+                } AS route_landmarks
+                    ORDER BY route.index_id
+            """,
+            user_login=user_login, after=after, limit=limit + 1
+        )
+        items = []
+        next_cursor = None
+        async for record in result:
+            if len(items) == limit:
+                next_cursor = encode_cursor("routes_saved_by_user", {"index_id": items[-1]["route"]["index_id"]})
+                break
+            items.append(record.data("route", "route_landmarks"))
+        await logger.debug(f"method:\t_read_page_of_routes_saved_by_user,\nresult:\t{await result.consume()}")
+        return {"items": items, "next_cursor": next_cursor}
+
+    @staticmethod
+    async def read_page_of_routes_saved_by_user(session, user_login: str, after: Dict | None, limit: int):
+        """
+        Keyset pagination of the routes saved by user (user is found by exact login), routes are ordered by index_id.
+        :param after: key of the last route of the previous page (decoded cursor) or None for the first page
+        """
+        result = await session.execute_read(Reader._read_page_of_routes_saved_by_user, user_login, after, limit)
+        await logger.debug(f"method:\tread_page_of_routes_saved_by_user,\nresult:\t{result}")
+        return result
+
     @staticmethod
     async def _read_recommendations_by_coordinates(tx, coordinates_of_points: List[Dict[str, float]], limit: int):
         """Transaction handler for read_recommendations_by_coordinates"""
         result = await tx.run(
             """
             UNWIND $coordinates_of_points AS coordinates_of_point
-                WITH coordinates_of_point
-                OPTIONAL MATCH (mapSector: MapSector)
-                    WHERE
-                        mapSector.tl_longitude <= toFloat(coordinates_of_point.longitude) AND
-                        mapSector.tl_latitude >= toFloat(coordinates_of_point.latitude) AND
-                        point.withinBBox(
-                            point({latitude: coordinates_of_point.latitude, longitude: coordinates_of_point.longitude, crs:'WGS-84'}),
-                            point({latitude: mapSector.br_latitude, longitude: mapSector.tl_longitude, crs:'WGS-84'}),
-                            point({latitude: mapSector.tl_latitude, longitude: mapSector.br_longitude, crs:'WGS-84'})
-                        )
-                OPTIONAL MATCH
-                    (mapSector) ((:MapSector)-[:NEIGHBOUR_SECTOR]-(:MapSector)){0,1} (recommendationSector: MapSector)
-                        <-[:IN_SECTOR]-
-                    (recommendedLandmark:Landmark)
+                WITH point({
+                    latitude: toFloat(coordinates_of_point.latitude),
+                    longitude: toFloat(coordinates_of_point.longitude),
+                    crs:'WGS-84'
+                }) AS of_point
+                OPTIONAL MATCH (recommendedLandmark:Landmark)
+                    WHERE point.distance(recommendedLandmark.location, of_point) <= $radius
                 
                 WITH
                     recommendedLandmark AS recommendation,
-                    point.distance(
-                        point({latitude: coordinates_of_point.latitude, longitude: coordinates_of_point.longitude, crs:'WGS-84'}),
-                        point({latitude: recommendedLandmark.latitude, longitude: recommendedLandmark.longitude})
-                    ) AS distance
+                    point.distance(recommendedLandmark.location, of_point) AS distance
                 ORDER BY distance ASC
                 
                 RETURN DISTINCT
                     recommendation    
                 LIMIT $limit
             """,
-            coordinates_of_points=coordinates_of_points, limit=limit
+            coordinates_of_points=coordinates_of_points, limit=limit, radius=Reader.RECOMMENDATIONS_RADIUS
         )
         try:
             result_values = [record.data("recommendation") async for record in result]
@@ -101,6 +101,18 @@ class LandmarksBySectorsAgent(PURELandmarksBySectorsAgent):
             cls._result = result_task.return_value
         return cls._result
 
+    @classmethod
+    async def get_map_sectors_names_in_sector(cls, json_params: dict):
+        """
+        Returns names of all map sectors, that cover defined sector (cache of the sent sectors isn't used)
+        """
+        if not cls._sectors:
+            await cls.get_sectors()
+
+        await cls._coords_of_square_validation(json_params)
+        squares_in_sector = await cls.get_necessary_sectors(json_params)
+        return squares_in_sector[cls.MAP_SECTORS_NAMES]
+
     @classmethod
     async def get_landmarks_by_categories_in_sector(cls, jsom_params: dict):
         if not cls._sectors:
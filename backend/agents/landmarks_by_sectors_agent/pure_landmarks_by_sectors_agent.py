@@ -45,6 +45,26 @@ class PURELandmarksBySectorsAgent(ABC):
         """
         raise NotImplementedError
 
+    @abstractmethod
+    async def get_map_sectors_names_in_sector(self, json_params: Dict):
+        """
+        Method to return names of the map sectors, that cover defined sector. Use them to load landmarks of every map
+        sector separately
+        """
+        """
+        param json_params: Dict in form {
+         "TL": {
+             "latitude": Double,
+             "longitude": Double
+         },
+         "BR": {
+             "latitude": Double,
+             "longitude": Double
+         }
+        returns: List[str]
+        """
+        raise NotImplementedError
+
     @abstractmethod
     async def get_landmarks_by_categories_in_sector(self, json_params: Dict):
         """
@@ -437,9 +437,9 @@ class LandmarkRecAgent(PureLandmarkRecAgent):
             AbstractAgentsBroker.call_agent_task(
                 partial_record_list_with_next_state,
                 json_params={
-                    "state": state.tolist(),
-                    "action_list": [actions[i].numpy().tolist() for i in range(actions.shape[0])],
-                    "next_state_list": [next_states[i].numpy().tolist() for i in range(next_states.shape[0])]
+                    "state": state,
+                    "action_list": actions.numpy(),
+                    "next_state_list": next_states.numpy()
                 }
             )
         )
@@ -527,10 +527,9 @@ class LandmarkRecAgent(PureLandmarkRecAgent):
         maximum_amount_of_recommendations = json_params["maximum_amount_of_recommendations"]
         json_params["limit"] = maximum_amount_of_recommendations * 4  # TODO if 400% is enough
 
-        watch_state = np.asarray(json_params["watch_state"], dtype=self._np_dtype)
-        visit_state = np.asarray(json_params["visit_state"], dtype=self._np_dtype)
-
-        kb_pre_recommendations = await self._kb_pre_recommendation_by_coordinates(json_params)
+        kb_pre_recommendations = await self._kb_pre_recommendation_by_coordinates(
+            {"coordinates_of_points": json_params["coordinates_of_points"], "limit": json_params["limit"]}
+        )
         if not kb_pre_recommendations:
             return kb_pre_recommendations
         
@@ -541,7 +540,12 @@ class LandmarkRecAgent(PureLandmarkRecAgent):
 
         if not self._actor_critic_are_inited:
             await self._init_actor_critic_models()
-            
+
+        # States of the new user are zeros (e.g. the route builder has no states of the user)
+        state_dim = self._actor_model.input_shape[-1] // 2
+        watch_state = np.asarray(json_params.get("watch_state", np.zeros(state_dim)), dtype=self._np_dtype)
+        visit_state = np.asarray(json_params.get("visit_state", np.zeros(state_dim)), dtype=self._np_dtype)
+
         return await self._find_recommendations_by_coordinates(
             watch_state, visit_state, kb_pre_recommendations, maximum_amount_of_recommendations
         )
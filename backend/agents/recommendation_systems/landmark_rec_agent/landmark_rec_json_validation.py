@@ -33,8 +33,6 @@ find_recommendations_for_coordinates = \
         },
         "required": [
             "coordinates_of_points",
-            "watch_state",
-            "visit_state",
             "maximum_amount_of_recommendations"
         ],
         "additionalProperties": False
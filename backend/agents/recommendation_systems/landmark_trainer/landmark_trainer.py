@@ -67,6 +67,8 @@ class LandmarkTrainer:
         self._tau = tau
 
         self._sars_buffer = sars_buffer
+        # Training runs in threads (not in the event loop of the agent), buffer is shared with the record methods
+        self._sars_buffer_lock = threading.Lock()
 
         self.np_dtype = np_dtype
 
@@ -204,10 +206,11 @@ class LandmarkTrainer:
         index_list = []
         uuid_list = []
 
-        for i in range(len(action_list)):
-            index, uuid = self._sars_buffer.partial_record_with_next_state(state, action_list[i], next_state_list[i])
-            index_list.append(index)
-            uuid_list.append(uuid)
+        with self._sars_buffer_lock:
+            for i in range(len(action_list)):
+                index, uuid = self._sars_buffer.partial_record_with_next_state(state, action_list[i], next_state_list[i])
+                index_list.append(index)
+                uuid_list.append(uuid)
 
         return index_list, uuid_list
 
@@ -223,12 +226,13 @@ class LandmarkTrainer:
             )
         record_filled_up_list = []
 
-        for i in range(len(row_index_list)):
-            record_filled_up_list.append(
-                self._sars_buffer.fill_up_partial_record_reward_only(
-                    row_index_list[i], row_uuid_list[i], reward_list[i]
+        with self._sars_buffer_lock:
+            for i in range(len(row_index_list)):
+                record_filled_up_list.append(
+                    self._sars_buffer.fill_up_partial_record_reward_only(
+                        row_index_list[i], row_uuid_list[i], reward_list[i]
+                    )
                 )
-            )
 
         return record_filled_up_list
 
@@ -246,12 +250,13 @@ class LandmarkTrainer:
             )
         record_filled_up_list = []
 
-        for i in range(len(row_index_list)):
-            record_filled_up_list.append(
-                self._sars_buffer.fill_up_partial_record_reward_only_replace_next_state(
-                    row_index_list[i], row_uuid_list[i], reward_list[i]
+        with self._sars_buffer_lock:
+            for i in range(len(row_index_list)):
+                record_filled_up_list.append(
+                    self._sars_buffer.fill_up_partial_record_reward_only_replace_next_state(
+                        row_index_list[i], row_uuid_list[i], reward_list[i]
+                    )
                 )
-            )
 
         return record_filled_up_list
 
@@ -264,10 +269,11 @@ class LandmarkTrainer:
         row_index_list = []
         row_uuid_list = []
         
-        for i in range(len(sars_tuple_list)):
-            row_index, row_uuid = self._sars_buffer.record(sars_tuple_list[i])
-            row_index_list.append(row_index)
-            row_uuid_list.append(row_uuid)
+        with self._sars_buffer_lock:
+            for i in range(len(sars_tuple_list)):
+                row_index, row_uuid = self._sars_buffer.record(sars_tuple_list[i])
+                row_index_list.append(row_index)
+                row_uuid_list.append(row_uuid)
 
         return row_index_list, row_uuid_list
 
@@ -318,9 +324,14 @@ class LandmarkTrainer:
         self._actor_optimizer.apply_gradients(zip(actor_gradients, self._actor_model.trainable_weights))
 
 
+    def _save_sars_buffer(self):
+        with self._sars_buffer_lock:
+            self._sars_buffer.save()
+
+
     def _save_models_and_buffer(self):
         save_threads = [
-            threading.Thread(target=self._sars_buffer.save, args=()),
+            threading.Thread(target=self._save_sars_buffer, args=()),
             threading.Thread(target=self._actor_model.save, args=(self._actor_save_file,)),
             threading.Thread(target=self._critic_model.save, args=(self._critic_save_file,)),
             threading.Thread(target=self._target_actor_model.save, args=(self._target_actor_save_file,)),
@@ -335,11 +346,14 @@ class LandmarkTrainer:
     def train(self, repeat_amount: int = 1):
         if repeat_amount <= 0:
             raise ValueError(f"repeat_amount is expected to be int value > 0, got {repeat_amount} instead")
-        if self._sars_buffer.completed_record_exist():
+        with self._sars_buffer_lock:
+            completed_record_exist = self._sars_buffer.completed_record_exist()
+        if completed_record_exist:
             for _ in range(repeat_amount):
-                state_batch, action_batch, reward_batch, next_state_batch = (
-                    self._sars_buffer.sample_sars_batch(return_tf_tensors=True)
-                )
+                with self._sars_buffer_lock:
+                    state_batch, action_batch, reward_batch, next_state_batch = (
+                        self._sars_buffer.sample_sars_batch(return_tf_tensors=True)
+                    )
 
                 self._train_critic(state_batch, action_batch, reward_batch, next_state_batch)
                 self._train_actor(state_batch)
@@ -354,4 +368,5 @@ class LandmarkTrainer:
 
     
     def get_state(self, row_index: int, row_uuid) -> np.ndarray | None:
-        return self._sars_buffer.get_state(row_index, row_uuid)
+        with self._sars_buffer_lock:
+            return self._sars_buffer.get_state(row_index, row_uuid)
@@ -1,4 +1,6 @@
 # Author: Vodohleb04
+import asyncio
+
 import numpy as np
 from backend.agents.recommendation_systems.landmark_trainer.pure_landmark_trainer_agent import PureLandmarkTrainerAgent
 from backend.agents.recommendation_systems.landmark_trainer.landmark_trainer import LandmarkTrainer
@@ -39,9 +41,7 @@ class LandmarkTrainerAgent(PureLandmarkTrainerAgent):
 
     async def get_actor_model(self):
         return {
-            "actor_model": [
-                weight.tolist() for weight in self._trainer.actor_model.get_weights()
-            ]
+            "actor_model": self._trainer.actor_model.get_weights()
         }
 
 
@@ -51,9 +51,7 @@ class LandmarkTrainerAgent(PureLandmarkTrainerAgent):
     
     async def get_critic_model(self):
         return {
-            "critic_model": [
-                weight.tolist() for weight in self._trainer.critic_model.get_weights()
-            ]
+            "critic_model": self._trainer.critic_model.get_weights()
         }
 
 
@@ -214,22 +212,15 @@ class LandmarkTrainerAgent(PureLandmarkTrainerAgent):
 
 
     async def train(self, json_params):
-        self._trainer.train(json_params["repeat_amount"])
+        # Training is synchronous, it runs in a thread, so the tasks of the sars queue aren't blocked by it
+        await asyncio.to_thread(self._trainer.train, json_params["repeat_amount"])
 
         return {
-            "actor_model": [
-                weight.tolist() for weight in self._trainer.actor_model.get_weights()
-            ],
-            "critic_model": [
-                weight.tolist() for weight in self._trainer.critic_model.get_weights()
-            ]
+            "actor_model": self._trainer.actor_model.get_weights(),
+            "critic_model": self._trainer.critic_model.get_weights()
         }
     
 
     async def get_state(self, json_params):
-        state = self._trainer.get_state(json_params["row_index"], json_params["row_uuid"])
-        if state is not None:
-            return state.tolist()
-        else:
-            return state    
+        return self._trainer.get_state(json_params["row_index"], json_params["row_uuid"])
         
\ No newline at end of file
@@ -37,7 +37,7 @@ class PureLandmarkTrainerAgent(ABC):
     async def get_actor_model(self):
         """
         :returns: Dict[
-            "actor_model": List of weights
+            "actor_model": List[numpy.ndarray] - weights of the model
         ]
         """
         raise NotImplementedError
@@ -55,7 +55,7 @@ class PureLandmarkTrainerAgent(ABC):
     async def get_critic_model(self):
         """
         :returns: Dict[
-            "critic_model": List of weights
+            "critic_model": List[numpy.ndarray] - weights of the model
         ]
         """
         raise NotImplementedError
@@ -274,8 +274,8 @@ class PureLandmarkTrainerAgent(ABC):
         :repeat_amount: int > 0 - amount of repeats of training
 
         :returns: Dict[
-            "actor_model": List of weights,
-            "critic_model": List of weights
+            "actor_model": List[numpy.ndarray] - weights of the model,
+            "critic_model": List[numpy.ndarray] - weights of the model
         ]
         """
         raise NotImplementedError
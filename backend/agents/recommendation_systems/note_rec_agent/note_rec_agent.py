@@ -359,7 +359,7 @@ class NoteRecAgent(PureNoteRecAgent):
 
         next_state = self._new_state_formula(state, note_embedding)
         index, uuid = await self._partial_record_with_next_state_task(
-            state.tolist(), note_embedding.tolist(), next_state.tolist()
+            state, note_embedding, next_state
         )
 
         return {"row_uuid": uuid, "row_index": index}
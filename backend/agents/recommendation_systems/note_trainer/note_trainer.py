@@ -1,4 +1,5 @@
 # Author: Vodohleb04
+import asyncio
 import threading
 from typing import Tuple, List
 import keras
@@ -70,6 +71,8 @@ class NoteTrainer:
         self._tau = tau
 
         self._sars_buffer = sars_buffer
+        # Training runs in threads (not in the event loop of the agent), buffer is shared with the record methods
+        self._sars_buffer_lock = threading.Lock()
 
         self.np_dtype = np_dtype
         self.tf_dtype = tf_dtype
@@ -101,7 +104,8 @@ class NoteTrainer:
 
 
     def partial_record_with_next_state(self, state: np.ndarray, action: np.ndarray, next_state: np.ndarray):
-        return self._sars_buffer.partial_record_with_next_state(state, action, next_state)
+        with self._sars_buffer_lock:
+            return self._sars_buffer.partial_record_with_next_state(state, action, next_state)
 
 
     # def partial_record_list_with_next_state(
@@ -129,12 +133,13 @@ class NoteTrainer:
             )
         record_filled_up_list = []
 
-        for i in range(len(row_index_list)):
-            record_filled_up_list.append(
-                self._sars_buffer.fill_up_partial_record_reward_only(
-                    row_index_list[i], row_uuid_list[i], reward_list[i]
+        with self._sars_buffer_lock:
+            for i in range(len(row_index_list)):
+                record_filled_up_list.append(
+                    self._sars_buffer.fill_up_partial_record_reward_only(
+                        row_index_list[i], row_uuid_list[i], reward_list[i]
+                    )
                 )
-            )
 
         return record_filled_up_list
 
@@ -162,9 +167,20 @@ class NoteTrainer:
     async def _train_critic(
             self, state_batch: tf.Tensor, action_batch: tf.Tensor, reward_batch: tf.Tensor, next_state_batch: tf.Tensor
         ):
+        # Nearest real actions don't depend on the weights of the critic, so they are found out of the gradient tape.
+        # Models are run in a thread, so the event loop of the agent keeps serving the other tasks
+        proto_action_batch = await asyncio.to_thread(self._target_actor_model, next_state_batch)
+        target_action_batch = await self._get_nearest_one_for_notes_batch(proto_action_batch)
+        await asyncio.to_thread(
+            self._apply_critic_gradients, state_batch, action_batch, reward_batch, next_state_batch, target_action_batch
+        )
+
+
+    def _apply_critic_gradients(
+            self, state_batch: tf.Tensor, action_batch: tf.Tensor, reward_batch: tf.Tensor, next_state_batch: tf.Tensor,
+            target_action_batch: tf.Tensor
+        ):
         with tf.GradientTape() as critic_tape:
-            proto_action_batch = self._target_actor_model(next_state_batch)
-            target_action_batch = await self._get_nearest_one_for_notes_batch(proto_action_batch)
             y = reward_batch + self._gamma * self._target_critic_model([next_state_batch, target_action_batch])  # r + g*Q'(s_n, A'(s_n))
 
             critic_value = self._critic_model([state_batch, action_batch])
@@ -184,9 +200,21 @@ class NoteTrainer:
         self._actor_optimizer.apply_gradients(zip(actor_gradients, self._actor_model.trainable_weights))
 
 
+    def _train_actor_and_update_targets(self, state_batch: tf.Tensor):
+        self._train_actor(state_batch)
+
+        self._update_target_model(self._target_actor_model, self._actor_model, self._tau)
+        self._update_target_model(self._target_critic_model, self._critic_model, self._tau)
+
+
+    def _save_sars_buffer(self):
+        with self._sars_buffer_lock:
+            self._sars_buffer.save()
+
+
     def _save_models_and_buffer(self):
         save_threads = [
-            threading.Thread(target=self._sars_buffer.save, args=()),
+            threading.Thread(target=self._save_sars_buffer, args=()),
             threading.Thread(target=self._actor_model.save, args=(self._actor_save_file,)),
             threading.Thread(target=self._critic_model.save, args=(self._critic_save_file,)),
             threading.Thread(target=self._target_actor_model.save, args=(self._target_actor_save_file,)),
@@ -201,19 +229,19 @@ class NoteTrainer:
     async def train(self, repeat_amount: int = 1):
         if repeat_amount <= 0:
             raise ValueError(f"repeat_amount is expected to be int value > 0, got {repeat_amount} instead")
-        if self._sars_buffer.completed_record_exist():
+        with self._sars_buffer_lock:
+            completed_record_exist = self._sars_buffer.completed_record_exist()
+        if completed_record_exist:
             for _ in range(repeat_amount):
-                state_batch, action_batch, reward_batch, next_state_batch = (
-                    self._sars_buffer.sample_sars_batch(return_tf_tensors=True)
-                )
+                with self._sars_buffer_lock:
+                    state_batch, action_batch, reward_batch, next_state_batch = (
+                        self._sars_buffer.sample_sars_batch(return_tf_tensors=True)
+                    )
 
                 await self._train_critic(state_batch, action_batch, reward_batch, next_state_batch)
-                self._train_actor(state_batch)
-
-                self._update_target_model(self._target_actor_model, self._actor_model, self._tau)
-                self._update_target_model(self._target_critic_model, self._critic_model, self._tau)
+                await asyncio.to_thread(self._train_actor_and_update_targets, state_batch)
 
                 self._after_last_save += 1
             if self._after_last_save == self._save_period:
-                self._save_models_and_buffer()
+                await asyncio.to_thread(self._save_models_and_buffer)
                 self._after_last_save = 0
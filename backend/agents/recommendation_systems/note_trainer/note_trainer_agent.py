@@ -39,9 +39,7 @@ class NoteTrainerAgent(PureNoteTrainerAgent):
 
     async def get_actor_model(self):
         return {
-            "actor_model": [
-                weight.tolist() for weight in self._trainer.actor_model.get_weights()
-            ]
+            "actor_model": self._trainer.actor_model.get_weights()
         }
 
 
@@ -51,9 +49,7 @@ class NoteTrainerAgent(PureNoteTrainerAgent):
     
     async def get_critic_model(self):
         return {
-            "critic_model": [
-                weight.tolist() for weight in self._trainer.critic_model.get_weights()
-            ]
+            "critic_model": self._trainer.critic_model.get_weights()
         }
 
 
@@ -102,10 +98,6 @@ class NoteTrainerAgent(PureNoteTrainerAgent):
         await self._trainer.train(json_params["repeat_amount"])
 
         return {
-            "actor_model": [
-                weight.tolist() for weight in self._trainer.actor_model.get_weights()
-            ],
-            "critic_model": [
-                weight.tolist() for weight in self._trainer.critic_model.get_weights()
-            ]
+            "actor_model": self._trainer.actor_model.get_weights(),
+            "critic_model": self._trainer.critic_model.get_weights()
         }
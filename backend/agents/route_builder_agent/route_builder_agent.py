@@ -1,11 +1,15 @@
-import asyncio
+import time
+from typing import Any, AsyncGenerator, Tuple
 
+from backend.agents.route_builder_agent import route_builder_steps
 from backend.agents.route_builder_agent.pure_route_builder_agent import PureRouteBuilder
 from backend.broker.abstract_agents_broker import AbstractAgentsBroker
-from backend.broker.agents_tasks.landmark_rec_agent_tasks import \
-    find_recommendations_for_coordinates_and_categories_task
+from backend.broker.agents_tasks.landmark_rec_agent_tasks import find_recommendations_for_coordinates_task
+from backend.broker.agents_tasks.route_builder_steps_tasks import route_recommendations_params_task, \
+    final_route_params_task, route_result_task
 from backend.broker.agents_tasks.route_generating_tasks import get_optimized_route_task, \
     get_optimized_route_main_points_task
+from backend.broker.task_graph import TaskGraph
 
 
 class RouteBuilderAgent(PureRouteBuilder):
@@ -61,70 +65,81 @@ class RouteBuilderAgent(PureRouteBuilder):
                     }
         )
         """
-        pre_route_task = asyncio.create_task(
-            AbstractAgentsBroker.call_agent_task(get_optimized_route_main_points_task, route_params['start_end_points'])
-        )
-        self._asyncio_tasks.add(pre_route_task)
-        pre_route_task.add_done_callback(self._asyncio_tasks.discard)
-
-        pre_route = await pre_route_task
-        pre_route = pre_route.return_value
-        param_dict = dict()
+        result = await AbstractAgentsBroker.call_task_graph(self.route_graph(route_params))
+        final_route, landmarks = result.raise_for_error().return_value
 
-        param_dict['coordinates_of_points'] = pre_route['coordinates']
-        param_dict['categories_names'] = route_params['categories_names']
-        param_dict['user_login'] = route_params['user_login']
-        param_dict['maximum_amount_of_recommendations'] = int(len(pre_route['coordinates']) * 4)
-        param_dict['optional_limit'] = int(len(pre_route['coordinates']) * 6)
-        param_dict['amount_of_recommendations_for_point'] = 3
+        return final_route, landmarks
 
-        landmarks_task = asyncio.create_task(
-            AbstractAgentsBroker.call_agent_task(find_recommendations_for_coordinates_and_categories_task, param_dict)
+    @staticmethod
+    def route_graph(route_params) -> TaskGraph:
+        """
+        Graph of the route building: main points of the route, recommendations for them, final route. Outputs of the
+        steps are passed to the next steps by the workers, only the result of the graph is returned to the caller.
+        Call it with AbstractAgentsBroker.call_task_graph, result of the graph is [final_route, landmarks].
+        :param route_params: check build_route
+        """
+        graph = TaskGraph()
+        pre_route = graph.add(get_optimized_route_main_points_task, route_params['start_end_points'])
+        recommendations_params = graph.add(
+            route_recommendations_params_task,
+            {
+                "pre_route": pre_route,
+                "categories_names": route_params['categories_names'],
+                "user_login": route_params['user_login']
+            }
         )
-        self._asyncio_tasks.add(landmarks_task)
-        landmarks_task.add_done_callback(self._asyncio_tasks.discard)
-
-        landmarks = await landmarks_task
-        landmarks = landmarks.return_value
-
-        print("Penis ", landmarks)
-
-        formatted_landmarks = self.__format_landmarks(landmarks)
-
-        formatted_landmarks['coordinates'].append(
-            {"latitude": route_params['start_end_points']['coordinates'][-1]['latitude'],
-             "longitude": route_params['start_end_points']['coordinates'][-1]['longitude']})
-
-        formatted_landmarks['coordinates'].insert(0, {
-            "latitude": route_params['start_end_points']['coordinates'][0]['latitude'],
-            "longitude": route_params['start_end_points']['coordinates'][0]['longitude']})
-
-        final_route_task = (
-            AbstractAgentsBroker.call_agent_task(get_optimized_route_task, formatted_landmarks)
+        landmarks = graph.add(find_recommendations_for_coordinates_task, recommendations_params)
+        final_route_params = graph.add(
+            final_route_params_task, {"landmarks": landmarks, "start_end_points": route_params['start_end_points']}
         )
-
-        final_route = await final_route_task
-
-        final_route = final_route.return_value
-
-        return final_route, landmarks
+        final_route = graph.add(get_optimized_route_task, final_route_params)
+        graph.add(route_result_task, {"final_route": final_route, "landmarks": landmarks})
+        return graph
 
     @staticmethod
-    def __format_landmarks(landmarks):
+    async def build_route_stages(route_params, timeout: float | None = None) -> AsyncGenerator[Tuple[str, Any], None]:
         """
-        Formats landmarks dict
-        :param landmarks: [{"recommendation": {"latitude": float, "longitude": float, "name": str} | None}, ...]
-        :return: {"coordinates":[{"latitude": float}, "longitude": float], ...}
+        Builds the route stage by stage and yields output of every stage as soon as it's ready, so the route can be
+        shown progressively. Params of the stages are prepared by the caller (check route_builder_steps.py), so only
+        the agents are called through the broker.
+        :param route_params: check build_route
+        :param timeout: maximum time (in seconds) of the whole route building
+        :return: async generator of (stage, output):
+            ("pre_route", {"coordinates": [{"latitude": float, "longitude": float}, ...]}) - main points of the route,
+            ("landmarks", [{"recommendation": Dict | None, ...}, ...]) - recommended landmarks,
+            ("final_route", {"coordinates": [{"latitude": float, "longitude": float}, ...]}) - final route
+        :raises TaskiqResultTimeoutError: if the stage wasn't finished before the timeout
         """
-        formatted = {}
-        coordinates = []
-        for i in landmarks:
-            curr_coordinates = dict()
-            if i["recommendation"] is not None:
-                curr_coordinates['latitude'] = i['recommendation']['latitude']
-                curr_coordinates['longitude'] = i['recommendation']['longitude']
-                coordinates.append(curr_coordinates)
-
-        formatted['coordinates'] = coordinates
-
-        return dict(formatted)
+        deadline = None if timeout is None else time.time() + timeout
+
+        def time_left():
+            return None if deadline is None else max(deadline - time.time(), 0)
+
+        pre_route = (
+            await AbstractAgentsBroker.call_agent_task(
+                get_optimized_route_main_points_task, route_params['start_end_points'], timeout=time_left()
+            )
+        ).raise_for_error().return_value
+        yield "pre_route", pre_route
+
+        recommendations_params = route_builder_steps.recommendations_params(
+            {
+                "pre_route": pre_route,
+                "categories_names": route_params['categories_names'],
+                "user_login": route_params['user_login']
+            }
+        )
+        landmarks = (
+            await AbstractAgentsBroker.call_agent_task(
+                find_recommendations_for_coordinates_task, recommendations_params, timeout=time_left()
+            )
+        ).raise_for_error().return_value
+        yield "landmarks", landmarks
+
+        final_route_params = route_builder_steps.final_route_params(
+            {"landmarks": landmarks, "start_end_points": route_params['start_end_points']}
+        )
+        final_route = (
+            await AbstractAgentsBroker.call_agent_task(get_optimized_route_task, final_route_params, timeout=time_left())
+        ).raise_for_error().return_value
+        yield "final_route", final_route
@@ -0,0 +1,59 @@
+"""
+Steps of the route building, that prepare params of the next agent from the outputs of the previous ones.
+They are executed on the workers as the steps of the graph of RouteBuilderAgent (check route_builder_steps_tasks.py).
+"""
+from typing import Dict, List
+
+
+def recommendations_params(json_params: Dict) -> Dict:
+    """
+    Params of the recommendations for the main points of the route (params of find_recommendations_for_coordinates_task).
+    Recommendations agent chooses landmarks by the states of the user, the route builder has no states of the user, so
+    the agent uses the states of the new user. Categories and login of the user aren't passed to the agent.
+    :param json_params: {
+        "pre_route": {"coordinates": [{"latitude": float, "longitude": float}, ...]},
+        "categories_names": List[str],
+        "user_login": str
+    }
+    :return: {
+        "coordinates_of_points": [{"latitude": float, "longitude": float}, ...],
+        "maximum_amount_of_recommendations": int
+    }
+    """
+    pre_route = json_params['pre_route']
+    param_dict = dict()
+
+    param_dict['coordinates_of_points'] = pre_route['coordinates']
+    param_dict['maximum_amount_of_recommendations'] = int(len(pre_route['coordinates']) * 4)
+    return param_dict
+
+
+def final_route_params(json_params: Dict) -> Dict:
+    """
+    Points of the final route: start point, recommended landmarks and end point.
+    :param json_params: {
+        "landmarks": [{"recommendation": {"latitude": float, "longitude": float, "name": str} | None}, ...],
+        "start_end_points": {"coordinates": [{"latitude": float, "longitude": float}, ...]}
+    }
+    :return: {"coordinates": [{"latitude": float, "longitude": float}, ...]}
+    """
+    start_end_points = json_params['start_end_points']['coordinates']
+    coordinates = []
+    for i in json_params['landmarks']:
+        if i["recommendation"] is not None:
+            coordinates.append(
+                {"latitude": i['recommendation']['latitude'], "longitude": i['recommendation']['longitude']}
+            )
+
+    coordinates.append({"latitude": start_end_points[-1]['latitude'], "longitude": start_end_points[-1]['longitude']})
+    coordinates.insert(0, {"latitude": start_end_points[0]['latitude'], "longitude": start_end_points[0]['longitude']})
+    return {"coordinates": coordinates}
+
+
+def route_result(json_params: Dict) -> List:
+    """
+    Result of the route building.
+    :param json_params: {"final_route": Dict, "landmarks": List}
+    :return: [final_route, landmarks]
+    """
+    return [json_params['final_route'], json_params['landmarks']]
@@ -37,9 +37,10 @@ class PureRoutingAgent(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    async def _create_optimized_route(self):
+    async def _create_optimized_route(self, landmarks: list):
         """
         Interaction with OpenRoutService API
-        :return:
+        :param landmarks: [[longitude: float, latitude: float], ...]
+        :return: route points list: [[longitude: float, latitude: float], ...]
         """
         raise NotImplementedError
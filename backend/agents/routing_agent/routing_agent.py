@@ -7,6 +7,7 @@ from aiologger.loggers.json import JsonLogger
 
 from backend.agents.routing_agent import api_key
 from backend.agents.routing_agent.pure_routing_agent import PureRoutingAgent
+from backend.broker.deadline import time_left, wait_before_deadline
 
 logger = JsonLogger.with_default_handlers(
     level="DEBUG",
@@ -22,6 +23,7 @@ class RoutingAgent(PureRoutingAgent):
 
     Uses api_key in api_key.py
     """
+    ROUTE_ATTEMPTS = 3
 
     __single_routing_agent = None
 
@@ -47,7 +49,6 @@ class RoutingAgent(PureRoutingAgent):
     def __init__(self, client: ors.Client):
         if not self.__single_routing_agent:
             self._client_ = client
-            self._landmarks = []
             self.__single_routing_agent = self
         else:
             raise RuntimeError("Unexpected behaviour, this class can have only one instance")
@@ -58,16 +59,16 @@ class RoutingAgent(PureRoutingAgent):
         :param landmark_list: ["coordinates": [latitude: float, longitude: float], ...]
         :return: route points list: {"coordinates": [{"latitude": float, "longitude": float}, ...]}
         """
+        landmarks = []
         for i in landmark_list['coordinates']:
-            self._landmarks.append([i['latitude'], i['longitude']])
+            landmarks.append([i['latitude'], i['longitude']])
 
-        self._landmarks = self._reverse_coordinates(self._landmarks)
+        landmarks = self._reverse_coordinates(landmarks)
 
-        route = await self._create_optimized_route()
+        route = await self._create_optimized_route(landmarks)
 
         route = self._reverse_coordinates(route)
 
-        self._landmarks = []
         return self._coordinates_wrap(route)
 
     async def get_optimized_route_main_points(self, landmark_list: Dict):
@@ -77,16 +78,17 @@ class RoutingAgent(PureRoutingAgent):
         :param landmark_list: {"coordinates": [{"latitude": float, "longitude": float}, ...]}
         :return: route points list: {"coordinates": [{"latitude": float, "longitude": float}, ...]}
         """
+        landmarks = []
         for i in landmark_list['coordinates']:
-            self._landmarks.append([i['latitude'], i['longitude']])
+            landmarks.append([i['latitude'], i['longitude']])
 
-        await logger.debug(self._landmarks)
+        await logger.debug(landmarks)
 
-        self._landmarks = self._reverse_coordinates(self._landmarks)
+        landmarks = self._reverse_coordinates(landmarks)
 
-        await logger.debug(self._landmarks)
+        await logger.debug(landmarks)
 
-        route = await self._create_optimized_route()
+        route = await self._create_optimized_route(landmarks)
 
         main_points = []
         k = 0
@@ -105,7 +107,6 @@ class RoutingAgent(PureRoutingAgent):
 
         main_points = self._reverse_coordinates(main_points)
         await logger.debug(f"main points arrr {main_points}")
-        self._landmarks = []
         return self._coordinates_wrap(main_points)
 
     @staticmethod
@@ -120,24 +121,33 @@ class RoutingAgent(PureRoutingAgent):
 
         return coordinates_list
 
-    async def _create_optimized_route(self):
+    async def _create_optimized_route(self, landmarks: list):
         """
-        Interaction with OpenRoutService API
-        :return:
+        Interaction with OpenRoutService API.
+        Request is sent in a separate thread, so it doesn't block other calls of the agent. Request is retried
+        ROUTE_ATTEMPTS times, while deadline of the call isn't passed.
+        :param landmarks: [[longitude: float, latitude: float], ...]
+        :return: route points list: [[longitude: float, latitude: float], ...]
+        :raises TaskiqResultTimeoutError: if deadline of the call has passed
         """
-        while True:
+        for attempt in range(1, self.ROUTE_ATTEMPTS + 1):
             try:
-                route = self._client_.directions(
-                    coordinates=self._landmarks,
-                    profile='driving-car',
-                    format='geojson',
-                    validate=False,
-                    optimize_waypoints=True,
-                    radiuses=[-1 for _ in range(len(self._landmarks))]
+                route = await wait_before_deadline(
+                    asyncio.to_thread(
+                        self._client_.directions,
+                        coordinates=landmarks,
+                        profile='driving-car',
+                        format='geojson',
+                        validate=False,
+                        optimize_waypoints=True,
+                        radiuses=[-1 for _ in range(len(landmarks))]
+                    )
                 )
                 break
             except TypeError:
-                await logger.error("ORS route proplems")
+                await logger.error(f"ORS route proplems, attempt {attempt}, time left {time_left()}")
+                if attempt == self.ROUTE_ATTEMPTS:
+                    raise
 
         # await asyncio.sleep(5)
         return route['features'][0]['geometry']['coordinates']
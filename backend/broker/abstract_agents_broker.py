@@ -1,11 +1,38 @@
 #Author: Vodohleb04
 """Pure agents broker"""
+import asyncio
+import inspect
+import hashlib
+import itertools
+import time
 from abc import ABC, abstractmethod
-from typing import Dict
+from typing import Any, AsyncGenerator, Dict, List, Tuple
 
 import taskiq
+from redis.asyncio import Redis
+from taskiq import TaskiqResult
+from taskiq.acks import AckableMessage
+from taskiq.exceptions import TaskiqResultTimeoutError
+from taskiq.kicker import AsyncKicker
+from taskiq.message import BrokerMessage
+from taskiq.task import AsyncTaskiqTask
 from taskiq_redis import ListQueueBroker
 
+from backend.broker.deadline import (
+    DEADLINE_LABEL, get_deadline, reset_deadline, set_deadline, time_left, wait_before_deadline
+)
+from backend.broker.hop_metrics import (
+    KICKED_AT_LABEL, TRACE_LABEL, child_trace, children_of_result, get_trace, hops_of_result, record_hops
+)
+from backend.broker.micro_batching import (
+    BATCH_SIZE_LABEL, BATCH_WINDOW_LABEL, MicroBatch, batch_task_name, batch_window, execute_batch, results_of_batch
+)
+from backend.broker.result_backend import RESULT_TTL_LABEL, AgentsResultBackend
+from backend.broker.result_stream import (
+    STREAM_BUFFER_LABEL, STREAM_KWARG, item_of_message, produce_stream, stream_buffer, stream_task_name
+)
+from backend.broker.task_graph import GRAPH_KWARG, TaskGraph, complete_step, is_last_step, step_params
+
 
 class AbstractAgentsBroker(ListQueueBroker, ABC):
     """
@@ -13,8 +40,59 @@ class AbstractAgentsBroker(ListQueueBroker, ABC):
     Child classes are singletons.
     This class is used to solve cycle dependencies.
     """
-    def __init__(self, *args, **kwargs):
+    IN_PROCESS_LABEL = "in_process"
+    COALESCE_LABEL = "coalesce"
+    QUEUE_LABEL = "queue"
+    DEFAULT_QUEUE = "default"
+    CALL_TIMEOUT_LABEL = "call_timeout"
+
+    def __init__(
+        self,
+        *args,
+        in_process_calls: bool = True,
+        coalesce_calls: bool = True,
+        queues: Dict[str, int | None] | None = None,
+        listen_queues: List[str] | None = None,
+        call_timeout: float | None = None,
+        **kwargs
+    ):
+        """
+        :param in_process_calls: if True, tasks of the agents, that are located in the same worker process, are called
+        directly (without Redis queue and result backend). Use label in_process=False in BROKER.task to force
+        Redis path for the task.
+        :param coalesce_calls: if True, concurrent calls of the same task with equal json_params share one execution.
+        Use label coalesce=False in BROKER.task for the tasks, that write something (every call must be executed).
+        :param queues: queues of the tasks in order of their priority (the first is the most important) with maximum
+        amount of tasks of the queue, that are executed by one worker process at the same time (None - no limit).
+        Queue of the task is declared by label queue in BROKER.task, tasks without this label are kicked to
+        DEFAULT_QUEUE. Every queue is a separate list in Redis.
+        :param listen_queues: queues, that are listened by the worker process. All queues are listened if it's None
+        :param call_timeout: default timeout (in seconds) of call_agent_task. Use label call_timeout in BROKER.task to
+        set timeout of the task. Calls wait forever if it's None
+
+        Calls of the tasks, declared with label batch_size (and batch_window), are kicked in batches (check
+        micro_batching.py). Tasks, whose functions are async generators, are streamed (check result_stream.py).
+        """
         super().__init__(*args, **kwargs)
+        self._in_process_calls = in_process_calls
+        self._coalesce_calls = coalesce_calls
+        self._call_timeout = call_timeout
+        self._in_flight_calls: Dict[Tuple[str, str], List[asyncio.Future]] = {}
+        self._in_flight_executions: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._batch_tasks = {}
+        self._batches: Dict[str, MicroBatch] = {}
+        self._stream_tasks = {}
+        self._asyncio_tasks = set()
+
+        self._queues = dict(queues) if queues else {self.DEFAULT_QUEUE: None}
+        if self.DEFAULT_QUEUE not in self._queues:
+            self._queues[self.DEFAULT_QUEUE] = None
+        if listen_queues is None:
+            listen_queues = list(self._queues)
+        for queue in listen_queues:
+            if queue not in self._queues:
+                raise ValueError(f"Unknown queue \"{queue}\", available queues: {list(self._queues)}")
+        self._listen_queues = [queue for queue in self._queues if queue in listen_queues]
 
     @classmethod
     @abstractmethod
@@ -31,18 +109,557 @@ class AbstractAgentsBroker(ListQueueBroker, ABC):
         """Method to check if broker object already exists"""
         raise NotImplementedError
 
+    def _register_task(self, task_name: str, task) -> None:
+        """
+        Registers the task. Batch task is registered together with the task, if the task is batched. Stream task is
+        registered together with the task, if the task is streamed
+        """
+        super()._register_task(task_name, task)
+        if inspect.isasyncgenfunction(task.original_func):
+            self._register_stream_task(task_name, task)
+            return
+        if task.labels.get(BATCH_SIZE_LABEL) is None:
+            return
+
+        labels = {
+            label: value for label, value in task.labels.items() if label not in (BATCH_SIZE_LABEL, BATCH_WINDOW_LABEL)
+        }
+        labels[self.IN_PROCESS_LABEL] = False  # Batch is collected only for calls through Redis
+        labels[self.COALESCE_LABEL] = False
+
+        async def execute_task_batch(params_list: List):
+            return await execute_batch(task, params_list)
+
+        self._batch_tasks[task_name] = self.register_task(
+            execute_task_batch, task_name=batch_task_name(task_name), **labels
+        )
+
+    def _register_stream_task(self, task_name: str, task) -> None:
+        """Registers task, that pushes items of the streamed task to Redis"""
+        labels = {label: value for label, value in task.labels.items() if label != STREAM_BUFFER_LABEL}
+        labels[self.IN_PROCESS_LABEL] = False  # Local calls iterate the generator directly
+        labels[self.COALESCE_LABEL] = False
+        labels[RESULT_TTL_LABEL] = 1  # Nobody waits for the result of the stream task, items are sent instead
+        max_buffered = stream_buffer(task.labels)
+
+        async def execute_task_stream(json_params: Any, stream_id: str):
+            return await produce_stream(task, json_params, stream_id, self.result_backend, max_buffered)
+
+        self._stream_tasks[task_name] = self.register_task(
+            execute_task_stream, task_name=stream_task_name(task_name), **labels
+        )
+
+    def queue_list_name(self, queue: str) -> str:
+        """Returns name of the Redis list of the queue"""
+        return f"{self.queue_name}:{queue}"
+
+    async def kick(self, message: BrokerMessage) -> None:
+        """Puts the message to the list of the queue of its task"""
+        queue = message.labels.get(self.QUEUE_LABEL, self.DEFAULT_QUEUE)
+        if queue not in self._queues:
+            raise ValueError(
+                f"Task {message.task_name} is declared with unknown queue \"{queue}\", "
+                f"available queues: {list(self._queues)}"
+            )
+        async with Redis(connection_pool=self.connection_pool) as redis_conn:
+            await redis_conn.lpush(self.queue_list_name(queue), message.message)
+
+    async def listen(self) -> AsyncGenerator[AckableMessage, None]:
+        """
+        Listens to the queues of the worker process. Every queue is listened separately, message of the queue is
+        taken only when the queue has free slot (check queues param), so busy queue can't block the others. If
+        several messages are received, messages of the queue with higher priority are given to the worker first.
+
+        Slot is released when the message is acknowledged, so the worker must be run with default --ack-type
+        (when_saved) or when_executed.
+        """
+        received_messages = asyncio.PriorityQueue()
+        order = itertools.count()
+
+        def on_listener_done(listener: asyncio.Task):
+            if not listener.cancelled() and listener.exception() is not None:
+                received_messages.put_nowait((-1, next(order), listener.exception()))
+
+        listeners = []
+        for priority, queue in enumerate(self._listen_queues):
+            listener = asyncio.create_task(self._listen_queue(priority, queue, received_messages, order))
+            listener.add_done_callback(on_listener_done)
+            listeners.append(listener)
+        try:
+            while True:
+                _, _, message = await received_messages.get()
+                if isinstance(message, Exception):
+                    raise message
+                yield message
+        finally:
+            for listener in listeners:
+                listener.cancel()
+
+    async def _listen_queue(
+        self,
+        priority: int,
+        queue: str,
+        received_messages: asyncio.PriorityQueue,
+        order: itertools.count
+    ):
+        """Takes messages from the list of the queue, while the queue has free slots"""
+        limit = self._queues[queue]
+        slots = asyncio.Semaphore(limit) if limit else None
+
+        async with Redis(connection_pool=self.connection_pool) as redis_conn:
+            while True:
+                if slots is not None:
+                    await slots.acquire()
+                _, data = await redis_conn.brpop(self.queue_list_name(queue))
+                if slots is None:
+                    message = data
+                elif not self._is_known_message(data):
+                    # Worker skips the message without acknowledgement, so slot is released here
+                    slots.release()
+                    message = data
+                else:
+                    message = AckableMessage(data=data, ack=self._slot_releaser(slots))
+                await received_messages.put((priority, next(order), message))
+
+    def _is_known_message(self, data: bytes) -> bool:
+        """Checks if the message can be parsed and its task is registered in this process"""
+        try:
+            return self.find_task(self.formatter.loads(data).task_name) is not None
+        except Exception:
+            return False
+
     @staticmethod
-    async def call_agent_task(agent_task, json_params: Dict):
+    def _slot_releaser(slots: asyncio.Semaphore):
+        """Returns acknowledgement callback, that releases slot of the queue once"""
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                slots.release()
+
+        return release
+
+    def _is_listened(self, labels: Dict) -> bool:
+        """Checks if the queue of the task is listened by this worker process"""
+        return labels.get(self.QUEUE_LABEL, self.DEFAULT_QUEUE) in self._listen_queues
+
+    def agent_is_local(self, agent_task) -> bool:
+        """
+        Checks if the agent of the task is located in this process. Agents are created when their tasks modules are
+        imported, so agent is local in the worker process, that has the task in its registry and listens to the queue
+        of the task. Tasks of the other queues (e.g. training, that is imported by the modules of the interactive
+        agents) are kicked to their queues, so they don't block this worker and keep the slot limits of their queues.
+        """
+        if not self._in_process_calls or not self.is_worker_process:
+            return False
+        if not agent_task.labels.get(self.IN_PROCESS_LABEL, True) or not self._is_listened(agent_task.labels):
+            return False
+        return self.find_task(agent_task.task_name) is not None
+
+    def _copy_payload(self, payload: Any) -> Any:
+        """Copies payload through the serializer, so local calls get the same values as calls through Redis"""
+        return self.serializer.loadb(self.serializer.dumpb(payload))
+
+    async def _call_local_agent_task(self, agent_task, json_params: Dict) -> TaskiqResult:
+        """Calls the task function in this process. Result is wrapped in the same way as the worker does it"""
+        json_params = self._copy_payload(json_params)
+        start_time = time.time()
+        try:
+            return_value = agent_task.original_func(json_params)
+            if inspect.isawaitable(return_value):
+                return_value = await return_value
+            return_value = self._copy_payload(return_value)
+            is_err = False
+            error = None
+        except Exception as ex:
+            return_value = None
+            is_err = True
+            error = ex
+
+        return TaskiqResult(
+            is_err=is_err,
+            return_value=return_value,
+            execution_time=time.time() - start_time,
+            error=error
+        )
+
+    @classmethod
+    def _canonical_params(cls, value: Any) -> Any:
+        """Returns copy of the params with the sorted keys of the dicts (tuples are lists, as after serialization)"""
+        if isinstance(value, dict):
+            return {key: cls._canonical_params(value[key]) for key in sorted(value, key=str)}
+        if isinstance(value, (list, tuple)):
+            return [cls._canonical_params(item) for item in value]
+        return value
+
+    def _coalescing_key(self, agent_task, json_params: Dict) -> Tuple[str, str] | None:
+        """
+        Returns key of the call (task name and hash of the serialized json_params) or None, if the call mustn't be
+        coalesced. Keys of the dicts are sorted before serialization, so params are equal regardless of the order of
+        their keys. Arrays are hashed as raw frames of the serializer, so they aren't converted to Python values.
+        """
+        if not self._coalesce_calls or not agent_task.labels.get(self.COALESCE_LABEL, True):
+            return None
+        try:
+            packed_params = self.serializer.dumpb(self._canonical_params(json_params))
+        except (TypeError, ValueError):
+            return None
+        return agent_task.task_name, hashlib.blake2b(packed_params, digest_size=16).hexdigest()
+
+    def _call_deadline(self, labels: Dict, timeout: float | None) -> float | None:
+        """
+        Returns deadline of the call: the nearest of the deadline of the current call (nested calls can't outlive
+        their caller) and the timeout of the call (timeout param, label call_timeout of the task or default one).
+        """
+        if timeout is None:
+            timeout = labels.get(self.CALL_TIMEOUT_LABEL, self._call_timeout)
+        deadline = get_deadline()
+        if timeout is not None:
+            call_deadline = time.time() + float(timeout)
+            deadline = call_deadline if deadline is None else min(deadline, call_deadline)
+        return deadline
+
+    async def _call_agent_task(self, agent_task, json_params: Dict) -> TaskiqResult:
+        """
+        Calls the task directly, if its agent is local, or through Redis otherwise.
+        AgentsResultBackend notifies about stored results, so result backend is not polled with it.
+        Deadline of the current call is sent with the task. If deadline passes or the call is cancelled, task is
+        marked as cancelled in AgentsResultBackend, so worker drops it.
+        Latency of the hops of the call is recorded (check hop_metrics.py).
+        """
+        deadline = get_deadline()
+        if self.agent_is_local(agent_task):
+            with child_trace() as trace:
+                result = await wait_before_deadline(self._call_local_agent_task(agent_task, json_params), deadline)
+            record_hops(
+                agent_task.task_name, {"execution": result.execution_time}, trace.dump() if trace is not None else None
+            )
+            return result
+        if agent_task.task_name in self._batch_tasks:
+            return await self._call_batched_agent_task(agent_task, json_params)
+
+        kicker = agent_task.kicker()
+        if deadline is not None:
+            if time_left(deadline) <= 0:
+                raise TaskiqResultTimeoutError
+            kicker = kicker.with_labels(**{DEADLINE_LABEL: deadline})
+        if get_trace() is not None:
+            kicker = kicker.with_labels(**{TRACE_LABEL: 1})
+        kicked_at = time.time()
+        task_name = agent_task.task_name
+        agent_task = await kicker.with_labels(**{KICKED_AT_LABEL: kicked_at}).kiq(json_params)
+        enqueued_at = time.time()
+
+        result = await self._wait_kicked_result(agent_task.task_id, deadline)
+        record_hops(task_name, hops_of_result(kicked_at, enqueued_at, time.time(), result), children_of_result(result))
+        return result
+
+    async def _wait_kicked_result(self, task_id: str, deadline: float | None) -> TaskiqResult:
+        """Waits for the result of the kicked task until the deadline. Task is marked as cancelled, if caller gave up"""
+        if not isinstance(self.result_backend, AgentsResultBackend):
+            return await wait_before_deadline(AsyncTaskiqTask(task_id, self.result_backend).wait_result(), deadline)
+        try:
+            return await self.result_backend.wait_result(task_id, timeout=time_left(deadline))
+        except (asyncio.CancelledError, TaskiqResultTimeoutError):
+            await asyncio.shield(self.result_backend.cancel(task_id))
+            raise
+
+    async def _stream_local_agent_task(self, agent_task, json_params: Dict, deadline: float | None):
+        """Iterates the generator of the task in this process. Items are copied in the same way as results"""
+        items = agent_task.original_func(self._copy_payload(json_params))
+        try:
+            while True:
+                try:
+                    item = await wait_before_deadline(items.__anext__(), deadline)
+                except StopAsyncIteration:
+                    return
+                yield self._copy_payload(item)
+        finally:
+            await items.aclose()
+
+    async def _stream_agent_task(self, agent_task, json_params: Dict, deadline: float | None):
+        """
+        Iterates the generator of the task directly, if its agent is local, or takes its items from Redis otherwise.
+        If caller stops the iteration before the end of the stream, the call is marked as cancelled, so worker stops
+        the generator.
+        """
+        if self.agent_is_local(agent_task):
+            async for item in self._stream_local_agent_task(agent_task, json_params, deadline):
+                yield item
+            return
+        if not isinstance(self.result_backend, AgentsResultBackend):
+            raise TypeError("Streamed calls through Redis require AgentsResultBackend")
+        if deadline is not None and time_left(deadline) <= 0:
+            raise TaskiqResultTimeoutError
+
+        kicker = self._stream_tasks[agent_task.task_name].kicker()
+        if deadline is not None:
+            kicker = kicker.with_labels(**{DEADLINE_LABEL: deadline})
+        task_id = self.id_generator()
+        await kicker.with_task_id(task_id).kiq(json_params, **{STREAM_KWARG: task_id})
+
+        is_finished = False
+        try:
+            while True:
+                message = await self.result_backend.pop_stream_item(task_id, timeout=time_left(deadline))
+                try:
+                    item = item_of_message(message)
+                except StopAsyncIteration:
+                    is_finished = True
+                    return
+                except Exception:
+                    is_finished = True
+                    raise
+                yield item
+        finally:
+            if not is_finished:
+                await asyncio.shield(self.result_backend.cancel(task_id))
+            await asyncio.shield(self.result_backend.close_stream(task_id))
+
+    async def _call_batched_agent_task(self, agent_task, json_params: Dict) -> TaskiqResult:
+        """
+        Adds the call to the current batch of the task and waits for its result. Batch is kicked, when its window
+        passes or it's full. Calls, whose callers gave up before the kick, are removed from the batch, execution of the
+        batch is cancelled, when all its callers gave up.
+        """
+        deadline = get_deadline()
+        if deadline is not None and time_left(deadline) <= 0:
+            raise TaskiqResultTimeoutError
+
+        batch = self._batches.get(agent_task.task_name)
+        if batch is None:
+            batch = MicroBatch(agent_task, int(agent_task.labels[BATCH_SIZE_LABEL]))
+            self._batches[agent_task.task_name] = batch
+            batch.flush_handle = asyncio.get_running_loop().call_later(
+                batch_window(agent_task.labels), self._flush_batch, batch
+            )
+        waiter = batch.add(json_params, deadline)
+        if batch.is_full():
+            self._flush_batch(batch)
+        try:
+            return await wait_before_deadline(waiter)
+        except (asyncio.CancelledError, TaskiqResultTimeoutError):
+            waiter.cancel()
+            if batch.execution is not None and batch.all_waiters_gave_up():
+                batch.execution.cancel()
+            raise
+
+    def _flush_batch(self, batch: MicroBatch):
+        """Kicks the batch (the next call of the task starts new batch)"""
+        if self._batches.get(batch.agent_task.task_name) is batch:
+            del self._batches[batch.agent_task.task_name]
+        batch.flush_handle.cancel()
+        batch.remove_gave_up_calls()
+        if not batch.waiters:
+            return
+        batch.execution = asyncio.create_task(self._run_batch(batch))
+        self._asyncio_tasks.add(batch.execution)
+        batch.execution.add_done_callback(self._asyncio_tasks.discard)
+
+    async def _run_batch(self, batch: MicroBatch):
+        """Calls batch task with json_params of the batch and gives results to the calls"""
+        set_deadline(batch.deadline())
+        try:
+            batch_result = await self._call_agent_task(
+                self._batch_tasks[batch.agent_task.task_name], batch.params_list
+            )
+        except asyncio.CancelledError:
+            batch.cancel()
+            raise
+        except Exception as ex:
+            batch.set_exception(ex)
+            return
+        batch.set_results(results_of_batch(batch_result, len(batch.params_list)))
+
+    def _graph_step_task(self, step: Dict):
+        """Returns task of the step of the graph, if its agent is located in this process, or None otherwise"""
+        if not self._in_process_calls or not self.is_worker_process:
+            return None
+        if not step["labels"].get(self.IN_PROCESS_LABEL, True) or not self._is_listened(step["labels"]):
+            return None
+        return self.find_task(step["task"])
+
+    async def continue_task_graph(self, state: Dict, task_id: str, labels: Dict) -> TaskiqResult | None:
+        """
+        Executes current and next steps of the graph, while their agents are located in this process. The first step,
+        that can\'t be executed here, is kicked with the state of the graph and the same task_id.
+
+        :param state: state of the graph (check task_graph.py)
+        :param task_id: id of the graph, result of the last step is stored with it
+        :param labels: labels of the current call, deadline of the graph is taken from them
+        :return: result of the last step or None, if graph is continued by another worker
+        """
+        while True:
+            step = state["steps"][state["position"]]
+            agent_task = self._graph_step_task(step)
+            if agent_task is None:
+                kicker = AsyncKicker(step["task"], self, dict(step["labels"])).with_task_id(task_id)
+                if labels.get(DEADLINE_LABEL) is not None:
+                    kicker = kicker.with_labels(**{DEADLINE_LABEL: labels[DEADLINE_LABEL]})
+                await kicker.kiq(step_params(state), **{GRAPH_KWARG: state})
+                return None
+
+            result = await wait_before_deadline(self._call_local_agent_task(agent_task, step_params(state)))
+            if result.is_err or is_last_step(state):
+                return result
+            complete_step(state, result.return_value)
+
+    async def _call_task_graph(self, graph: TaskGraph) -> TaskiqResult:
+        """Executes local steps of the graph and waits for the result of the rest of the graph"""
+        deadline = get_deadline()
+        if deadline is not None and time_left(deadline) <= 0:
+            raise TaskiqResultTimeoutError
+        labels = {} if deadline is None else {DEADLINE_LABEL: deadline}
+        task_id = self.id_generator()
+        started_at = time.time()
+
+        result = await self.continue_task_graph(graph.state(), task_id, labels)
+        if result is None:
+            result = await self._wait_kicked_result(task_id, deadline)
+        record_hops(f"graph:{graph.last_task_name}", {"graph": time.time() - started_at})
+        return result
+
+    def _pop_coalesced_call(self, key: Tuple[str, str], execution_task: asyncio.Task) -> List[asyncio.Future]:
+        """
+        Removes the in-flight call of the execution and returns its waiters. Returns no waiters, if the call was
+        already removed (the new call with the same key may be in flight then).
+        """
+        if self._in_flight_executions.get(key) is not execution_task:
+            return []
+        del self._in_flight_executions[key]
+        return self._in_flight_calls.pop(key)
+
+    async def _run_coalesced_call(self, key: Tuple[str, str], agent_task, json_params: Dict):
+        """
+        Executes the call once and gives result to all its waiters. The first waiter gets the result itself, the
+        others get their own copies of the return value.
+        Shared execution has no deadline (otherwise waiters, that joined later, would get deadline of the first one).
+        Every waiter waits until its own deadline, execution is cancelled, when all waiters gave up.
+        """
+        set_deadline(None)  # Context of the execution task is a copy, deadline of the first caller isn't changed
+        execution_task = asyncio.current_task()
+        try:
+            result = await self._call_agent_task(agent_task, json_params)
+        except asyncio.CancelledError:
+            for waiter in self._pop_coalesced_call(key, execution_task):
+                waiter.cancel()
+            raise
+        except Exception as ex:
+            for waiter in self._pop_coalesced_call(key, execution_task):
+                if not waiter.done():
+                    waiter.set_exception(ex)
+            return
+
+        waiters = [waiter for waiter in self._pop_coalesced_call(key, execution_task) if not waiter.done()]
+        for i in range(len(waiters)):
+            if i == 0:
+                waiters[i].set_result(result)
+            else:
+                waiters[i].set_result(
+                    result.model_copy(update={"return_value": self._copy_payload(result.return_value)})
+                )
+
+    async def _call_coalesced_agent_task(self, agent_task, json_params: Dict) -> TaskiqResult:
+        """
+        Single-flight call of the task. If the same call is already in flight, waits for its result instead of
+        kicking the task one more time. Every waiter waits until its own deadline, execution is cancelled, when all
+        its waiters gave up.
+        """
+        key = self._coalescing_key(agent_task, json_params)
+        if key is None:
+            return await self._call_agent_task(agent_task, json_params)
+
+        waiter = asyncio.get_running_loop().create_future()
+        if key in self._in_flight_calls:
+            self._in_flight_calls[key].append(waiter)
+        else:
+            self._in_flight_calls[key] = [waiter]
+            execution_task = asyncio.create_task(self._run_coalesced_call(key, agent_task, json_params))
+            self._in_flight_executions[key] = execution_task
+            self._asyncio_tasks.add(execution_task)
+            execution_task.add_done_callback(self._asyncio_tasks.discard)
+        try:
+            return await wait_before_deadline(waiter)
+        except (asyncio.CancelledError, TaskiqResultTimeoutError):
+            waiter.cancel()
+            execution_task = self._in_flight_executions.get(key)
+            if execution_task is not None and all(waiter.done() for waiter in self._in_flight_calls[key]):
+                # Callers, that come before the cancellation is finished, start the new execution
+                self._pop_coalesced_call(key, execution_task)
+                execution_task.cancel()
+            raise
+
+    @staticmethod
+    async def call_agent_task(agent_task, json_params: Dict, timeout: float | None = None):
         """
         Wrapper to call task using broker. Call tasks only using this function.
         Works asynchronously.
+        If the agent of the task is located in the same process, task is called directly.
+        Concurrent calls of the same task with equal json_params share one execution (check COALESCE_LABEL).
+        Calls made by the agent inside the task inherit deadline of the task.
 
         :param agent_task: task to call (check broker/agents_tasks/... for available tasks). Takes only function name
         without arguments
         :param json_params: Dict with arguments to run the agent\'s function.
+        :param timeout: maximum time (in seconds) to wait for the result. If it\'s None, label call_timeout of the task
+        or default timeout of the broker is used
         :return: agent_task.wait_result(). Use return_value property to get result of agent_task
+        :raises TaskiqResultTimeoutError: if the result wasn\'t got before the deadline
         """
+        broker = agent_task.broker
+        if inspect.isasyncgenfunction(agent_task.original_func):
+            raise TypeError(f"Task {agent_task.task_name} is streamed, call it with stream_agent_task")
+        if isinstance(broker, AbstractAgentsBroker):
+            token = set_deadline(broker._call_deadline(agent_task.labels, timeout))
+            try:
+                return await broker._call_coalesced_agent_task(agent_task, json_params)
+            finally:
+                reset_deadline(token)
+
         agent_task = await agent_task.kiq(json_params)
 
-        return await agent_task.wait_result()
+        return await agent_task.wait_result(timeout=-1 if timeout is None else timeout)
 
+    @staticmethod
+    async def stream_agent_task(agent_task, json_params: Dict, timeout: float | None = None):
+        """
+        Wrapper to call streamed task (its function is an async generator) using broker. Items of the task are yielded
+        as soon as the task yields them (check result_stream.py).
+        Works asynchronously.
+
+            async for chunk in AbstractAgentsBroker.stream_agent_task(landmarks_by_region_stream_task, json_params):
+                ...
+
+        :param agent_task: streamed task to call (check broker/agents_tasks/... for available tasks)
+        :param json_params: Dict with arguments to run the agent\'s function.
+        :param timeout: maximum time (in seconds) of the whole stream. If it\'s None, label call_timeout of the task
+        or default timeout of the broker is used
+        :return: async generator of the items of the task
+        :raises TaskiqResultTimeoutError: if the stream didn\'t end before the deadline
+        :raises AgentStreamError: if generator of the task failed on the worker
+        """
+        broker = agent_task.broker
+        deadline = broker._call_deadline(agent_task.labels, timeout)
+        async for item in broker._stream_agent_task(agent_task, json_params, deadline):
+            yield item
+
+    @staticmethod
+    async def call_task_graph(graph: TaskGraph, timeout: float | None = None) -> TaskiqResult:
+        """
+        Executes graph of the tasks on the workers: outputs of the steps are passed to the next steps by the workers,
+        only result of the last step is returned to the caller (check task_graph.py).
+
+        :param graph: graph of the tasks
+        :param timeout: maximum time (in seconds) to wait for the result. Default timeout of the broker is used, if
+        it\'s None
+        :return: result of the last step. Use return_value property to get its output
+        :raises TaskiqResultTimeoutError: if the result wasn\'t got before the deadline
+        """
+        broker = graph.broker
+        token = set_deadline(broker._call_deadline({}, timeout))
+        try:
+            return await broker._call_task_graph(graph)
+        finally:
+            reset_deadline(token)
@@ -8,7 +8,7 @@ from backend.agents.crud_agent.crud_initializer import CRUD_AGENT
 
 # Read tasks
 
-@BROKER.task
+@BROKER.task(queue="interactive")
 async def categories_of_region_task(json_params: Dict):
     """
     Task to get the categories of the region. Do NOT call this task directly. Give it as the first argument (agent_task)
@@ -17,7 +17,8 @@ async def categories_of_region_task(json_params: Dict):
 
     Params for target function of agent Dict in form {
             "region_name": str,
-            "optional_limit": int | None
+            "optional_limit": int | None,
+            "prefix_search": bool (optional) - if True, finds by the start of the names (exact names by default)
         }, params for target function of agent
     :return: Coroutine
         List[
@@ -30,7 +31,7 @@ async def categories_of_region_task(json_params: Dict):
     return await CRUD_AGENT.get_categories_of_region(json_params)
 
 
-@BROKER.task
+@BROKER.task(queue="interactive")
 async def landmarks_in_map_sectors_task(json_params: Dict):
     """
     Task to get landmarks, located in passed map sectors. Finds map sectors by their names.
@@ -39,7 +40,8 @@ async def landmarks_in_map_sectors_task(json_params: Dict):
 
     Params for target function of agent Dict in form {
             "map_sectors_names": List[str],
-            "optional_limit": int | None
+            "optional_limit": int | None,
+            "prefix_search": bool (optional) - if True, finds by the start of the names (exact names by default)
         }, params for target function of agent
     :return: Coroutine
         List [
@@ -53,7 +55,7 @@ async def landmarks_in_map_sectors_task(json_params: Dict):
     return await CRUD_AGENT.get_landmarks_in_map_sectors(json_params)
 
 
-@BROKER.task
+@BROKER.task(queue="interactive")
 async def landmarks_refers_to_categories_task(json_params: Dict):
     """
     Task to get landmarks, that refers to given categories. Finds categories by their names.
@@ -62,7 +64,8 @@ async def landmarks_refers_to_categories_task(json_params: Dict):
 
     Params for target function of agent Dict in form {
             "categories_names": List[str],
-            "optional_limit": int | None
+            "optional_limit": int | None,
+            "prefix_search": bool (optional) - if True, finds by the start of the names (exact names by default)
         }
     :return: Coroutine
         List [
@@ -75,7 +78,32 @@ async def landmarks_refers_to_categories_task(json_params: Dict):
     return await CRUD_AGENT.get_landmarks_refers_to_categories(json_params)
 
 
-@BROKER.task
+@BROKER.task(queue="default", call_timeout=600, stream_buffer=4)
+async def landmarks_refers_to_categories_stream_task(json_params: Dict):
+    """
+    Streaming variant of landmarks_refers_to_categories_task, landmarks are yielded by chunks.
+    Do NOT call this task directly. Give it as the first argument (agent_task) of AgentsBroker.stream_agent_task
+    instead.
+    Works asynchronously.
+
+    Params for target function of agent Dict in form {
+            "categories_names": List[str],
+            "chunk_size": int (optional) - maximum amount of landmarks in the chunk,
+            "prefix_search": bool (optional) - if True, finds by the start of the names (exact names by default)
+        }
+    :return: AsyncGenerator of the chunks
+        List [
+            {
+                "landmark": Dict | None,
+                "category": Dict | None
+            }
+        ]
+    """
+    async for chunk in CRUD_AGENT.stream_landmarks_refers_to_categories(json_params):
+        yield chunk
+
+
+@BROKER.task(queue="interactive")
 async def landmarks_by_coordinates_and_name_task(json_params: Dict):
     """
     Task to get landmarks with the given coordinates and name.
@@ -104,7 +132,7 @@ async def landmarks_by_coordinates_and_name_task(json_params: Dict):
     return await CRUD_AGENT.get_landmarks_by_coordinates_and_name(json_params)
 
 
-@BROKER.task
+@BROKER.task(queue="interactive")
 async def landmarks_by_name_list_task(json_params: Dict):
     """
     Task to get landmarks with given names.
@@ -126,7 +154,29 @@ async def landmarks_by_name_list_task(json_params: Dict):
     return await CRUD_AGENT.get_landmarks_by_name_list(json_params)
 
 
-@BROKER.task
+@BROKER.task(queue="interactive")
+async def landmarks_by_paths_task(json_params: Dict):
+    """
+    Task to get landmarks by their paths (unique keys of the landmarks).
+    Do NOT call this task directly. Give it as the first argument (agent_task) of AgentsBroker.call_agent_task instead.
+    Works asynchronously.
+
+    Params for target function of agent Dict in form {
+            "landmarks_paths": List[str]
+        }
+    :return: Coroutine
+        List [
+            Dict[
+                "landmark": Dict,
+                "categories_names": List[str] | [] (empty list),
+                "in_regions": List["str"] | []
+            ]
+        ],  where categories_names are categories of landmark, in_regions - names of regions, where landmark is located
+    """
+    return await CRUD_AGENT.get_landmarks_by_paths(json_params)
+
+
+@BROKER.task(queue="interactive")
 async def landmarks_by_name_task(json_params: Dict):
     """
     Task to get landmarks with the names that starts with the given name.
@@ -149,7 +199,7 @@ async def landmarks_by_name_task(json_params: Dict):
     return await CRUD_AGENT.get_landmarks_by_name(json_params)
 
 
-@BROKER.task
+@BROKER.task(queue="interactive")
 async def landmarks_of_categories_in_region_task(json_params: Dict):
     """
     Task to get landmarks, located in given region, that refer to given categories.
@@ -160,7 +210,8 @@ async def landmarks_of_categories_in_region_task(json_params: Dict):
     Params for target function of agent Dict in form {
             "region_name": str,
             "categories_names": List[str],
-            "optional_limit": int | None
+            "optional_limit": int | None,
+            "prefix_search": bool (optional) - if True, finds by the start of the names (exact names by default)
         }
     :return: Coroutine
         List [
@@ -174,7 +225,7 @@ async def landmarks_of_categories_in_region_task(json_params: Dict):
     return await CRUD_AGENT.get_landmarks_of_categories_in_region(json_params)
 
 
-@BROKER.task
+@BROKER.task(queue="interactive")
 async def landmarks_by_region_task(json_params: Dict):
     """
     Task to get landmarks, located in region. Finds region by its name.
@@ -183,7 +234,8 @@ async def landmarks_by_region_task(json_params: Dict):
 
     Params for target function of agent Dict in form {
             "region_name": str,
-            "optional_limit": int | None
+            "optional_limit": int | None,
+            "prefix_search": bool (optional) - if True, finds by the start of the names (exact names by default)
         }
     :return: Coroutine
         List[
@@ -197,7 +249,33 @@ async def landmarks_by_region_task(json_params: Dict):
     return await CRUD_AGENT.get_landmarks_by_region(json_params)
 
 
-@BROKER.task
+@BROKER.task(queue="default", call_timeout=600, stream_buffer=4)
+async def landmarks_by_region_stream_task(json_params: Dict):
+    """
+    Streaming variant of landmarks_by_region_task, landmarks are yielded by chunks.
+    Do NOT call this task directly. Give it as the first argument (agent_task) of AgentsBroker.stream_agent_task
+    instead.
+    Works asynchronously.
+
+    Params for target function of agent Dict in form {
+            "region_name": str,
+            "chunk_size": int (optional) - maximum amount of landmarks in the chunk,
+            "prefix_search": bool (optional) - if True, finds by the start of the names (exact names by default)
+        }
+    :return: AsyncGenerator of the chunks
+        List[
+            Dict[
+                "landmark": Dict | None,
+                "located_at": Dict | None,
+                "categories_names": List[str] | [] (empty list)
+            ]
+        ],  where "located_at" is the region, where landmark is located, categories_names are categories of landmark
+    """
+    async for chunk in CRUD_AGENT.stream_landmarks_by_region(json_params):
+        yield chunk
+
+
+@BROKER.task(queue="interactive")
 async def map_sectors_of_points_task(json_params: Dict):
     """
     Task to get map sectors where given points are located.
@@ -224,7 +302,7 @@ async def map_sectors_of_points_task(json_params: Dict):
     return await CRUD_AGENT.get_map_sectors_of_points(json_params)
 
 
-@BROKER.task
+@BROKER.task(queue="interactive")
 async def map_sectors_structure_of_region_task(json_params: Dict):
     """
     Task to get map sectors structure of the given region.
@@ -232,7 +310,8 @@ async def map_sectors_structure_of_region_task(json_params: Dict):
     Works asynchronously.
 
     Params for target function of agent Dict in form {
-        "region_name": str
+        "region_name": str,
+        "prefix_search": bool (optional) - if True, finds by the start of the names (exact names by default)
     }
     :return: Coroutine
         List[
@@ -249,7 +328,7 @@ async def map_sectors_structure_of_region_task(json_params: Dict):
     return await CRUD_AGENT.get_map_sectors_structure_of_region(json_params)
 
 
-@BROKER.task
+@BROKER.task(queue="interactive")
 async def landmarks_of_categories_in_map_sectors_task(json_params: Dict):
     """
     Task to get landmarks that refer to the given categories and are located in the given map sectors.
@@ -263,7 +342,8 @@ async def landmarks_of_categories_in_map_sectors_task(json_params: Dict):
     Params for target function of agent Dict in form {
         "map_sectors_names": List[str],
         "categories_names": List[str],
-        "optional_limit": int | None
+        "optional_limit": int | None,
+        "prefix_search": bool (optional) - if True, finds by the start of the names (exact names by default)
     }
     :return: Coroutine
         List[
@@ -277,7 +357,7 @@ async def landmarks_of_categories_in_map_sectors_task(json_params: Dict):
     return await CRUD_AGENT.get_landmarks_of_categories_in_map_sectors(json_params)
 
 
-@BROKER.task
+@BROKER.task(queue="interactive")
 async def route_landmarks_by_index_id_task(json_params: Dict):
     """
     Task to get list landmarks of the route with the given index_id (unique id of route). Landmarks are returned in the
@@ -299,7 +379,7 @@ async def route_landmarks_by_index_id_task(json_params: Dict):
     return await CRUD_AGENT.get_route_landmarks_by_index_id(json_params)
 
 
-@BROKER.task
+@BROKER.task(queue="interactive")
 async def routes_saved_by_user_task(json_params: Dict):
     """
     Task to get routes with its landmarks (returns landmarks in the order that corresponds to the order of appearance
@@ -322,7 +402,7 @@ async def routes_saved_by_user_task(json_params: Dict):
     return await CRUD_AGENT.get_routes_saved_by_user(json_params)
 
 
-@BROKER.task
+@BROKER.task(queue="interactive")
 async def range_of_routes_saved_by_user_task(json_params: Dict):
     """
     Task to get range of routes with its landmarks (returns landmarks in the order that corresponds to the order of
@@ -348,7 +428,7 @@ async def range_of_routes_saved_by_user_task(json_params: Dict):
     return await CRUD_AGENT.get_range_of_routes_saved_by_user(json_params)
 
 
-@BROKER.task
+@BROKER.task(queue="interactive")
 async def note_by_title_task(json_params: Dict):
     """
     Task to get note with its routes (returns routes with theirs landmarks in the order that corresponds to the
@@ -373,7 +453,7 @@ async def note_by_title_task(json_params: Dict):
     return await CRUD_AGENT.get_note_by_title(json_params)
 
 
-@BROKER.task
+@BROKER.task(queue="interactive")
 async def notes_in_range_task(json_params: Dict):
     """
     Task to get range of notes of all categories with their routes (with landmarks in the order that corresponds to the
@@ -399,7 +479,7 @@ async def notes_in_range_task(json_params: Dict):
     return await CRUD_AGENT.get_notes_in_range(json_params)
 
 
-@BROKER.task
+@BROKER.task(queue="interactive")
 async def notes_of_categories_in_range(json_params: Dict):
     """
     Task to get range of notes of the given categories with their routes (with landmarks in the order that corresponds
@@ -426,7 +506,93 @@ async def notes_of_categories_in_range(json_params: Dict):
     return await CRUD_AGENT.get_notes_of_categories_in_range(json_params)
 
 
-@BROKER.task
+@BROKER.task(queue="interactive")
+async def notes_page_task(json_params: Dict):
+    """
+    Task to get page of notes with their routes, notes are ordered by last_update from the newest one. Pass
+    next_cursor of the page to get the next page (keyset pagination, time of the page doesn't depend on its depth).
+
+    Do NOT call this task directly. Give it as the first argument (agent_task) of AgentsBroker.call_agent_task instead.
+    Works asynchronously.
+
+    :param json_params: Dict in form {
+        "cursor": str | None (optional) - next_cursor of the previous page, None for the first page,
+        "limit": int
+    }
+    :return: Coroutine
+        Dict[
+            "items": List[
+                Dict[
+                    "note": Dict | None,
+                    "route": Dict | None,
+                    "route_landmarks": List[Dict | None] | None,
+                    "note_category_names": List[str | None] | None
+                ]
+            ],
+            "next_cursor": str | None - cursor of the next page, None if it's the last page
+        ]
+    """
+    return await CRUD_AGENT.get_notes_page(json_params)
+
+
+@BROKER.task(queue="interactive")
+async def notes_of_categories_page_task(json_params: Dict):
+    """
+    Task to get page of notes of the given categories with their routes (keyset pagination, check notes_page_task).
+
+    Do NOT call this task directly. Give it as the first argument (agent_task) of AgentsBroker.call_agent_task instead.
+    Works asynchronously.
+
+    :param json_params: Dict in form {
+        "note_categories_names": List[str],
+        "cursor": str | None (optional) - next_cursor of the previous page, None for the first page,
+        "limit": int
+    }
+    :return: Coroutine
+        Dict[
+            "items": List[
+                Dict[
+                    "note": Dict | None,
+                    "route": Dict | None,
+                    "route_landmarks": List[Dict | None] | None,
+                    "note_category_names": List[str | None] | None
+                ]
+            ],
+            "next_cursor": str | None - cursor of the next page, None if it's the last page
+        ]
+    """
+    return await CRUD_AGENT.get_notes_of_categories_page(json_params)
+
+
+@BROKER.task(queue="interactive")
+async def page_of_routes_saved_by_user_task(json_params: Dict):
+    """
+    Task to get page of routes saved by user, routes are ordered by index_id (keyset pagination, check
+    notes_page_task).
+
+    Do NOT call this task directly. Give it as the first argument (agent_task) of AgentsBroker.call_agent_task instead.
+    Works asynchronously.
+
+    :param json_params: Dict in form {
+        "user_login": str,
+        "cursor": str | None (optional) - next_cursor of the previous page, None for the first page,
+        "limit": int
+    }
+    :return: Coroutine
+        Dict[
+            "items": List[
+                Dict[
+                    "route": Dict | None,
+                    "route_landmarks": List[Dict | None] | None
+                ]
+            ],
+            "next_cursor": str | None - cursor of the next page, None if it's the last page
+        ]
+    """
+    return await CRUD_AGENT.get_page_of_routes_saved_by_user(json_params)
+
+
+@BROKER.task(queue="interactive")
 async def crud_recommendations_by_coordinates_task(json_params: Dict):
     """
     Task to get recommended landmarks by given coordinates. Returns recommended landmarks.
@@ -454,8 +620,29 @@ async def crud_recommendations_by_coordinates_task(json_params: Dict):
     return await CRUD_AGENT.get_recommendations_by_coordinates(json_params)
 
 
+@BROKER.task(queue="interactive")
+async def batch_read_task(json_params: Dict):
+    """
+    Task to run several reads in one session and one read transaction of the knowledge base.
+    Do NOT call this task directly. Give it as the first argument (agent_task) of AgentsBroker.call_agent_task instead.
+    Works asynchronously.
+
+    Params for target function of agent Dict in form {
+            "reads": List[
+                Dict[
+                    "method": str - name of the read method of the agent, e.g. "get_categories_of_region"
+                    "params": Dict - json_params of the method (params of the corresponding task)
+                ]
+            ] (at most 64 reads)
+        }
+    :return: Coroutine
+        List - results of the reads in order of "reads" ([] if params of the read are invalid)
+    """
+    return await CRUD_AGENT.get_batch(json_params)
+
+
 # Write tasks
-@BROKER.task
+@BROKER.task(queue="interactive", coalesce=False)
 async def post_user_task(json_params: Dict):
     """
     Task to put user to kb. Returns True if everything fine, else returns False.
@@ -469,7 +656,7 @@ async def post_user_task(json_params: Dict):
     return await CRUD_AGENT.put_user(json_params)
 
 
-@BROKER.task
+@BROKER.task(queue="interactive", coalesce=False)
 async def post_note_task(json_params: Dict):
     """
     Task to put note created by guide to kb. Returns True if everything fine, returns False otherwise.
@@ -488,7 +675,7 @@ async def post_note_task(json_params: Dict):
     return await CRUD_AGENT.put_note(json_params)
 
 
-@BROKER.task
+@BROKER.task(queue="interactive", coalesce=False)
 async def post_route_for_note_task(json_params: Dict):
     """
     Task to put route for the corresponding note to kb. Returns True if everything fine, returns False otherwise.
@@ -513,7 +700,7 @@ async def post_route_for_note_task(json_params: Dict):
     return await CRUD_AGENT.put_route_for_note(json_params)
 
 
-@BROKER.task
+@BROKER.task(queue="interactive", coalesce=False)
 async def post_route_saved_by_user_task(json_params: Dict):
     """
     Task to put route saved by user to kb. Returns True if everything fine, returns False otherwise.
@@ -537,7 +724,7 @@ async def post_route_saved_by_user_task(json_params: Dict):
     return await CRUD_AGENT.put_route_saved_by_user(json_params)
 
 
-@BROKER.task
+@BROKER.task(queue="interactive", coalesce=False)
 async def post_saved_relationship_for_existing_route(json_params: Dict):
     """
     Task to mark route with the given index_id as saved by user. Returns True if everything fine,
@@ -553,3 +740,101 @@ async def post_saved_relationship_for_existing_route(json_params: Dict):
     :return: Coroutine Dict["result": bool] -
     """
     return await CRUD_AGENT.put_saved_relationship_for_existing_route(json_params)
+
+
+# Bulk write tasks
+@BROKER.task(queue="default", coalesce=False, call_timeout=300)
+async def post_users_task(json_params: Dict):
+    """
+    Task to put several users to kb in one transaction. Returns True if everything fine, else returns False (nothing
+        is put then).
+
+    Do NOT call this task directly. Give it as the first argument (agent_task) of AgentsBroker.call_agent_task instead.
+    Works asynchronously.
+
+    :param json_params: Dict in form {"user_logins": List[str]} (at most 1000 logins)
+    :return: Coroutine Dict["result": bool] -
+    """
+    return await CRUD_AGENT.put_users(json_params)
+
+
+@BROKER.task(queue="default", coalesce=False, call_timeout=300)
+async def post_notes_task(json_params: Dict):
+    """
+    Task to put several notes created by guides to kb in one transaction. Returns True if everything fine, returns
+        False otherwise (nothing is put then).
+
+    Do NOT call this task directly. Give it as the first argument (agent_task) of AgentsBroker.call_agent_task instead.
+    Works asynchronously.
+
+    :param json_params: Dict in form {
+        "notes": List[
+            Dict[
+                "guide_login": str,
+                "country_names": List[str],
+                "note_title": str,
+                "note_category_names": List[str]
+            ]
+        ] (at most 1000 notes)
+    }
+    :return: Coroutine Dict["result": bool] -
+    """
+    return await CRUD_AGENT.put_notes(json_params)
+
+
+@BROKER.task(queue="default", coalesce=False, call_timeout=300)
+async def post_routes_for_notes_task(json_params: Dict):
+    """
+    Task to put several routes of notes to kb in one transaction. Returns True and index_ids of the routes if
+        everything fine, returns False otherwise (nothing is put then).
+
+    Do NOT call this task directly. Give it as the first argument (agent_task) of AgentsBroker.call_agent_task instead.
+    Works asynchronously.
+
+    :param json_params: Dict in form {
+        "routes": List[
+            Dict[
+                "note_title": str,
+                "landmark_info_position_dicts": List[
+                    Dict [
+                        "name": str,
+                        "position": int,
+                        "latitude": float,
+                        "longitude": float
+                    ]
+                ]
+            ]
+        ] (at most 1000 routes)
+    }
+    :return: Coroutine Dict["result": bool, "index_ids": List[int]] -
+    """
+    return await CRUD_AGENT.put_routes_for_notes(json_params)
+
+
+@BROKER.task(queue="default", coalesce=False, call_timeout=300)
+async def post_routes_saved_by_user_task(json_params: Dict):
+    """
+    Task to put several routes saved by users to kb in one transaction. Returns True and index_ids of the routes if
+        everything fine, returns False otherwise (nothing is put then).
+
+    Do NOT call this task directly. Give it as the first argument (agent_task) of AgentsBroker.call_agent_task instead.
+    Works asynchronously.
+
+    :param json_params: Dict in form {
+        "routes": List[
+            Dict[
+                "user_login": str,
+                "landmark_info_position_dicts": List[
+                    Dict [
+                        "name": str,
+                        "position": int,
+                        "latitude": float,
+                        "longitude": float
+                    ]
+                ]
+            ]
+        ] (at most 1000 routes)
+    }
+    :return: Coroutine Dict["result": bool, "index_ids": List[int]] -
+    """
+    return await CRUD_AGENT.put_routes_saved_by_user(json_params)
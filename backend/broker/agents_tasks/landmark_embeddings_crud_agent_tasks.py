@@ -8,7 +8,7 @@ from backend.broker.broker_initializer import BROKER
 from backend.agents.landmark_embeddings_crud.landmark_embeddings_crud_initializer import LANDMARK_EMBEDDINGS_CRUD_AGENT
 
 # Read tasks
-@BROKER.task
+@BROKER.task(queue="recommendations", batch_size=32)
 async def get_landmarks_embeddings_task(json_params: Dict):
     """
     Task to get the embeddings of the given landmarks. Do NOT call this task directly. Give it as the first argument (agent_task)
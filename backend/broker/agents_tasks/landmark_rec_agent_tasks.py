@@ -5,7 +5,7 @@ from ..broker_initializer import BROKER
 from backend.agents.recommendation_systems.landmark_rec_agent.landmark_rec_agent_initializer import LANDMARK_REC_AGENT
 
 
-@BROKER.task
+@BROKER.task(queue="recommendations", coalesce=False)
 async def find_recommendations_for_coordinates_task(json_params: Dict):
     """
     Task to get the recommendations (landmarks) that located nearby the given coordinates.
@@ -22,8 +22,10 @@ async def find_recommendations_for_coordinates_task(json_params: Dict):
                 "longitude": float
             ]
         ],
+        "watch_state": List[float] (optional),
+        "visit_state": List[float] (optional),
         "maximum_amount_of_recommendations": int
-    }, where current_name is the name of given landmark
+    }, where watch_state and visit_state are states of the user (states of the new user are used, if they're omitted)
     :return: Coroutine
         List[
             {
@@ -40,7 +42,7 @@ async def find_recommendations_for_coordinates_task(json_params: Dict):
     return await LANDMARK_REC_AGENT.find_recommendations_by_coordinates(json_params)
 
 
-@BROKER.task
+@BROKER.task(queue="recommendations", coalesce=False, call_timeout=None)
 async def post_result_of_recommendations(
         json_params
     ):
@@ -74,7 +76,7 @@ async def post_result_of_recommendations(
         return await LANDMARK_REC_AGENT.post_result_of_recommendations(json_params)
 
 
-@BROKER.task
+@BROKER.task(queue="recommendations")
 async def count_new_watch_state(json_params) -> List[float]:
     """
     Counts new watch state using old state. 
@@ -101,7 +103,7 @@ async def count_new_watch_state(json_params) -> List[float]:
     return await LANDMARK_REC_AGENT.count_new_watch_state(json_params)
         
 
-@BROKER.task   
+@BROKER.task(queue="recommendations")
 async def count_new_visit_state(json_params: Dict) -> List[float]:
     """
     Counts new visit state using old state. 
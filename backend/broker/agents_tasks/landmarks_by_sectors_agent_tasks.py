@@ -5,7 +5,7 @@ from ..broker_initializer import BROKER
 from backend.agents.landmarks_by_sectors_agent.landmarks_by_sectors_agent_initializer import LANDMARKS_BY_SECTORS_AGENT
 
 
-@BROKER.task
+@BROKER.task(queue="interactive", result_ttl=30)
 async def get_landmarks_in_sector_task(json_params: Dict):
     """
         :param json_params: Dict in form {
@@ -23,7 +23,27 @@ async def get_landmarks_in_sector_task(json_params: Dict):
     return await LANDMARKS_BY_SECTORS_AGENT.get_landmarks_in_sector(json_params)
 
 
-@BROKER.task
+@BROKER.task(queue="interactive", result_ttl=30)
+async def get_map_sectors_names_in_sector_task(json_params: Dict):
+    """
+    Kick this task to get names of the map sectors, that cover the sector. Landmarks of every map sector can be loaded
+    separately with landmarks_in_map_sectors_task.
+        :param json_params: Dict in form {
+        "TL": {
+            "latitude": double,
+            "longitude": double
+        },
+        "BR": {
+            "latitude": double,
+            "longitude": double
+        }
+      }
+      :return: List[str]
+    """
+    return await LANDMARKS_BY_SECTORS_AGENT.get_map_sectors_names_in_sector(json_params)
+
+
+@BROKER.task(queue="interactive", result_ttl=30)
 async def get_landmarks_by_categories_in_sector_task(json_params: Dict):
     """
     #TODO: add categories
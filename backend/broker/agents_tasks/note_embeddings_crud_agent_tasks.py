@@ -9,7 +9,7 @@ from backend.agents.note_embeddings_crud.note_embeddings_crud_initializer import
 
 
 # Write tasks
-@BROKER.task
+@BROKER.task(queue="recommendations", coalesce=False)
 async def add_note_embedding(json_params: Dict):
     """
         Write query to add embedding of the note to the database.
@@ -26,7 +26,7 @@ async def add_note_embedding(json_params: Dict):
 
 
 # Read tasks
-@BROKER.task
+@BROKER.task(queue="recommendations")
 async def get_nearest_notes(json_params: Dict):
     """
         Read query to get embeddings of the notes, nearest to the given one.
@@ -50,7 +50,7 @@ async def get_nearest_notes(json_params: Dict):
     return await NOTE_EMBEDDINGS_CRUD_AGENT.get_nearest_notes(json_params)
 
 
-@BROKER.task
+@BROKER.task(queue="recommendations")
 async def get_nearest_one_for_notes_batch(json_params: Dict):
     """
     Read query to get the nearest embedding for every element of the given batch.
@@ -69,7 +69,7 @@ async def get_nearest_one_for_notes_batch(json_params: Dict):
     return await NOTE_EMBEDDINGS_CRUD_AGENT.get_nearest_one_for_notes_batch(json_params)
 
 
-@BROKER.task
+@BROKER.task(queue="recommendations")
 async def get_notes_by_titles(json_params: Dict):
     """
         WARNING! Result dict order doesn't correspond to the note_title argument order
@@ -91,7 +91,7 @@ async def get_notes_by_titles(json_params: Dict):
 
 
 # Update tasks
-@BROKER.task
+@BROKER.task(queue="recommendations", coalesce=False)
 async def update_note_embedding(json_params: Dict):
     """
         Update query to update embedding of the note, stored in the database.
@@ -108,7 +108,7 @@ async def update_note_embedding(json_params: Dict):
 
 
 # Update tasks
-@BROKER.task
+@BROKER.task(queue="recommendations", coalesce=False)
 async def delete_notes_embeddings(json_params: Dict):
     """
         Delete query to remove the given notes from the database.
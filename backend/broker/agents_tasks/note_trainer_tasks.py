@@ -2,55 +2,55 @@ from backend.broker.broker_initializer import BROKER
 from backend.agents.recommendation_systems.note_trainer.note_trainer_initializer import TRAINER_AGENT
 
 
-@BROKER.task
+@BROKER.task(queue="sars", result_ttl=60, result_max_size=256 * 1024 * 1024)
 async def get_actor_model(json_params):
     return await TRAINER_AGENT.get_actor_model()
 
-@BROKER.task
+@BROKER.task(queue="sars", coalesce=False)
 async def set_actor_model(json_params):
     return await TRAINER_AGENT.set_actor_model(json_params)
 
-@BROKER.task
+@BROKER.task(queue="sars")
 async def get_actor_model_config(json_params):
     return await TRAINER_AGENT.get_actor_model_config()
 
-@BROKER.task
+@BROKER.task(queue="sars", result_ttl=60, result_max_size=256 * 1024 * 1024)
 async def get_critic_model(json_params):
     return await TRAINER_AGENT.get_critic_model()
 
-@BROKER.task
+@BROKER.task(queue="sars", coalesce=False)
 async def set_critic_model(json_params):
     return await TRAINER_AGENT.set_critic_model(json_params)
 
-@BROKER.task
+@BROKER.task(queue="sars")
 async def get_critic_model_config(json_params):
     return await TRAINER_AGENT.get_critic_model_config()
 
-@BROKER.task
+@BROKER.task(queue="sars")
 async def get_tau(json_params):
     return await TRAINER_AGENT.get_tau()
 
-@BROKER.task
+@BROKER.task(queue="sars", coalesce=False)
 async def set_tau(json_params):
     return await TRAINER_AGENT.set_tau(json_params)
 
-@BROKER.task
+@BROKER.task(queue="sars", coalesce=False)
 async def partial_record_with_next_state(json_params):
     return await TRAINER_AGENT.partial_record_with_next_state(json_params)
 
-@BROKER.task
+@BROKER.task(queue="sars", coalesce=False)
 async def partial_record_list_with_next_state(json_params):
     return await TRAINER_AGENT.partial_record_list_with_next_state(json_params)
 
-@BROKER.task
+@BROKER.task(queue="sars", coalesce=False, call_timeout=None, batch_size=64)
 async def fill_up_partial_record_reward_only(json_params):
     return await TRAINER_AGENT.fill_up_partial_record_reward_only(json_params)
 
-@BROKER.task
+@BROKER.task(queue="sars", coalesce=False, call_timeout=None, batch_size=64)
 async def fill_up_partial_record_reward_only_list(json_params):
     return await TRAINER_AGENT.fill_up_partial_record_reward_only_list(json_params)
 
-@BROKER.task
+@BROKER.task(queue="training", coalesce=False, call_timeout=None, result_ttl=60, result_max_size=256 * 1024 * 1024)
 async def train(json_params):
     return await TRAINER_AGENT.train(json_params)
 
@@ -0,0 +1,30 @@
+"""Tasks of the steps of the graph of RouteBuilderAgent. Use broker to run tasks"""
+from typing import Dict
+
+from backend.broker.broker_initializer import BROKER
+from backend.agents.route_builder_agent import route_builder_steps
+
+
+@BROKER.task(queue="routing")
+async def route_recommendations_params_task(json_params: Dict):
+    """
+    Prepares params of the recommendations for the main points of the route.
+    Check route_builder_steps.recommendations_params
+    """
+    return route_builder_steps.recommendations_params(json_params)
+
+
+@BROKER.task(queue="routing")
+async def final_route_params_task(json_params: Dict):
+    """
+    Prepares points of the final route. Check route_builder_steps.final_route_params
+    """
+    return route_builder_steps.final_route_params(json_params)
+
+
+@BROKER.task(queue="routing")
+async def route_result_task(json_params: Dict):
+    """
+    Returns result of the route building. Check route_builder_steps.route_result
+    """
+    return route_builder_steps.route_result(json_params)
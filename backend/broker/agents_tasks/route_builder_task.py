@@ -4,7 +4,7 @@ from backend.broker.broker_initializer import BROKER
 from backend.agents.route_builder_agent.route_builder_initializer import ROUTE_BUILDER_AGENT
 
 
-@BROKER.task
+@BROKER.task(queue="routing", coalesce=False)
 async def build_route(route_params):
     """
     Get completed route.
@@ -3,7 +3,7 @@ from backend.broker.broker_initializer import BROKER
 from backend.agents.routing_agent.routing_agent_initializer import ROUTING_AGENT
 
 
-@BROKER.task
+@BROKER.task(queue="routing")
 async def get_optimized_route_task(landmark_list: dict):
     """
     Method finds all optimized route points for provided points.
@@ -13,7 +13,7 @@ async def get_optimized_route_task(landmark_list: dict):
     return await ROUTING_AGENT.get_optimized_route(landmark_list)
 
 
-@BROKER.task
+@BROKER.task(queue="routing")
 async def get_optimized_route_main_points_task(landmark_list: dict):
     """
     Method finds all optimized route points for provided points.
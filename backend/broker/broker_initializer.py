@@ -1,5 +1,11 @@
-from taskiq_redis import RedisAsyncResultBackend
+import os
+
 from .agents_broker import AgentsBroker
+from .deadline import DeadlineMiddleware
+from .hop_metrics import HopTimingMiddleware
+from .task_graph import TaskGraphMiddleware
+from .payload_serializer import NDArraySerializer
+from .result_backend import AgentsResultBackend
 
 
 #with open("backend/broker/basic_login.json", 'r') as fout:
@@ -10,7 +16,40 @@ if AgentsBroker.broker_exists():
     BROKER = AgentsBroker.get_broker()
     print("Broker wasn't created")  # TODO remove
 else:
+    PAYLOAD_SERIALIZER = NDArraySerializer()
+    # Queues in order of priority with limit of simultaneously executed tasks of the queue in one worker process
+    QUEUES = {
+        "interactive": 64,
+        "routing": 16,
+        "recommendations": 16,
+        "sars": 16,  # SARS buffers and models of the trainers, these tasks are awaited by the recommendation agents
+        AgentsBroker.DEFAULT_QUEUE: 16,
+        "training": 1  # Only train of the trainers
+    }
+    # Comma separated queues to listen by the worker, e.g. AGENTS_WORKER_QUEUES=interactive,routing
+    WORKER_QUEUES = os.environ.get("AGENTS_WORKER_QUEUES")
     BROKER = AgentsBroker(
-        url="redis://localhost:6379"
-    ).with_result_backend(RedisAsyncResultBackend(redis_url="redis://localhost:6379"))
+        url="redis://localhost:6379",
+        queues=QUEUES,
+        listen_queues=WORKER_QUEUES.split(",") if WORKER_QUEUES else None,
+        call_timeout=60
+    ).with_serializer(
+        PAYLOAD_SERIALIZER
+    ).with_result_backend(
+        AgentsResultBackend(
+            redis_url="redis://localhost:6379",
+            serializer=PAYLOAD_SERIALIZER,
+            keep_results=False,  # Result is removed, when the caller reads it
+            result_ex_time=600,  # Results, that weren't read, are removed after 10 minutes
+            max_result_size=64 * 1024 * 1024,
+            compression_threshold=64 * 1024
+        )
+    )
+    # Port of metrics of the worker process, e.g. AGENTS_WORKER_METRICS_PORT=9100
+    WORKER_METRICS_PORT = os.environ.get("AGENTS_WORKER_METRICS_PORT")
+    BROKER.add_middlewares(
+        DeadlineMiddleware(),
+        HopTimingMiddleware(metrics_port=int(WORKER_METRICS_PORT) if WORKER_METRICS_PORT else None),
+        TaskGraphMiddleware()
+    )
     print("Broker was created")  # TODO remove
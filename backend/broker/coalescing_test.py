@@ -0,0 +1,105 @@
+"""
+Checks of the coalescing of concurrent identical calls (AbstractAgentsBroker.call_agent_task). Tasks are called in
+this process (local calls), so the checks don't require Redis. Run from the directory of the project:
+
+    python -m backend.broker.coalescing_test
+"""
+import asyncio
+
+import numpy as np
+from taskiq.exceptions import TaskiqResultTimeoutError
+
+from backend.broker.abstract_agents_broker import AbstractAgentsBroker
+from backend.broker.deadline import get_deadline
+from backend.broker.payload_serializer import NDArraySerializer
+
+
+class CoalescingTestBroker(AbstractAgentsBroker):
+    @classmethod
+    def get_broker(cls):
+        return None
+
+    @classmethod
+    def broker_exists(cls) -> bool:
+        return False
+
+
+if __name__ == '__main__':
+
+    async def test():
+        broker = CoalescingTestBroker(url="redis://localhost:6379", call_timeout=60).with_serializer(
+            NDArraySerializer()
+        )
+        broker.is_worker_process = True  # Tasks are executed in this process
+        executions = []
+
+        @broker.task()
+        async def slow_task(json_params):
+            executions.append({"json_params": json_params, "deadline": get_deadline()})
+            await asyncio.sleep(0.3)
+            return {"values": [1, 2, 3]}
+
+        @broker.task(coalesce=False)
+        async def write_task(json_params):
+            executions.append({"json_params": json_params, "deadline": get_deadline()})
+            await asyncio.sleep(0.1)
+            return True
+
+        # Equal params share one execution regardless of the order of the keys, every caller gets its own copy
+        results = await asyncio.gather(
+            AbstractAgentsBroker.call_agent_task(slow_task, {"a": 1, "b": {"c": [1, 2], "d": "e"}}),
+            AbstractAgentsBroker.call_agent_task(slow_task, {"b": {"d": "e", "c": [1, 2]}, "a": 1}),
+            AbstractAgentsBroker.call_agent_task(slow_task, {"a": 1, "b": {"c": [1, 2], "d": "e"}})
+        )
+        assert len(executions) == 1, executions
+        assert all(result.return_value == {"values": [1, 2, 3]} for result in results), results
+        results[0].return_value["values"].append(4)
+        assert results[1].return_value == {"values": [1, 2, 3]}, results
+        print("Equal params are coalesced")
+
+        # Different params and arrays of different dtypes aren't coalesced
+        executions.clear()
+        await asyncio.gather(
+            AbstractAgentsBroker.call_agent_task(slow_task, {"a": 1}),
+            AbstractAgentsBroker.call_agent_task(slow_task, {"a": 2}),
+            AbstractAgentsBroker.call_agent_task(slow_task, {"a": np.arange(3, dtype=np.float32)}),
+            AbstractAgentsBroker.call_agent_task(slow_task, {"a": np.arange(3, dtype=np.int64)}),
+            AbstractAgentsBroker.call_agent_task(slow_task, {"a": np.arange(3, dtype=np.int64)})
+        )
+        assert len(executions) == 4, executions
+        executions.clear()
+        await asyncio.gather(
+            AbstractAgentsBroker.call_agent_task(write_task, {"a": 1}),
+            AbstractAgentsBroker.call_agent_task(write_task, {"a": 1})
+        )
+        assert len(executions) == 2, executions
+        print("Different params and tasks with coalesce=False aren't coalesced")
+
+        # Shared execution has no deadline of the first caller, the caller with the later deadline gets the result
+        executions.clear()
+
+        async def call_before_timeout(timeout):
+            try:
+                return (await AbstractAgentsBroker.call_agent_task(slow_task, {"a": 3}, timeout=timeout)).return_value
+            except TaskiqResultTimeoutError:
+                return "timeout"
+
+        results = await asyncio.gather(call_before_timeout(0.1), call_before_timeout(1.0))
+        assert results == ["timeout", {"values": [1, 2, 3]}], results
+        assert len(executions) == 1 and executions[0]["deadline"] is None, executions
+        print("Shared execution outlives the first caller")
+
+        # Caller, that comes right after the last waiter gave up, starts the new execution instead of getting
+        # CancelledError of the cancelled one
+        executions.clear()
+
+        async def call_after_give_up():
+            assert await call_before_timeout(0.1) == "timeout"
+            return await call_before_timeout(1.0)
+
+        assert await call_after_give_up() == {"values": [1, 2, 3]}
+        assert len(executions) == 2, executions
+        assert not broker._in_flight_calls and not broker._in_flight_executions
+        print("Late caller starts the new execution")
+
+    asyncio.run(test())
@@ -0,0 +1,109 @@
+"""
+Deadlines of agents calls.
+
+Deadline is an absolute time (time.time()) after which the caller doesn't wait for the result. It's sent with the
+task in the label "deadline" and is available in the agent code through get_deadline() and time_left(), so nested
+calls of other agents inherit it.
+"""
+import asyncio
+import time
+from contextvars import ContextVar, Token
+from typing import Any, Awaitable
+
+from taskiq import TaskiqMessage, TaskiqMiddleware, TaskiqResult
+from taskiq.exceptions import NoResultError, TaskiqResultTimeoutError
+
+DEADLINE_LABEL = "deadline"
+TIMEOUT_LABEL = "timeout"  # Label of taskiq, worker cancels the task after this amount of seconds
+
+_current_deadline: ContextVar[float | None] = ContextVar("agents_call_deadline", default=None)
+
+
+def get_deadline() -> float | None:
+    """Returns deadline of the current agent call or None, if the call has no deadline"""
+    return _current_deadline.get()
+
+
+def set_deadline(deadline: float | None) -> Token:
+    """Sets deadline of the current agent call. Use reset_deadline with returned token to restore previous one"""
+    return _current_deadline.set(deadline)
+
+
+def reset_deadline(token: Token):
+    """Restores deadline, that was before set_deadline"""
+    _current_deadline.reset(token)
+
+
+def time_left(deadline: float | None = None) -> float | None:
+    """
+    Returns amount of seconds before the deadline (negative, if deadline has passed) or None, if there is no deadline.
+
+    :param deadline: deadline to check. Deadline of the current agent call is used, if it\'s None
+    """
+    if deadline is None:
+        deadline = get_deadline()
+    if deadline is None:
+        return None
+    return deadline - time.time()
+
+
+async def wait_before_deadline(awaitable: Awaitable, deadline: float | None = None) -> Any:
+    """
+    Awaits the awaitable. If deadline passes before it\'s done, awaitable is cancelled.
+
+    :param awaitable: coroutine, task or future to await
+    :param deadline: deadline of waiting. Deadline of the current agent call is used, if it\'s None
+    :raises TaskiqResultTimeoutError: if deadline has passed
+    """
+    seconds_left = time_left(deadline)
+    if seconds_left is None:
+        return await awaitable
+    if seconds_left <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        elif isinstance(awaitable, asyncio.Future):
+            awaitable.cancel()
+        raise TaskiqResultTimeoutError
+    try:
+        return await asyncio.wait_for(awaitable, seconds_left)
+    except asyncio.TimeoutError:
+        raise TaskiqResultTimeoutError
+
+
+class DeadlineMiddleware(TaskiqMiddleware):
+    """
+    Worker side of deadlines. Task, whose deadline has passed or whose caller cancelled the call, is not executed.
+    Running task is cancelled by the worker at its deadline (taskiq label "timeout"). Result of such task is not
+    stored in result backend, because nobody waits for it.
+    Coalesced calls are kicked without deadline (check AbstractAgentsBroker._run_coalesced_call), such tasks are
+    dropped only by the cancellation mark, that is set, when all their callers gave up.
+    """
+
+    async def _is_cancelled(self, task_id: str) -> bool:
+        is_cancelled = getattr(self.broker.result_backend, "is_cancelled", None)
+        if is_cancelled is None:
+            return False
+        return await is_cancelled(task_id)
+
+    async def pre_execute(self, message: TaskiqMessage) -> TaskiqMessage:
+        deadline = message.labels.get(DEADLINE_LABEL)
+        if deadline is None:
+            if await self._is_cancelled(message.task_id):
+                message.labels[TIMEOUT_LABEL] = "0"
+            return message
+        deadline = float(deadline)
+        # Context of the worker task is copied to the task function, so nested calls inherit deadline
+        set_deadline(deadline)
+
+        timeout = time_left(deadline)
+        if await self._is_cancelled(message.task_id):
+            timeout = 0
+        if message.labels.get(TIMEOUT_LABEL) is not None:
+            timeout = min(timeout, float(message.labels[TIMEOUT_LABEL]))
+        message.labels[TIMEOUT_LABEL] = str(max(timeout, 0))  # Labels of the result must be strings
+        return message
+
+    async def post_execute(self, message: TaskiqMessage, result: TaskiqResult) -> None:
+        deadline = message.labels.get(DEADLINE_LABEL)
+        if (deadline is not None and time_left(float(deadline)) <= 0) or await self._is_cancelled(message.task_id):
+            result.error = NoResultError()
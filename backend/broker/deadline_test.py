@@ -0,0 +1,136 @@
+"""
+Checks of the deadlines of agents calls (backend/broker/deadline.py): nested calls inherit deadline of their caller,
+tasks with call_timeout=None have no deadline, worker doesn't execute expired tasks and cancels running ones at their
+deadline. Coalesced calls are kicked without deadline, worker drops them by the cancellation mark. Worker is run in
+this process.
+Requires Redis (sudo docker run --name redis-broker -p 6379:6379 -d redis). Run from the directory of the project:
+
+    python -m backend.broker.deadline_test
+"""
+import asyncio
+import time
+import uuid
+
+from taskiq.exceptions import TaskiqResultTimeoutError
+from taskiq.receiver import Receiver
+
+from backend.broker.abstract_agents_broker import AbstractAgentsBroker
+from backend.broker.deadline import DeadlineMiddleware, get_deadline
+from backend.broker.payload_serializer import NDArraySerializer
+from backend.broker.result_backend import AgentsResultBackend
+
+REDIS_URL = "redis://localhost:6379"
+
+
+class DeadlineTestBroker(AbstractAgentsBroker):
+    @classmethod
+    def get_broker(cls):
+        return None
+
+    @classmethod
+    def broker_exists(cls) -> bool:
+        return False
+
+
+if __name__ == '__main__':
+
+    async def test():
+        serializer = NDArraySerializer()
+        result_backend = AgentsResultBackend(
+            redis_url=REDIS_URL, serializer=serializer, keep_results=False, result_ex_time=600
+        )
+        broker = DeadlineTestBroker(
+            url=REDIS_URL, queue_name=f"deadline_test_{uuid.uuid4().hex}", call_timeout=5
+        ).with_serializer(serializer).with_result_backend(result_backend)
+        broker.add_middlewares(DeadlineMiddleware())
+        executions = []
+
+        @broker.task(coalesce=False)
+        async def inner_task(json_params):
+            executions.append({"task": "inner", "deadline": get_deadline()})
+            return json_params["value"]
+
+        @broker.task(coalesce=False)
+        async def outer_task(json_params):
+            executions.append({"task": "outer", "deadline": get_deadline()})
+            return (await AbstractAgentsBroker.call_agent_task(inner_task, json_params)).return_value + 1
+
+        @broker.task(coalesce=False, call_timeout=None)
+        async def unbounded_task(json_params):
+            executions.append({"task": "unbounded", "deadline": get_deadline()})
+            return True
+
+        @broker.task(coalesce=False)
+        async def slow_task(json_params):
+            executions.append({"task": "slow", "deadline": get_deadline()})
+            await asyncio.sleep(json_params["seconds"])
+            executions.append({"task": "slow finished", "deadline": get_deadline()})
+            return True
+
+        @broker.task()
+        async def shared_task(json_params):
+            executions.append({"task": "shared", "deadline": get_deadline()})
+            return True
+
+        await broker.startup()
+
+        # Worker isn't started yet, so the tasks expire in the queue. Then worker takes them and drops them: the task
+        # by its deadline, the coalesced one by the cancellation mark
+        for agent_task, json_params in ((slow_task, {"seconds": 0, "run": "expired"}), (shared_task, {"run": 1})):
+            called_at = time.time()
+            try:
+                await AbstractAgentsBroker.call_agent_task(agent_task, json_params, timeout=0.2)
+                assert False, "TaskiqResultTimeoutError isn't raised"
+            except TaskiqResultTimeoutError:
+                assert time.time() - called_at < 1, time.time() - called_at
+        worker = asyncio.create_task(Receiver(broker, run_starup=False).listen())
+        await asyncio.sleep(0.5)
+        assert executions == [], executions
+        assert (await AbstractAgentsBroker.call_agent_task(shared_task, {"run": 2}, timeout=2)).return_value
+        assert executions == [{"task": "shared", "deadline": None}], executions
+        print("Expired tasks aren't executed")
+
+        # Nested call inherits deadline of its caller
+        executions.clear()
+        called_at = time.time()
+        result = await AbstractAgentsBroker.call_agent_task(outer_task, {"value": 1}, timeout=2)
+        assert result.return_value == 2, result
+        assert [execution["task"] for execution in executions] == ["outer", "inner"], executions
+        outer_deadline, inner_deadline = (execution["deadline"] for execution in executions)
+        assert abs(outer_deadline - (called_at + 2)) < 0.5, (called_at, outer_deadline)
+        assert inner_deadline == outer_deadline, executions
+        print("Nested call inherits deadline")
+
+        # Task with call_timeout=None has no deadline, explicit timeout gives it one
+        executions.clear()
+        assert (await AbstractAgentsBroker.call_agent_task(unbounded_task, {"run": 1})).return_value
+        assert executions == [{"task": "unbounded", "deadline": None}], executions
+        assert (await AbstractAgentsBroker.call_agent_task(unbounded_task, {"run": 2}, timeout=2)).return_value
+        assert executions[-1]["deadline"] is not None, executions
+        print("Task with call_timeout=None has no deadline")
+
+        # Running task is cancelled by the worker at its deadline
+        executions.clear()
+        try:
+            await AbstractAgentsBroker.call_agent_task(slow_task, {"seconds": 1, "run": "cancelled"}, timeout=0.2)
+            assert False, "TaskiqResultTimeoutError isn't raised"
+        except TaskiqResultTimeoutError:
+            pass
+        await asyncio.sleep(1.2)
+        assert [execution["task"] for execution in executions] == ["slow"], executions
+        print("Running task is cancelled at its deadline")
+
+        # Call of the local agent is bounded by the deadline too
+        broker.is_worker_process = True
+        called_at = time.time()
+        try:
+            await AbstractAgentsBroker.call_agent_task(slow_task, {"seconds": 1, "run": "local"}, timeout=0.2)
+            assert False, "TaskiqResultTimeoutError isn't raised"
+        except TaskiqResultTimeoutError:
+            assert time.time() - called_at < 0.5, time.time() - called_at
+        print("Local call is bounded by the deadline")
+
+        worker.cancel()
+        await broker.shutdown()
+
+    asyncio.run(test())
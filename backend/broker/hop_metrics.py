@@ -0,0 +1,215 @@
+"""
+Latency of the hops of agents calls.
+
+Every call of the task through Redis is split into hops:
+    enqueue       - kick of the task (serialization and LPUSH to the queue)
+    queue_wait    - time in the queue, until the worker took the task
+    execution     - execution of the task function
+    result_store  - from the end of the execution to the write of the result (middlewares, serialization)
+    result_fetch  - from the write of the result until the caller has it (Redis, notification, read, deserialization)
+Tasks of the local agents have only execution hop. Graphs of tasks (call_task_graph) have one hop graph (from the call
+until the result of the last step), their task name is "graph:<task name of the last step>".
+
+Worker marks the moments in the labels of the result (HopTimingMiddleware, AgentsResultBackend), caller computes
+the hops and observes them in the histogram agents_task_hop_seconds{task_name, hop} (prometheus_client). Hops between
+processes are computed with time.time(), so clocks of the hosts must be synchronized.
+
+Caller sends the moment of the kick with the task (label hop_kicked_at), worker observes the time from the kick until
+it took the task in agents_task_queue_wait_seconds{task_name, queue}. It's observed for every task taken by the worker,
+including tasks, whose callers gave up (caller observes the hops only when it gets the result).
+
+Per-request breakdown is collected with hop_trace(): calls, that are made inside it, are written to the trace,
+including the calls made by the agents on the workers (they are sent back in the label of the result).
+"""
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List
+
+from prometheus_client import Histogram, start_http_server
+from taskiq import TaskiqMessage, TaskiqMiddleware, TaskiqResult
+
+KICKED_AT_LABEL = "hop_kicked_at"
+RECEIVED_AT_LABEL = "hop_received_at"
+EXECUTED_AT_LABEL = "hop_executed_at"
+STORED_AT_LABEL = "hop_stored_at"
+TRACE_LABEL = "hop_trace"
+
+logger = logging.getLogger(__name__)
+
+HOPS = ("enqueue", "queue_wait", "execution", "result_store", "result_fetch")
+
+TASK_HOP_SECONDS = Histogram(
+    "agents_task_hop_seconds",
+    "Latency of the hops of agents tasks calls",
+    ["task_name", "hop"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+TASK_QUEUE_WAIT_SECONDS = Histogram(
+    "agents_task_queue_wait_seconds",
+    "Time from the kick of the task until the worker took it (observed by the worker)",
+    ["task_name", "queue"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+
+
+class HopTrace:
+    """Breakdown of the calls made during one request"""
+
+    def __init__(self):
+        self.records: List[Dict] = []
+
+    def add(self, task_name: str, hops: Dict[str, float], children: List[Dict] | None = None):
+        self.records.append({"task_name": task_name, "hops": hops, "children": children or []})
+
+    def dump(self) -> List[Dict]:
+        """
+        Returns the breakdown in form [
+            {
+                "task_name": str,
+                "hops": {"enqueue": float, "queue_wait": float, ...},  # seconds
+                "children": [{"task_name": str, "hops": Dict, "children": List}, ...]  # nested calls of the agent
+            },
+            ...
+        ]
+        """
+        return self.records
+
+    def format(self) -> str:
+        """Returns the breakdown as text, one call per line, hops in milliseconds"""
+        lines = []
+
+        def format_records(records: List[Dict], depth: int):
+            for record in records:
+                hops = "  ".join(f"{hop} {seconds * 1000:.1f} ms" for hop, seconds in record["hops"].items())
+                lines.append(f"{'    ' * depth}{record['task_name']}:  {hops}")
+                format_records(record["children"], depth + 1)
+
+        format_records(self.records, 0)
+        return "\n".join(lines)
+
+
+_current_trace: ContextVar[HopTrace | None] = ContextVar("agents_hop_trace", default=None)
+
+
+def get_trace() -> HopTrace | None:
+    """Returns trace of the current request or None, if request isn\'t traced"""
+    return _current_trace.get()
+
+
+@contextmanager
+def hop_trace():
+    """Collects breakdown of the calls made inside the context. Usage: with hop_trace() as trace: ..."""
+    trace = HopTrace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+@contextmanager
+def child_trace():
+    """Collects nested calls separately, if current request is traced. Yields None otherwise"""
+    if get_trace() is None:
+        yield None
+        return
+    with hop_trace() as trace:
+        yield trace
+
+
+def record_hops(task_name: str, hops: Dict[str, float], children: List[Dict] | None = None):
+    """Observes hops of the call in the histogram and writes them to the trace of the current request"""
+    for hop, seconds in hops.items():
+        TASK_HOP_SECONDS.labels(task_name, hop).observe(max(seconds, 0.0))
+    trace = get_trace()
+    if trace is not None:
+        trace.add(task_name, hops, children)
+
+
+def hops_of_result(kicked_at: float, enqueued_at: float, received_at: float, result: TaskiqResult) -> Dict[str, float]:
+    """
+    Computes hops of the call through Redis.
+
+    :param kicked_at: time.time() before the kick
+    :param enqueued_at: time.time() after the kick
+    :param received_at: time.time(), when the caller got the result
+    :param result: result of the task with the labels of HopTimingMiddleware and AgentsResultBackend
+    """
+    hops = {"enqueue": enqueued_at - kicked_at}
+    labels = result.labels or {}
+    if RECEIVED_AT_LABEL not in labels or EXECUTED_AT_LABEL not in labels:
+        hops["execution"] = result.execution_time
+        return hops
+    worker_received_at = float(labels[RECEIVED_AT_LABEL])
+    executed_at = float(labels[EXECUTED_AT_LABEL])
+    stored_at = float(labels.get(STORED_AT_LABEL, executed_at))
+    hops["queue_wait"] = worker_received_at - enqueued_at
+    hops["execution"] = executed_at - worker_received_at
+    hops["result_store"] = stored_at - executed_at
+    hops["result_fetch"] = received_at - stored_at
+    return hops
+
+
+def children_of_result(result: TaskiqResult) -> List[Dict]:
+    """Returns breakdown of the nested calls, that were made by the agent on the worker"""
+    labels = result.labels or {}
+    if TRACE_LABEL not in labels:
+        return []
+    return json.loads(labels[TRACE_LABEL])
+
+
+class HopTimingMiddleware(TaskiqMiddleware):
+    """
+    Worker side of hop metrics. Marks moments, when the task was received and executed, observes queue wait of the
+    task. Collects nested calls of the traced tasks.
+    """
+
+    def __init__(self, metrics_port: int | None = None, metrics_addr: str = "0.0.0.0", metrics_ports_count: int = 16):
+        """
+        :param metrics_port: if it\'s not None, worker process exports its metrics (nested calls of the agents) on
+        the first free port of metrics_port, metrics_port + 1, ... (every worker process of the host has its own port)
+        :param metrics_addr: address of the metrics server
+        :param metrics_ports_count: how many ports from metrics_port are tried
+        """
+        super().__init__()
+        self._metrics_port = metrics_port
+        self._metrics_addr = metrics_addr
+        self._metrics_ports_count = metrics_ports_count
+
+    def startup(self) -> None:
+        if self._metrics_port is None or not self.broker.is_worker_process:
+            return
+        for port in range(self._metrics_port, self._metrics_port + self._metrics_ports_count):
+            try:
+                start_http_server(port=port, addr=self._metrics_addr)
+            except OSError:
+                continue  # Port is taken by another worker process
+            logger.info("Metrics of the worker process are exported on port %d", port)
+            return
+        logger.warning(
+            "Metrics of the worker process aren't exported: ports %d-%d are taken",
+            self._metrics_port, self._metrics_port + self._metrics_ports_count - 1
+        )
+
+    def pre_execute(self, message: TaskiqMessage) -> TaskiqMessage:
+        received_at = time.time()
+        message.labels[RECEIVED_AT_LABEL] = str(received_at)
+        kicked_at = message.labels.get(KICKED_AT_LABEL)
+        if kicked_at is not None:
+            queue = message.labels.get(self.broker.QUEUE_LABEL, self.broker.DEFAULT_QUEUE)
+            TASK_QUEUE_WAIT_SECONDS.labels(message.task_name, queue).observe(max(received_at - float(kicked_at), 0.0))
+        if message.labels.get(TRACE_LABEL):
+            # Context of the worker task is copied to the task function, so nested calls are written to this trace
+            _current_trace.set(HopTrace())
+        return message
+
+    def post_execute(self, message: TaskiqMessage, result: TaskiqResult) -> None:
+        result.labels[EXECUTED_AT_LABEL] = str(time.time())
+        trace = get_trace()
+        if trace is not None:
+            result.labels[TRACE_LABEL] = json.dumps(trace.dump())
+        else:
+            result.labels.pop(TRACE_LABEL, None)
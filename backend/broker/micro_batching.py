@@ -0,0 +1,122 @@
+"""
+Micro-batching of agents calls.
+
+Task is batched, if it\'s declared with label batch_size (and optionally batch_window):
+
+    @BROKER.task(queue="sars", batch_size=64, batch_window=0.005)
+    async def get_state(json_params):
+        ...
+
+Calls of such task, that go through Redis, are not kicked one by one. Caller collects them during batch_window seconds
+(or until batch_size calls are collected) and kicks one message of the batch task "<task name>:batch" with the list of
+their json_params. Batch task is registered by the broker together with the task, so it\'s executed by the same
+workers. Worker executes all calls of the batch in one execution (concurrently) and returns the list of their results,
+caller gives every result to its call. So the batch pays queue and result backend overhead once.
+
+Calls of the local agents are not batched. Errors of the calls are returned separately, one failed call doesn\'t fail
+the batch.
+"""
+import asyncio
+import inspect
+import time
+from typing import Any, Dict, List
+
+from taskiq import TaskiqResult
+from taskiq.compat import model_dump, model_validate
+
+BATCH_SIZE_LABEL = "batch_size"  # Maximum amount of calls in the batch
+BATCH_WINDOW_LABEL = "batch_window"  # Seconds, during which calls are collected to the batch
+BATCH_TASK_SUFFIX = ":batch"
+
+DEFAULT_BATCH_WINDOW = 0.005
+
+
+class MicroBatch:
+    """Calls of the task, that are collected to be kicked together"""
+
+    def __init__(self, agent_task, size: int):
+        self.agent_task = agent_task
+        self.size = size
+        self.params_list: List[Any] = []
+        self.waiters: List[asyncio.Future] = []
+        self.deadlines: List[float | None] = []
+        self.flush_handle: asyncio.TimerHandle | None = None
+        self.execution: asyncio.Task | None = None
+
+    def add(self, json_params: Any, deadline: float | None) -> asyncio.Future:
+        waiter = asyncio.get_running_loop().create_future()
+        self.params_list.append(json_params)
+        self.waiters.append(waiter)
+        self.deadlines.append(deadline)
+        return waiter
+
+    def remove_gave_up_calls(self):
+        calls = [
+            (json_params, waiter, deadline)
+            for json_params, waiter, deadline in zip(self.params_list, self.waiters, self.deadlines)
+            if not waiter.done()
+        ]
+        self.params_list = [json_params for json_params, _, _ in calls]
+        self.waiters = [waiter for _, waiter, _ in calls]
+        self.deadlines = [deadline for _, _, deadline in calls]
+
+    def is_full(self) -> bool:
+        return len(self.params_list) >= self.size
+
+    def deadline(self) -> float | None:
+        """Batch is waited until the latest deadline of its calls (None, if any call has no deadline)"""
+        if any(deadline is None for deadline in self.deadlines):
+            return None
+        return max(self.deadlines)
+
+    def all_waiters_gave_up(self) -> bool:
+        return all(waiter.done() for waiter in self.waiters)
+
+    def set_results(self, results: List[TaskiqResult]):
+        for waiter, result in zip(self.waiters, results):
+            if not waiter.done():
+                waiter.set_result(result)
+
+    def set_exception(self, ex: BaseException):
+        for waiter in self.waiters:
+            if not waiter.done():
+                waiter.set_exception(ex)
+
+    def cancel(self):
+        for waiter in self.waiters:
+            waiter.cancel()
+
+
+def batch_task_name(task_name: str) -> str:
+    return f"{task_name}{BATCH_TASK_SUFFIX}"
+
+
+def batch_window(labels: Dict) -> float:
+    return float(labels.get(BATCH_WINDOW_LABEL, DEFAULT_BATCH_WINDOW))
+
+
+async def execute_batch(agent_task, params_list: List[Any]) -> List[Dict]:
+    """
+    Worker side of the batch. Executes the task function for every json_params of the batch concurrently.
+
+    :return: results of the calls in form of model_dump(TaskiqResult), in order of params_list
+    """
+    async def execute_call(json_params):
+        start_time = time.time()
+        try:
+            return_value = agent_task.original_func(json_params)
+            if inspect.isawaitable(return_value):
+                return_value = await return_value
+            result = TaskiqResult(is_err=False, return_value=return_value, execution_time=time.time() - start_time)
+        except Exception as ex:
+            result = TaskiqResult(is_err=True, return_value=None, execution_time=time.time() - start_time, error=ex)
+        return model_dump(result)
+
+    return list(await asyncio.gather(*[execute_call(json_params) for json_params in params_list]))
+
+
+def results_of_batch(batch_result: TaskiqResult, amount: int) -> List[TaskiqResult]:
+    """Splits result of the batch task to the results of its calls. Error of the batch is given to every call"""
+    if batch_result.is_err:
+        return [batch_result.model_copy() for _ in range(amount)]
+    return [model_validate(TaskiqResult, result) for result in batch_result.return_value]
@@ -0,0 +1,107 @@
+"""
+Checks of the micro-batching of agents calls (backend/broker/micro_batching.py): concurrent calls of the task with
+label batch_size are kicked as one message, error of one call doesn't affect the others, calls, whose callers gave up
+before the kick, aren't sent. Worker is run in this process.
+Requires Redis (sudo docker run --name redis-broker -p 6379:6379 -d redis). Run from the directory of the project:
+
+    python -m backend.broker.micro_batching_test
+"""
+import asyncio
+import uuid
+
+import numpy as np
+from taskiq.exceptions import TaskiqResultTimeoutError
+from taskiq.receiver import Receiver
+
+from backend.broker.abstract_agents_broker import AbstractAgentsBroker
+from backend.broker.deadline import DeadlineMiddleware
+from backend.broker.micro_batching import batch_task_name
+from backend.broker.payload_serializer import NDArraySerializer
+from backend.broker.result_backend import AgentsResultBackend
+
+REDIS_URL = "redis://localhost:6379"
+
+
+class MicroBatchingTestBroker(AbstractAgentsBroker):
+    @classmethod
+    def get_broker(cls):
+        return None
+
+    @classmethod
+    def broker_exists(cls) -> bool:
+        return False
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.kicked_task_names = []
+
+    async def kick(self, message) -> None:
+        self.kicked_task_names.append(message.task_name)
+        await super().kick(message)
+
+
+if __name__ == '__main__':
+
+    async def test():
+        serializer = NDArraySerializer()
+        result_backend = AgentsResultBackend(
+            redis_url=REDIS_URL, serializer=serializer, keep_results=False, result_ex_time=600
+        )
+        broker = MicroBatchingTestBroker(
+            url=REDIS_URL, queue_name=f"micro_batching_test_{uuid.uuid4().hex}", call_timeout=5
+        ).with_serializer(serializer).with_result_backend(result_backend)
+        broker.add_middlewares(DeadlineMiddleware())
+        executions = []
+
+        @broker.task(coalesce=False, batch_size=4, batch_window=0.05)
+        async def state_task(json_params):
+            executions.append(json_params["row"])
+            if json_params["row"] == 3:
+                raise ValueError("broken row")
+            return np.arange(3, dtype=np.float32) * json_params["row"]
+
+        assert broker.find_task(batch_task_name(state_task.task_name)) is not None
+        await broker.startup()
+        worker = asyncio.create_task(Receiver(broker, run_starup=False).listen())
+
+        # 6 calls are kicked as the full batch of 4 calls and the batch of 2 calls after the window
+        results = await asyncio.gather(
+            *(AbstractAgentsBroker.call_agent_task(state_task, {"row": row}) for row in range(6))
+        )
+        assert broker.kicked_task_names == [batch_task_name(state_task.task_name)] * 2, broker.kicked_task_names
+        assert sorted(executions) == list(range(6)), executions
+        for row, result in enumerate(results):
+            if row == 3:
+                assert result.is_err and "broken row" in repr(result.error), result
+            else:
+                assert not result.is_err, result
+                assert result.return_value.dtype == np.float32, result
+                assert np.array_equal(result.return_value, np.arange(3) * row), result
+        print("Calls are batched, error of one call doesn't affect the others")
+
+        # Call, whose caller gave up before the window passed, isn't kicked
+        broker.kicked_task_names.clear()
+        executions.clear()
+        try:
+            await AbstractAgentsBroker.call_agent_task(state_task, {"row": 7}, timeout=0.01)
+            assert False, "TaskiqResultTimeoutError isn't raised"
+        except TaskiqResultTimeoutError:
+            pass
+        await asyncio.sleep(0.2)
+        assert broker.kicked_task_names == [] and executions == [], (broker.kicked_task_names, executions)
+        assert not broker._batches, broker._batches
+        print("Calls, whose callers gave up, aren't kicked")
+
+        # Calls of the local agent aren't batched
+        broker.is_worker_process = True
+        results = await asyncio.gather(
+            *(AbstractAgentsBroker.call_agent_task(state_task, {"row": row}) for row in (1, 2))
+        )
+        assert [result.return_value.tolist() for result in results] == [[0, 1, 2], [0, 2, 4]], results
+        assert broker.kicked_task_names == [], broker.kicked_task_names
+        print("Local calls aren't batched")
+
+        worker.cancel()
+        await broker.shutdown()
+
+    asyncio.run(test())
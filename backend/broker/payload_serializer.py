@@ -0,0 +1,82 @@
+"""
+Binary serializer of broker payloads (task arguments and task results).
+
+JSON serializer of taskiq sends json_params as text, so numpy arrays have to be converted with tolist() before they
+are kicked, and every float becomes a string in Redis. NDArraySerializer packs payloads with msgpack and moves numpy
+arrays as raw typed buffers (ExtType frames with dtype, shape and bytes). Decoded arrays are built with
+numpy.frombuffer, so they point directly to the received bytes (they are read-only, use numpy.array to get a copy).
+"""
+import datetime
+from typing import Any
+
+import msgpack
+import numpy as np
+from taskiq.abc.serializer import TaskiqSerializer
+from taskiq.compat import model_dump, model_validate
+from taskiq.result import TaskiqResult
+
+
+class NDArraySerializer(TaskiqSerializer):
+    """
+    Msgpack serializer with support of numpy.ndarray, numpy scalars and datetime values.
+    Give it to the broker with AgentsBroker.with_serializer and to AgentsResultBackend.
+    """
+    NDARRAY_EXT_CODE = 1
+    DATETIME_EXT_CODE = 2
+    DATE_EXT_CODE = 3
+
+    def __init__(self, min_frame_size: int = 0):
+        """
+        :param min_frame_size: arrays with less amount of items are packed as plain lists
+        """
+        self._min_frame_size = min_frame_size
+
+    def _default(self, value: Any):
+        """Hook for objects that msgpack can't pack by itself"""
+        if isinstance(value, np.ndarray):
+            if value.dtype.hasobject or value.size < self._min_frame_size:
+                return value.tolist()
+            shape = list(value.shape)  # ascontiguousarray turns 0-d array into the array of shape (1,)
+            value = np.ascontiguousarray(value)
+            return msgpack.ExtType(
+                self.NDARRAY_EXT_CODE,
+                msgpack.packb(
+                    [value.dtype.str, shape, value.data.cast("B") if value.size else b""], use_bin_type=True
+                )
+            )
+        if isinstance(value, np.generic):
+            return value.item()
+        if isinstance(value, datetime.datetime):
+            return msgpack.ExtType(self.DATETIME_EXT_CODE, value.isoformat().encode())
+        if isinstance(value, datetime.date):
+            return msgpack.ExtType(self.DATE_EXT_CODE, value.isoformat().encode())
+        if isinstance(value, (set, frozenset)):
+            return list(value)
+        raise TypeError(f"Object of type {type(value).__name__} can't be serialized by NDArraySerializer")
+
+    def _ext_hook(self, code: int, data: bytes):
+        """Hook to unpack ExtType frames"""
+        if code == self.NDARRAY_EXT_CODE:
+            dtype, shape, buffer = msgpack.unpackb(data, raw=False)
+            return np.frombuffer(buffer, dtype=np.dtype(dtype)).reshape(shape)
+        if code == self.DATETIME_EXT_CODE:
+            return datetime.datetime.fromisoformat(data.decode())
+        if code == self.DATE_EXT_CODE:
+            return datetime.date.fromisoformat(data.decode())
+        return msgpack.ExtType(code, data)
+
+    def dumpb(self, value: Any) -> bytes:
+        """Packs value to bytes"""
+        return msgpack.packb(value, default=self._default, use_bin_type=True)
+
+    def loadb(self, value: bytes) -> Any:
+        """Unpacks value from bytes"""
+        return msgpack.unpackb(value, ext_hook=self._ext_hook, raw=False, strict_map_key=False)
+
+    def dump_result(self, result: TaskiqResult) -> bytes:
+        """Packs result of the task. Error of the task is packed in the same form as taskiq does it for JSON"""
+        return self.dumpb(model_dump(result))
+
+    def load_result(self, value: bytes) -> TaskiqResult:
+        """Unpacks result of the task, packed by dump_result"""
+        return model_validate(TaskiqResult, self.loadb(value))
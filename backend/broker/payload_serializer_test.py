@@ -0,0 +1,58 @@
+"""
+Checks of the round trip of payloads through NDArraySerializer. Run from the directory of the project:
+
+    python -m backend.broker.payload_serializer_test
+"""
+import datetime
+
+import numpy as np
+from taskiq.result import TaskiqResult
+
+from backend.broker.payload_serializer import NDArraySerializer
+
+
+def check_array(decoded, original: np.ndarray):
+    assert isinstance(decoded, np.ndarray), type(decoded)
+    assert decoded.dtype == original.dtype, (decoded.dtype, original.dtype)
+    assert decoded.shape == original.shape, (decoded.shape, original.shape)
+    assert np.array_equal(decoded, original), (decoded, original)
+
+
+if __name__ == '__main__':
+    serializer = NDArraySerializer()
+
+    # Arrays keep dtype and shape, including 0-d arrays, empty and non-contiguous ones
+    arrays = [
+        np.array(np.float32(1)),
+        np.array(7, dtype=np.int64),
+        np.arange(12, dtype=np.float32).reshape(3, 4),
+        np.arange(12, dtype=np.float64).reshape(3, 4).T,
+        np.arange(10, dtype=np.int32)[::3],
+        np.zeros((0, 3), dtype=np.float32),
+        np.array([True, False])
+    ]
+    for array in arrays:
+        check_array(serializer.loadb(serializer.dumpb(array)), array)
+        check_array(serializer.loadb(serializer.dumpb({"params": [array]}))["params"][0], array)
+    print("Arrays are fine")
+
+    # Numpy scalars (np.float32(1)[()] is the scalar too) become python numbers
+    for scalar in (np.float32(1)[()], np.float32(1.5), np.int64(3), np.bool_(True)):
+        decoded = serializer.loadb(serializer.dumpb(scalar))
+        assert decoded == scalar.item() and type(decoded) is type(scalar.item()), (decoded, scalar)
+    print("Scalars are fine")
+
+    # Small arrays are packed as lists, 0-d array becomes the number
+    small_serializer = NDArraySerializer(min_frame_size=4)
+    assert small_serializer.loadb(small_serializer.dumpb(np.arange(3))) == [0, 1, 2]
+    assert small_serializer.loadb(small_serializer.dumpb(np.array(np.float32(1)))) == 1.0
+    check_array(small_serializer.loadb(small_serializer.dumpb(np.arange(4))), np.arange(4))
+    print("Small arrays are fine")
+
+    # Dates, sets and results of the tasks
+    value = {"at": datetime.datetime(2024, 5, 1, 12, 30), "day": datetime.date(2024, 5, 1), 1: {"a"}}
+    assert serializer.loadb(serializer.dumpb(value)) == {**value, 1: ["a"]}
+    result = TaskiqResult(is_err=False, return_value={"state": np.array(np.float32(2))}, execution_time=0.1)
+    decoded = serializer.load_result(serializer.dump_result(result))
+    check_array(decoded.return_value["state"], np.array(np.float32(2)))
+    print("Other values are fine")
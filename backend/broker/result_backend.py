@@ -0,0 +1,333 @@
+"""Redis result backend of AgentsBroker"""
+import asyncio
+import time
+import zlib
+from typing import Any, Dict, List, Union
+
+from prometheus_client import Counter, Gauge, Histogram
+from redis.asyncio import Redis
+from redis.asyncio.client import PubSub
+from taskiq import TaskiqResult
+from taskiq.exceptions import TaskiqResultTimeoutError
+from taskiq_redis import RedisAsyncResultBackend
+from taskiq_redis.exceptions import ResultIsMissingError
+
+from backend.broker.hop_metrics import STORED_AT_LABEL
+from backend.broker.payload_serializer import NDArraySerializer
+
+RESULT_TTL_LABEL = "result_ttl"  # Lifetime (in seconds) of the result of the task in Redis
+RESULT_MAX_SIZE_LABEL = "result_max_size"  # Maximum size (in bytes) of the packed result of the task
+
+COMPRESSED_MARK = b"\x00zlib"  # Packed results are msgpack maps, so they never start with this mark
+THREAD_CODING_SIZE = 1 << 20  # Results of this size (in bytes) are compressed and decompressed in a thread
+
+RESULT_SIZE_BYTES = Histogram(
+    "agents_result_size_bytes",
+    "Size of the results stored in result backend",
+    ["compressed"],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864, 268435456)
+)
+RESULTS_REJECTED = Counter("agents_result_rejected", "Results, that weren't stored, because they are too large")
+RESULT_BACKEND_MEMORY_BYTES = Gauge("agents_result_backend_memory_bytes", "Memory used by Redis of result backend")
+
+
+class ResultIsTooLargeError(Exception):
+    """Result of the task is larger than the size limit of result backend"""
+
+
+class AgentsResultBackend(RedisAsyncResultBackend):
+    """
+    Redis result backend, that stores results packed by NDArraySerializer (instead of pickle).
+
+    When result is stored, backend publishes notification to the channel "<channel_prefix><task_id>". Waiters of
+    wait_result are woken up by this notification, so they don't poll Redis. One pattern subscription is shared by all
+    waiters of the process. Rare checks of the result (fallback_check_interval) are kept in case of lost notification.
+
+    Caller, that gave up waiting, marks the task as cancelled ("<cancelled_prefix><task_id>"), so worker doesn't
+    execute it or doesn't store its result (check DeadlineMiddleware).
+
+    Items of the streamed calls are moved through the Redis list "<stream_prefix><task_id>" (check result_stream.py).
+    List expires after stream_ex_time seconds without new items, worker gives up the stream, if caller takes no items
+    for stream_ex_time seconds.
+
+    Memory of Redis is bounded: results expire after result_ex_time seconds (label result_ttl of BROKER.task sets
+    lifetime of the results of the task) and are removed, when they are read (keep_results=False). Result, that is
+    larger than max_result_size bytes (label result_max_size), isn't stored, caller gets ResultIsTooLargeError
+    instead. Results larger than compression_threshold bytes are compressed with zlib.
+    """
+
+    def __init__(
+        self,
+        redis_url: str,
+        serializer: NDArraySerializer,
+        channel_prefix: str = "agents_results:",
+        fallback_check_interval: float = 1.0,
+        cancelled_prefix: str = "agents_cancelled:",
+        cancelled_ex_time: int = 600,
+        max_result_size: int | None = None,
+        compression_threshold: int | None = None,
+        compression_level: int = 1,
+        stream_prefix: str = "agents_streams:",
+        stream_ex_time: int = 60,
+        stream_check_interval: float = 0.01,
+        **kwargs
+    ):
+        """
+        :param redis_url: url of Redis
+        :param serializer: serializer of results (the same serializer must be given to the broker)
+        :param channel_prefix: prefix of channels, that are used to notify about stored results
+        :param fallback_check_interval: interval (in seconds) of result checks, if no notification came
+        :param cancelled_prefix: prefix of keys, that mark cancelled tasks
+        :param cancelled_ex_time: lifetime (in seconds) of the marks of cancelled tasks
+        :param max_result_size: maximum size (in bytes) of the packed result. There is no limit, if it's None
+        :param compression_threshold: results of this size (in bytes) and larger are compressed. Results aren't
+        compressed, if it's None
+        :param compression_level: zlib level of compression (1 - the fastest, 9 - the smallest)
+        :param stream_prefix: prefix of the lists of the items of the streamed calls
+        :param stream_ex_time: lifetime (in seconds) of the list of the stream after its last item and maximum time
+        (in seconds), that worker waits for the caller to take items of the full list
+        :param stream_check_interval: interval (in seconds) of checks of the full list of the stream
+        :param kwargs: params of RedisAsyncResultBackend (result_ex_time - default lifetime of the results in seconds,
+        keep_results - if False, result is removed, when it's read)
+        """
+        super().__init__(redis_url=redis_url, **kwargs)
+        self._serializer = serializer
+        self._channel_prefix = channel_prefix
+        self._fallback_check_interval = fallback_check_interval
+        self._cancelled_prefix = cancelled_prefix
+        self._cancelled_ex_time = cancelled_ex_time
+        self._max_result_size = max_result_size
+        self._compression_threshold = compression_threshold
+        self._compression_level = compression_level
+        self._stream_prefix = stream_prefix
+        self._stream_ex_time = stream_ex_time
+        self._stream_check_interval = stream_check_interval
+
+        self._result_waiters: Dict[str, List[asyncio.Future]] = {}
+        self._pubsub: PubSub | None = None
+        self._listener_task: asyncio.Task | None = None
+        self._listener_lock = asyncio.Lock()
+        self._subscribed = asyncio.Event()
+
+    async def shutdown(self) -> None:
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            self._listener_task = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        self._subscribed.clear()
+        await super().shutdown()
+
+    async def _pack_result(self, result: TaskiqResult) -> bytes:
+        """Packs the result. Result is compressed, if it's large. Too large result is replaced with error"""
+        value = self._serializer.dump_result(result)
+
+        max_size = result.labels.get(RESULT_MAX_SIZE_LABEL, self._max_result_size)
+        if max_size is not None and len(value) > int(max_size):
+            RESULTS_REJECTED.inc()
+            value = self._serializer.dump_result(
+                TaskiqResult(
+                    is_err=True,
+                    return_value=None,
+                    execution_time=result.execution_time,
+                    labels=result.labels,
+                    error=ResultIsTooLargeError(f"Result has {len(value)} bytes, maximum size is {max_size} bytes")
+                )
+            )
+
+        if self._compression_threshold is not None and len(value) >= self._compression_threshold:
+            if len(value) >= THREAD_CODING_SIZE:
+                compressed_value = await asyncio.to_thread(zlib.compress, value, self._compression_level)
+            else:
+                compressed_value = zlib.compress(value, self._compression_level)
+            if len(compressed_value) + len(COMPRESSED_MARK) < len(value):
+                RESULT_SIZE_BYTES.labels("true").observe(len(compressed_value) + len(COMPRESSED_MARK))
+                return COMPRESSED_MARK + compressed_value
+
+        RESULT_SIZE_BYTES.labels("false").observe(len(value))
+        return value
+
+    async def _unpack_result(self, value: bytes) -> TaskiqResult:
+        if value.startswith(COMPRESSED_MARK):
+            value = memoryview(value)[len(COMPRESSED_MARK):]
+            if len(value) >= THREAD_CODING_SIZE:
+                value = await asyncio.to_thread(zlib.decompress, value)
+            else:
+                value = zlib.decompress(value)
+        return self._serializer.load_result(value)
+
+    async def set_result(self, task_id: str, result: TaskiqResult) -> None:
+        result.labels[STORED_AT_LABEL] = str(time.time())
+        redis_set_params: Dict[str, Union[str, bytes, int]] = {
+            "name": task_id,
+            "value": await self._pack_result(result),
+        }
+        if result.labels.get(RESULT_TTL_LABEL) is not None:
+            redis_set_params["ex"] = max(int(float(result.labels[RESULT_TTL_LABEL])), 1)
+        elif self.result_ex_time:
+            redis_set_params["ex"] = self.result_ex_time
+        elif self.result_px_time:
+            redis_set_params["px"] = self.result_px_time
+
+        async with Redis(connection_pool=self.redis_pool) as redis:
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.set(**redis_set_params)
+                pipe.publish(self._channel_prefix + task_id, b"")
+                await pipe.execute()
+
+    async def get_result(self, task_id: str, with_logs: bool = False) -> TaskiqResult:
+        async with Redis(connection_pool=self.redis_pool) as redis:
+            if self.keep_results:
+                result_value = await redis.get(name=task_id)
+            else:
+                result_value = await redis.getdel(name=task_id)
+
+        if result_value is None:
+            raise ResultIsMissingError
+
+        taskiq_result = await self._unpack_result(result_value)
+        if not with_logs:
+            taskiq_result.log = None
+        return taskiq_result
+
+    async def cancel(self, task_id: str) -> None:
+        """Marks the task as cancelled and removes its result, if it's already stored"""
+        async with Redis(connection_pool=self.redis_pool) as redis:
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.set(self._cancelled_prefix + task_id, b"", ex=self._cancelled_ex_time)
+                pipe.delete(task_id)
+                await pipe.execute()
+
+    async def push_stream_item(self, task_id: str, item: Any, max_buffered: int | None = None) -> bool:
+        """
+        Appends the item to the list of the stream. Waits, while the list has max_buffered items (caller is slower than
+        the task), so memory of Redis is bounded. If caller takes no items for stream_ex_time seconds (it died without
+        marking the call as cancelled), the list is removed and the stream is given up.
+
+        :param task_id: id of the streamed call
+        :param item: item of the stream, it's packed by the serializer
+        :param max_buffered: maximum amount of items in the list. There is no limit, if it's None
+        :return: False, if caller gave up the stream (item isn't appended), True otherwise
+        """
+        key = self._stream_prefix + task_id
+        value = self._serializer.dumpb(item)
+        async with Redis(connection_pool=self.redis_pool) as redis:
+            waiting_since = None
+            while True:
+                async with redis.pipeline(transaction=False) as pipe:
+                    pipe.exists(self._cancelled_prefix + task_id)
+                    pipe.llen(key)
+                    is_cancelled, buffered = await pipe.execute()
+                if is_cancelled:
+                    return False
+                # Checked before the length: the list, that expired while the worker waited, isn't refilled
+                if waiting_since is not None and time.monotonic() - waiting_since >= self._stream_ex_time:
+                    await redis.delete(key)
+                    return False
+                if max_buffered is None or buffered < max_buffered:
+                    break
+                if waiting_since is None:
+                    waiting_since = time.monotonic()
+                    await redis.expire(key, self._stream_ex_time)  # List doesn't expire before the wait is over
+                await asyncio.sleep(self._stream_check_interval)
+
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.rpush(key, value)
+                pipe.expire(key, self._stream_ex_time)
+                await pipe.execute()
+        return True
+
+    async def pop_stream_item(self, task_id: str, timeout: float | None = None) -> Any:
+        """
+        Takes the next item of the stream from its list.
+
+        :param task_id: id of the streamed call
+        :param timeout: maximum time (in seconds) to wait for the item. Waits forever if it\'s None
+        :raises TaskiqResultTimeoutError: if timeout is exceeded
+        """
+        if timeout is not None and timeout <= 0:
+            raise TaskiqResultTimeoutError
+        async with Redis(connection_pool=self.redis_pool) as redis:
+            popped = await redis.blpop([self._stream_prefix + task_id], timeout=0 if timeout is None else timeout)
+        if popped is None:
+            raise TaskiqResultTimeoutError
+        return self._serializer.loadb(popped[1])
+
+    async def close_stream(self, task_id: str) -> None:
+        """Removes items of the stream, that weren't taken"""
+        async with Redis(connection_pool=self.redis_pool) as redis:
+            await redis.delete(self._stream_prefix + task_id)
+
+    async def update_memory_metric(self) -> None:
+        """Updates gauge agents_result_backend_memory_bytes with memory, used by Redis of result backend"""
+        async with Redis(connection_pool=self.redis_pool) as redis:
+            memory_info = await redis.info("memory")
+        RESULT_BACKEND_MEMORY_BYTES.set(memory_info["used_memory"])
+
+    async def is_cancelled(self, task_id: str) -> bool:
+        """Checks if the caller of the task gave up waiting for its result"""
+        async with Redis(connection_pool=self.redis_pool) as redis:
+            return bool(await redis.exists(self._cancelled_prefix + task_id))
+
+    async def _ensure_listener(self):
+        """Starts shared subscription to the results channels, if it's not started yet"""
+        async with self._listener_lock:
+            if self._listener_task is None or self._listener_task.done():
+                self._subscribed.clear()
+                self._pubsub = Redis(connection_pool=self.redis_pool).pubsub()
+                await self._pubsub.psubscribe(self._channel_prefix + "*")
+                self._listener_task = asyncio.create_task(self._listen(self._pubsub))
+        try:
+            await asyncio.wait_for(self._subscribed.wait(), self._fallback_check_interval)
+        except asyncio.TimeoutError:
+            pass  # Results will be checked with fallback interval
+
+    async def _listen(self, pubsub: PubSub):
+        """Wakes up waiters of the results, that were stored"""
+        async for message in pubsub.listen():
+            if message["type"] == "psubscribe":
+                self._subscribed.set()
+            elif message["type"] == "pmessage":
+                task_id = message["channel"].decode()[len(self._channel_prefix):]
+                for waiter in self._result_waiters.pop(task_id, []):
+                    if not waiter.done():
+                        waiter.set_result(None)
+
+    def _remove_waiter(self, task_id: str, waiter: asyncio.Future):
+        waiters = self._result_waiters.get(task_id)
+        if waiters is not None and waiter in waiters:
+            waiters.remove(waiter)
+            if not waiters:
+                self._result_waiters.pop(task_id)
+
+    async def wait_result(self, task_id: str, timeout: float | None = None, with_logs: bool = False) -> TaskiqResult:
+        """
+        Waits for the result of the task without polling.
+
+        :param task_id: id of the task
+        :param timeout: maximum time (in seconds) to wait for. Waits forever if it\'s None
+        :param with_logs: if True, logs of the task are returned too
+        :raises TaskiqResultTimeoutError: if timeout is exceeded
+        """
+        waiter = asyncio.get_running_loop().create_future()
+        self._result_waiters.setdefault(task_id, []).append(waiter)
+        start_time = time.monotonic()
+        try:
+            await self._ensure_listener()
+            while not await self.is_result_ready(task_id):
+                wait_time = self._fallback_check_interval
+                if timeout is not None:
+                    time_left = timeout - (time.monotonic() - start_time)
+                    if time_left <= 0:
+                        raise TaskiqResultTimeoutError
+                    wait_time = min(wait_time, time_left)
+                try:
+                    await asyncio.wait_for(asyncio.shield(waiter), wait_time)
+                    break
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._remove_waiter(task_id, waiter)
+
+        return await self.get_result(task_id, with_logs=with_logs)
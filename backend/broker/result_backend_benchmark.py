@@ -0,0 +1,79 @@
+"""
+Benchmark of result delivery: polling RedisAsyncResultBackend vs push-based AgentsResultBackend.
+
+Emulates broker hops: "worker" stores result after random execution time, caller waits for it. Hop latency is the time
+between the moment, when the result was stored, and the moment, when the caller got it.
+Requires Redis (sudo docker run --name redis-broker -p 6379:6379 -d redis). Run from the directory of the project:
+
+    python -m backend.broker.result_backend_benchmark
+"""
+import asyncio
+import random
+import time
+import uuid
+
+import numpy as np
+from taskiq import TaskiqResult
+from taskiq.task import AsyncTaskiqTask
+from taskiq_redis import RedisAsyncResultBackend
+
+from backend.broker.payload_serializer import NDArraySerializer
+from backend.broker.result_backend import AgentsResultBackend
+
+REDIS_URL = "redis://localhost:6379"
+HOPS_AMOUNT = 2000
+CONCURRENCY = 100
+MAX_EXECUTION_TIME = 0.05  # seconds
+
+
+async def _hop(result_backend, wait_result):
+    task_id = uuid.uuid4().hex
+    stored_at = {}
+
+    async def worker():
+        await asyncio.sleep(random.uniform(0, MAX_EXECUTION_TIME))
+        stored_at["time"] = time.perf_counter()
+        await result_backend.set_result(
+            task_id, TaskiqResult(is_err=False, return_value={"task_id": task_id}, execution_time=0.0)
+        )
+
+    worker_task = asyncio.create_task(worker())
+    await wait_result(task_id)
+    received_at = time.perf_counter()
+    await worker_task
+    return received_at - stored_at["time"]
+
+
+async def _run(name, result_backend, wait_result):
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def limited_hop():
+        async with semaphore:
+            return await _hop(result_backend, wait_result)
+
+    start_time = time.perf_counter()
+    latencies = np.asarray(await asyncio.gather(*[limited_hop() for _ in range(HOPS_AMOUNT)])) * 1000
+    total_time = time.perf_counter() - start_time
+    print(
+        f"{name:>10}: p50 {np.percentile(latencies, 50):8.2f} ms, p99 {np.percentile(latencies, 99):8.2f} ms, "
+        f"max {latencies.max():8.2f} ms, {HOPS_AMOUNT / total_time:8.1f} hops/s"
+    )
+
+
+async def main():
+    polling_backend = RedisAsyncResultBackend(redis_url=REDIS_URL, result_ex_time=60)
+    push_backend = AgentsResultBackend(redis_url=REDIS_URL, serializer=NDArraySerializer(), result_ex_time=60)
+
+    await _run(
+        "polling",
+        polling_backend,
+        lambda task_id: AsyncTaskiqTask(task_id, polling_backend).wait_result()
+    )
+    await _run("push", push_backend, push_backend.wait_result)
+
+    await polling_backend.shutdown()
+    await push_backend.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+"""
+Checks of the memory bounds of AgentsResultBackend: lifetime of the results, removal of the read results, size limit
+and compression of large results.
+Requires Redis (sudo docker run --name redis-broker -p 6379:6379 -d redis). Run from the directory of the project:
+
+    python -m backend.broker.result_backend_test
+"""
+import asyncio
+import uuid
+
+import numpy as np
+from redis.asyncio import Redis
+from taskiq import TaskiqResult
+from taskiq.exceptions import TaskiqResultTimeoutError
+
+from backend.broker.payload_serializer import NDArraySerializer
+from backend.broker.result_backend import (
+    AgentsResultBackend, COMPRESSED_MARK, RESULT_MAX_SIZE_LABEL, RESULT_TTL_LABEL, ResultIsTooLargeError
+)
+
+REDIS_URL = "redis://localhost:6379"
+
+
+def task_result(return_value, **labels) -> TaskiqResult:
+    return TaskiqResult(is_err=False, return_value=return_value, execution_time=0.0, labels=labels)
+
+
+if __name__ == '__main__':
+
+    async def test():
+        result_backend = AgentsResultBackend(
+            redis_url=REDIS_URL,
+            serializer=NDArraySerializer(),
+            keep_results=False,
+            result_ex_time=600,
+            max_result_size=1 << 20,
+            compression_threshold=1024
+        )
+        await result_backend.startup()
+        redis = Redis.from_url(REDIS_URL)
+
+        def new_task_id():
+            return f"result_backend_test:{uuid.uuid4().hex}"
+
+        # Small result isn't compressed, result expires after result_ex_time or label result_ttl, read result is
+        # removed
+        small_id, ttl_id = new_task_id(), new_task_id()
+        await result_backend.set_result(small_id, task_result({"a": 1}))
+        await result_backend.set_result(ttl_id, task_result({"a": 2}, **{RESULT_TTL_LABEL: "30"}))
+        assert not (await redis.get(small_id)).startswith(COMPRESSED_MARK)
+        assert 590 < await redis.ttl(small_id) <= 600, await redis.ttl(small_id)
+        assert 20 < await redis.ttl(ttl_id) <= 30, await redis.ttl(ttl_id)
+        assert (await result_backend.get_result(small_id)).return_value == {"a": 1}
+        assert not await redis.exists(small_id)
+        print("Lifetime of the results is fine")
+
+        # Large result is compressed, incompressible one is stored as it is
+        zeros_id, random_id = new_task_id(), new_task_id()
+        await result_backend.set_result(zeros_id, task_result(np.zeros(100000, dtype=np.float32)))
+        await result_backend.set_result(random_id, task_result(np.random.bytes(100000)))
+        stored_zeros = await redis.get(zeros_id)
+        assert stored_zeros.startswith(COMPRESSED_MARK) and len(stored_zeros) < 100000, len(stored_zeros)
+        assert not (await redis.get(random_id)).startswith(COMPRESSED_MARK)
+        zeros = (await result_backend.get_result(zeros_id)).return_value
+        assert zeros.dtype == np.float32 and zeros.shape == (100000,) and not zeros.any(), zeros
+        assert len((await result_backend.get_result(random_id)).return_value) == 100000
+        print("Compression is fine")
+
+        # Too large result is replaced with the error, label result_max_size raises the limit of the task
+        huge_id, allowed_id = new_task_id(), new_task_id()
+        huge_value = np.random.rand(200000)
+        await result_backend.set_result(huge_id, task_result(huge_value))
+        await result_backend.set_result(allowed_id, task_result(huge_value, **{RESULT_MAX_SIZE_LABEL: str(8 << 20)}))
+        huge_result = await result_backend.get_result(huge_id)
+        assert huge_result.is_err and huge_result.return_value is None, huge_result
+        assert isinstance(huge_result.error, ResultIsTooLargeError), huge_result.error
+        assert np.array_equal((await result_backend.get_result(allowed_id)).return_value, huge_value)
+        print("Size limit is fine")
+
+        # Waiter is woken up by the notification, cancelled task has no result
+        waited_id, cancelled_id = new_task_id(), new_task_id()
+        waiter = asyncio.create_task(result_backend.wait_result(waited_id, timeout=2))
+        await asyncio.sleep(0.1)
+        await result_backend.set_result(waited_id, task_result([1, 2]))
+        assert (await waiter).return_value == [1, 2]
+        await result_backend.set_result(cancelled_id, task_result([3]))
+        await result_backend.cancel(cancelled_id)
+        assert await result_backend.is_cancelled(cancelled_id)
+        try:
+            await result_backend.wait_result(cancelled_id, timeout=0.2)
+            assert False, "TaskiqResultTimeoutError isn't raised"
+        except TaskiqResultTimeoutError:
+            pass
+        print("Waiting and cancellation are fine")
+
+        await redis.aclose()
+        await result_backend.shutdown()
+
+    asyncio.run(test())
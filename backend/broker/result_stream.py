@@ -0,0 +1,86 @@
+"""
+Streaming of agents calls.
+
+Task is streamed, if its function is an async generator:
+
+    @BROKER.task(queue="default", stream_buffer=4)
+    async def landmarks_by_region_stream_task(json_params):
+        async for chunk in CRUD_AGENT.stream_landmarks_by_region(json_params):
+            yield chunk
+
+Caller iterates over AbstractAgentsBroker.stream_agent_task and gets the items as soon as they are yielded, so the whole
+result is never kept in memory. Items of the local agent are taken from the generator directly. Other calls are kicked
+to the stream task "<task name>:stream", that is registered by the broker together with the task. Worker pushes items
+to the Redis list of the call (check AgentsResultBackend.push_stream_item), caller pops them from the list. Worker
+waits, while the list has stream_buffer items, so slow caller holds the worker back instead of filling Redis.
+
+Deadline of the call bounds the whole stream. Caller, that stopped iteration before the end of the stream, marks the
+call as cancelled, so worker stops the generator.
+"""
+from typing import Any, Dict
+
+STREAM_BUFFER_LABEL = "stream_buffer"  # Maximum amount of items, that wait for the caller in Redis
+STREAM_TASK_SUFFIX = ":stream"
+STREAM_KWARG = "stream_id"  # Keyword argument of the stream task with id of the list of the stream
+
+DEFAULT_STREAM_BUFFER = 8
+
+
+class AgentStreamError(Exception):
+    """Generator of the streamed task failed on the worker"""
+
+
+def stream_task_name(task_name: str) -> str:
+    return f"{task_name}{STREAM_TASK_SUFFIX}"
+
+
+def stream_buffer(labels: Dict) -> int:
+    return int(labels.get(STREAM_BUFFER_LABEL, DEFAULT_STREAM_BUFFER))
+
+
+def item_message(item: Any) -> Dict:
+    return {"item": item}
+
+
+def end_message(items_amount: int) -> Dict:
+    return {"end": items_amount}
+
+
+def error_message(ex: BaseException) -> Dict:
+    return {"error": repr(ex)}
+
+
+async def produce_stream(agent_task, json_params: Any, stream_id: str, result_backend, max_buffered: int) -> int:
+    """
+    Worker side of the stream. Pushes items of the task generator to the list of the stream.
+
+    :return: amount of pushed items
+    """
+    items_amount = 0
+    items = agent_task.original_func(json_params)
+    try:
+        async for item in items:
+            if not await result_backend.push_stream_item(stream_id, item_message(item), max_buffered):
+                return items_amount  # Caller gave up the stream
+            items_amount += 1
+    except Exception as ex:
+        await result_backend.push_stream_item(stream_id, error_message(ex))
+        raise
+    finally:
+        await items.aclose()
+    await result_backend.push_stream_item(stream_id, end_message(items_amount))
+    return items_amount
+
+
+def item_of_message(message: Dict) -> Any:
+    """
+    Returns item of the message of the stream.
+
+    :raises StopAsyncIteration: if it\'s the end of the stream
+    :raises AgentStreamError: if generator failed on the worker
+    """
+    if "error" in message:
+        raise AgentStreamError(message["error"])
+    if "end" in message:
+        raise StopAsyncIteration
+    return message["item"]
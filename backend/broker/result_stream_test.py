@@ -0,0 +1,108 @@
+"""
+Checks of the streamed calls (AbstractAgentsBroker.stream_agent_task) through Redis and of the backpressure of the
+stream list. Worker is run in this process.
+Requires Redis (sudo docker run --name redis-broker -p 6379:6379 -d redis). Run from the directory of the project:
+
+    python -m backend.broker.result_stream_test
+"""
+import asyncio
+import time
+import uuid
+
+from redis.asyncio import Redis
+from taskiq.receiver import Receiver
+
+from backend.broker.agents_broker import AgentsBroker
+from backend.broker.deadline import DeadlineMiddleware
+from backend.broker.payload_serializer import NDArraySerializer
+from backend.broker.result_backend import AgentsResultBackend
+from backend.broker.result_stream import AgentStreamError
+
+REDIS_URL = "redis://localhost:6379"
+
+
+if __name__ == '__main__':
+
+    async def test():
+        serializer = NDArraySerializer()
+        result_backend = AgentsResultBackend(
+            redis_url=REDIS_URL, serializer=serializer, keep_results=False, result_ex_time=600
+        )
+        broker = AgentsBroker(
+            url=REDIS_URL, queue_name=f"stream_test_{uuid.uuid4().hex}", call_timeout=10
+        ).with_serializer(serializer).with_result_backend(result_backend)
+        broker.add_middlewares(DeadlineMiddleware())
+        produced = []
+
+        @broker.task(stream_buffer=2)
+        async def numbers_stream_task(json_params):
+            for i in range(json_params["amount"]):
+                produced.append(i)
+                if i == json_params.get("fail_at"):
+                    raise ValueError("generator failed")
+                yield [i] * 3
+
+        await broker.startup()
+        worker = asyncio.create_task(Receiver(broker, run_starup=False).listen())
+        redis = Redis.from_url(REDIS_URL)
+
+        # Items come in order, error of the generator is raised by the caller
+        items = [item async for item in AgentsBroker.stream_agent_task(numbers_stream_task, {"amount": 5})]
+        assert items == [[i] * 3 for i in range(5)], items
+        items = []
+        try:
+            async for item in AgentsBroker.stream_agent_task(numbers_stream_task, {"amount": 5, "fail_at": 2}):
+                items.append(item)
+            assert False, "AgentStreamError isn't raised"
+        except AgentStreamError as ex:
+            assert "generator failed" in str(ex), ex
+        assert items == [[0] * 3, [1] * 3], items
+        try:
+            await AgentsBroker.call_agent_task(numbers_stream_task, {"amount": 1})
+            assert False, "TypeError isn't raised"
+        except TypeError:
+            pass
+        print("Streams are fine")
+
+        # Slow caller holds the worker back, caller, that stopped iteration, stops the generator
+        produced.clear()
+        stream = AgentsBroker.stream_agent_task(numbers_stream_task, {"amount": 100})
+        assert await stream.__anext__() == [0, 0, 0]
+        await asyncio.sleep(0.5)
+        assert len(produced) <= 4, produced  # Taken item, stream_buffer items in the list, item waiting to be pushed
+        await stream.aclose()
+        await asyncio.sleep(0.5)
+        assert len(produced) <= 4, produced
+        assert not await redis.keys("agents_streams:*"), await redis.keys("agents_streams:*")
+        print("Backpressure is fine")
+
+        # Caller died without marking the call as cancelled: worker gives up the full list after stream_ex_time
+        stalled_backend = AgentsResultBackend(redis_url=REDIS_URL, serializer=serializer, stream_ex_time=1)
+        await stalled_backend.startup()
+        stream_id = uuid.uuid4().hex
+        assert await stalled_backend.push_stream_item(stream_id, {"item": 1}, max_buffered=1)
+        started_at = time.monotonic()
+        assert not await stalled_backend.push_stream_item(stream_id, {"item": 2}, max_buffered=1)
+        assert 1 <= time.monotonic() - started_at < 3, time.monotonic() - started_at
+        assert not await redis.exists("agents_streams:" + stream_id)
+        # Caller, that takes items, isn't given up
+        assert await stalled_backend.push_stream_item(stream_id, {"item": 1}, max_buffered=1)
+        push = asyncio.create_task(stalled_backend.push_stream_item(stream_id, {"item": 2}, max_buffered=1))
+        await asyncio.sleep(0.5)
+        assert await stalled_backend.pop_stream_item(stream_id, timeout=1) == {"item": 1}
+        assert await push
+        assert await stalled_backend.pop_stream_item(stream_id, timeout=1) == {"item": 2}
+        await stalled_backend.shutdown()
+        print("Stalled stream is given up")
+
+        # Local agent streams its generator directly
+        broker.is_worker_process = True
+        items = [item async for item in AgentsBroker.stream_agent_task(numbers_stream_task, {"amount": 3})]
+        assert items == [[i] * 3 for i in range(3)], items
+        print("Local stream is fine")
+
+        worker.cancel()
+        await redis.aclose()
+        await broker.shutdown()
+
+    asyncio.run(test())
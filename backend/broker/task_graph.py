@@ -0,0 +1,148 @@
+"""
+Graphs of tasks, that are executed on the workers.
+
+Graph is a list of steps (tasks) in order of execution. Params of the step can contain outputs of the previous steps,
+result of the graph is the output of the last step. Caller kicks only the first step, state of the graph (remaining
+steps and required outputs) is sent with the step. Worker, that executed the step, executes next steps itself, if their
+agents are located in its process, and kicks the first step, that isn't, with the same task_id. Only the result of the
+last step is stored in result backend.
+
+Usage:
+    graph = TaskGraph()
+    main_points = graph.add(get_optimized_route_main_points_task, start_end_points)
+    route_params = graph.add(route_recommendations_params_task, {"pre_route": main_points, "user_login": login})
+    ...
+    result = await AbstractAgentsBroker.call_task_graph(graph)
+"""
+from contextvars import ContextVar
+from typing import Any, Dict, List
+
+from taskiq import TaskiqMessage, TaskiqMiddleware, TaskiqResult
+from taskiq.exceptions import NoResultError
+
+GRAPH_KWARG = "__task_graph__"  # Keyword argument of the message, that contains state of the graph
+
+
+class TaskGraphNode:
+    """Reference to the output of the step of the graph. Use it in params of the next steps"""
+
+    def __init__(self, index: int):
+        self.index = index
+
+
+class TaskGraph:
+    """Graph of the tasks, check the module docstring"""
+
+    def __init__(self):
+        self._steps: List[Dict] = []
+        self.broker = None
+
+    def add(self, agent_task, json_params: Any) -> TaskGraphNode:
+        """
+        Adds the step to the graph.
+
+        :param agent_task: task of the step (check broker/agents_tasks/...)
+        :param json_params: params of the task. It can be TaskGraphNode (output of the step is used as params) or Dict,
+        whose values can be TaskGraphNode (output of the step is put to the key)
+        :return: reference to the output of the step
+        """
+        step = {"task": agent_task.task_name, "labels": dict(agent_task.labels), "params": None, "inputs": {}}
+        if isinstance(json_params, TaskGraphNode):
+            step["input"] = self._checked_index(json_params)
+        else:
+            step["input"] = None
+            if isinstance(json_params, dict):
+                step["params"] = {}
+                for key, value in json_params.items():
+                    if isinstance(value, TaskGraphNode):
+                        step["inputs"][key] = self._checked_index(value)
+                    else:
+                        step["params"][key] = value
+            else:
+                step["params"] = json_params
+
+        if self.broker is None:
+            self.broker = agent_task.broker
+        self._steps.append(step)
+        return TaskGraphNode(len(self._steps) - 1)
+
+    def _checked_index(self, node: TaskGraphNode) -> int:
+        if not 0 <= node.index < len(self._steps):
+            raise ValueError("Step can use only outputs of the previous steps of the same graph")
+        return node.index
+
+    @property
+    def last_task_name(self) -> str:
+        return self._steps[-1]["task"]
+
+    def state(self) -> Dict:
+        """Returns state of the graph before execution of the first step"""
+        if not self._steps:
+            raise ValueError("Graph has no steps")
+        return {"steps": self._steps, "position": 0, "outputs": {}}
+
+
+def step_params(state: Dict) -> Any:
+    """Returns params of the current step of the graph"""
+    step = state["steps"][state["position"]]
+    if step["input"] is not None:
+        return state["outputs"][step["input"]]
+    if not step["inputs"]:
+        return step["params"]
+    params = dict(step["params"])
+    for key, index in step["inputs"].items():
+        params[key] = state["outputs"][index]
+    return params
+
+
+def complete_step(state: Dict, output: Any):
+    """Saves output of the current step and moves the graph to the next step. Unused outputs are removed"""
+    position = state["position"]
+    state["outputs"][position] = output
+    state["position"] = position + 1
+
+    required_outputs = set()
+    for step in state["steps"][position + 1:]:
+        if step["input"] is not None:
+            required_outputs.add(step["input"])
+        required_outputs.update(step["inputs"].values())
+    state["outputs"] = {index: value for index, value in state["outputs"].items() if index in required_outputs}
+
+
+def is_last_step(state: Dict) -> bool:
+    return state["position"] == len(state["steps"]) - 1
+
+
+_current_graph: ContextVar[Dict | None] = ContextVar("agents_task_graph", default=None)
+
+
+class TaskGraphMiddleware(TaskiqMiddleware):
+    """
+    Worker side of task graphs. After the step is executed, graph is continued with the same task_id, result of the
+    step isn\'t stored, if it\'s not the last step. Add it after DeadlineMiddleware, so cancelled graph isn\'t continued.
+    """
+
+    def pre_execute(self, message: TaskiqMessage) -> TaskiqMessage:
+        _current_graph.set(message.kwargs.pop(GRAPH_KWARG, None))
+        return message
+
+    async def post_execute(self, message: TaskiqMessage, result: TaskiqResult) -> None:
+        state = _current_graph.get()
+        if state is None or result.is_err or isinstance(result.error, NoResultError) or is_last_step(state):
+            return
+
+        complete_step(state, result.return_value)
+        try:
+            graph_result = await self.broker.continue_task_graph(state, message.task_id, message.labels)
+        except Exception as ex:
+            result.is_err = True
+            result.return_value = None
+            result.error = ex
+            return
+
+        if graph_result is None:
+            result.error = NoResultError()  # Graph is continued by another worker
+        else:
+            result.is_err = graph_result.is_err
+            result.return_value = graph_result.return_value
+            result.error = graph_result.error
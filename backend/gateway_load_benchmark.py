@@ -0,0 +1,380 @@
+"""
+Load test of the gateway (RequestAgent of main.py) without Neo4j, Redis, ORS and TensorFlow.
+
+Agents are replaced with stubs: tasks with the same names and labels, that return generated landmarks, sectors and
+routes after configurable latency (STUB_LATENCIES). Stub tasks are registered in BROKER of the gateway and of the worker
+process, that is started by the benchmark, so calls go the usual path gateway -> Redis queues -> worker -> result
+backend (coalescing, deadlines, graphs of tasks, slots of the queues). Redis of the broker (redis://localhost:6379,
+check broker_initializer.py) must be running. Steps of the route graph, that don't call agents
+(route_builder_steps_tasks), are the real ones.
+
+Virtual users send requests of REQUEST_MIX (weights are shares of the requests) to the application in this process
+during the test and the report contains RPS and latency percentiles per endpoint, rejected requests (503) and errors.
+Run from the directory of the project:
+
+    python -m backend.gateway_load_benchmark --users 64 --duration 20 --latency-scale 1.0
+
+With --in-process stub tasks are executed in the process of the gateway (local calls, Redis isn't required), so the
+report excludes queueing and the transfer of the messages and results through Redis.
+"""
+import argparse
+import asyncio
+import hashlib
+import random
+import subprocess
+import sys
+import time
+import types
+from collections import defaultdict
+from typing import Dict, List
+
+import numpy as np
+
+from backend.broker.broker_initializer import BROKER
+
+TILES_REDIS_URL = "redis://localhost:6379"
+WORKER_READY_LINE = "gateway_load_benchmark worker is ready"
+
+# Mean latency (in seconds) of the stub agents, real latency of the call is uniform in [0.5, 1.5] of the mean
+STUB_LATENCIES = {
+    "get_landmarks_in_sector_task": 0.02,
+    "get_map_sectors_names_in_sector_task": 0.005,
+    "landmarks_in_map_sectors_task": 0.01,
+    "get_optimized_route_main_points_task": 0.05,
+    "find_recommendations_for_coordinates_task": 0.08,
+    "get_optimized_route_task": 0.05
+}
+MAP_SECTOR_SIZE = 0.05  # degrees
+LANDMARKS_IN_MAP_SECTOR = 40
+AREA = {"min_lat": 53.80, "max_lat": 54.00, "min_lng": 27.40, "max_lng": 27.70}
+NAME_WORDS = ("озеро", "усадьба", "костёл", "парк", "памятник", "заказник", "церковь", "замок", "музей", "сквер")
+
+
+def _seeded_random(*values) -> random.Random:
+    """Stub results depend only on params, so equal requests get equal responses (ETag of the tiles is stable)"""
+    return random.Random(hashlib.sha256(repr(values).encode()).digest())
+
+
+def _map_sector_name(lat_index: int, lng_index: int) -> str:
+    return f"sector_{lat_index}_{lng_index}"
+
+
+def _map_sectors_names(json_params: Dict) -> List[str]:
+    top_left, bottom_right = json_params["TL"], json_params["BR"]
+    lat_indexes = range(
+        int(bottom_right["latitude"] // MAP_SECTOR_SIZE), int(top_left["latitude"] // MAP_SECTOR_SIZE) + 1
+    )
+    lng_indexes = range(
+        int(top_left["longitude"] // MAP_SECTOR_SIZE), int(bottom_right["longitude"] // MAP_SECTOR_SIZE) + 1
+    )
+    return [_map_sector_name(i, j) for i in lat_indexes for j in lng_indexes]
+
+
+def _landmarks_of_map_sector(map_sector_name: str) -> List[Dict]:
+    rand = _seeded_random(map_sector_name)
+    _, lat_index, lng_index = map_sector_name.split("_")
+    return [
+        {
+            "landmark": {
+                "name": " ".join(rand.choices(NAME_WORDS, k=rand.randint(1, 3))) + f" {map_sector_name} {i}",
+                "latitude": (int(lat_index) + rand.random()) * MAP_SECTOR_SIZE,
+                "longitude": (int(lng_index) + rand.random()) * MAP_SECTOR_SIZE
+            },
+            "categories_names": []
+        }
+        for i in range(LANDMARKS_IN_MAP_SECTOR)
+    ]
+
+
+def _route_between(coordinates: List[Dict], points_between: int) -> Dict:
+    route = []
+    for start, end in zip(coordinates, coordinates[1:]):
+        for step in range(points_between):
+            share = step / points_between
+            route.append(
+                {
+                    "latitude": start["latitude"] + (end["latitude"] - start["latitude"]) * share,
+                    "longitude": start["longitude"] + (end["longitude"] - start["longitude"]) * share
+                }
+            )
+    route.append(dict(coordinates[-1]))
+    return {"coordinates": route}
+
+
+async def _stub_latency(task_name: str, latency_scale: float):
+    await asyncio.sleep(STUB_LATENCIES[task_name] * latency_scale * random.uniform(0.5, 1.5))
+
+
+def install_stub_agents(latency_scale: float = 1.0, in_process: bool = True):
+    """
+    Registers stub tasks of the agents in BROKER and puts their modules to sys.modules instead of the real tasks
+    modules. Call it before import of backend.main.
+    :param latency_scale: multiplier of STUB_LATENCIES
+    :param in_process: if True, the process is marked as worker process, so stub tasks are executed in this process.
+    Otherwise they are kicked to Redis and executed by the worker process (check run_worker)
+    """
+    BROKER.is_worker_process = in_process
+
+    async def get_landmarks_in_sector_task(json_params: Dict):
+        await _stub_latency("get_landmarks_in_sector_task", latency_scale)
+        return [
+            landmark
+            for map_sector_name in _map_sectors_names(json_params)
+            for landmark in _landmarks_of_map_sector(map_sector_name)
+        ]
+
+    async def get_map_sectors_names_in_sector_task(json_params: Dict):
+        await _stub_latency("get_map_sectors_names_in_sector_task", latency_scale)
+        return _map_sectors_names(json_params)
+
+    async def landmarks_in_map_sectors_task(json_params: Dict):
+        await _stub_latency("landmarks_in_map_sectors_task", latency_scale)
+        return [
+            landmark
+            for map_sector_name in json_params["map_sectors_names"]
+            for landmark in _landmarks_of_map_sector(map_sector_name)
+        ]
+
+    async def get_optimized_route_main_points_task(landmark_list: Dict):
+        await _stub_latency("get_optimized_route_main_points_task", latency_scale)
+        return _route_between(landmark_list["coordinates"], 4)
+
+    async def find_recommendations_for_coordinates_task(json_params: Dict):
+        await _stub_latency("find_recommendations_for_coordinates_task", latency_scale)
+        rand = _seeded_random(json_params["coordinates_of_points"])
+        recommendations = []
+        for point in json_params["coordinates_of_points"][:json_params["maximum_amount_of_recommendations"]]:
+            recommendation = None
+            if rand.random() < 0.7:
+                recommendation = {
+                    "name": " ".join(rand.choices(NAME_WORDS, k=2)),
+                    "latitude": point["latitude"] + rand.uniform(-0.005, 0.005),
+                    "longitude": point["longitude"] + rand.uniform(-0.005, 0.005)
+                }
+            recommendations.append({"recommendation": recommendation})
+        return recommendations
+
+    async def get_optimized_route_task(landmark_list: Dict):
+        await _stub_latency("get_optimized_route_task", latency_scale)
+        return _route_between(landmark_list["coordinates"], 8)
+
+    stub_modules = {
+        "backend.broker.agents_tasks.landmarks_by_sectors_agent_tasks": [
+            (get_landmarks_in_sector_task, {"queue": "interactive", "result_ttl": 30}),
+            (get_map_sectors_names_in_sector_task, {"queue": "interactive", "result_ttl": 30})
+        ],
+        "backend.broker.agents_tasks.crud_agent_tasks": [
+            (landmarks_in_map_sectors_task, {"queue": "interactive"})
+        ],
+        "backend.broker.agents_tasks.route_generating_tasks": [
+            (get_optimized_route_main_points_task, {"queue": "routing"}),
+            (get_optimized_route_task, {"queue": "routing"})
+        ],
+        "backend.broker.agents_tasks.landmark_rec_agent_tasks": [
+            (find_recommendations_for_coordinates_task, {"queue": "recommendations"})
+        ]
+    }
+    for module_name, tasks in stub_modules.items():
+        module = types.ModuleType(module_name)
+        for func, labels in tasks:
+            setattr(
+                module,
+                func.__name__,
+                BROKER.register_task(func, task_name=f"{module_name}:{func.__name__}", **labels)
+            )
+        sys.modules[module_name] = module
+
+
+async def run_worker():
+    """Executes stub tasks, that are kicked by the gateway, until the process is terminated"""
+    from taskiq.receiver import Receiver
+    import backend.broker.agents_tasks.route_builder_steps_tasks  # noqa: F401 Steps of the route graph
+
+    await BROKER.startup()
+    print(WORKER_READY_LINE, flush=True)
+    await Receiver(BROKER, run_starup=False).listen()
+
+
+def start_worker(latency_scale: float) -> subprocess.Popen:
+    """Starts the worker process with stub tasks and waits until it listens to the queues"""
+    worker = subprocess.Popen(
+        [sys.executable, "-m", "backend.gateway_load_benchmark", "--worker", "--latency-scale", str(latency_scale)],
+        stdout=subprocess.PIPE,
+        text=True
+    )
+    for line in worker.stdout:
+        if line.strip() == WORKER_READY_LINE:
+            return worker
+    worker.wait()
+    raise RuntimeError(f"Worker of the stub tasks exited with code {worker.returncode}")
+
+
+def _random_bbox(rand: random.Random, size: float) -> str:
+    lat = rand.uniform(AREA["min_lat"] + size, AREA["max_lat"])
+    lng = rand.uniform(AREA["min_lng"], AREA["max_lng"] - size)
+    return f"tl_lat={lat:.5f}&tl_lng={lng:.5f}&br_lat={lat - size:.5f}&br_lng={lng + size:.5f}"
+
+
+def _random_point(rand: random.Random) -> str:
+    return f"{rand.uniform(AREA['min_lat'], AREA['max_lat']):.5f},{rand.uniform(AREA['min_lng'], AREA['max_lng']):.5f}"
+
+
+async def _sector_points(client, rand):
+    return await client.get(f"/api/v1/sector/points?{_random_bbox(rand, 0.08)}", headers={"Accept-Encoding": "gzip"})
+
+
+async def _sector_points_binary(client, rand):
+    return await client.get(
+        f"/api/v1/sector/points?{_random_bbox(rand, 0.08)}", headers={"Accept": "application/x-msgpack"}
+    )
+
+
+async def _sector_points_stream(client, rand):
+    return await client.get(
+        f"/api/v1/sector/points?{_random_bbox(rand, 0.08)}", headers={"Accept": "application/x-ndjson"}
+    )
+
+
+async def _sector_tiles(client, rand):
+    return await client.get(f"/api/v1/sector/tiles?{_random_bbox(rand, 0.15)}")
+
+
+async def _tile_points(client, rand):
+    lat_index = rand.randint(int(AREA["min_lat"] // MAP_SECTOR_SIZE), int(AREA["max_lat"] // MAP_SECTOR_SIZE))
+    lng_index = rand.randint(int(AREA["min_lng"] // MAP_SECTOR_SIZE), int(AREA["max_lng"] // MAP_SECTOR_SIZE))
+    return await client.get(
+        f"/api/v1/sector/tiles/{_map_sector_name(lat_index, lng_index)}/points", headers={"Accept-Encoding": "gzip"}
+    )
+
+
+async def _route(client, rand):
+    return await client.get(f"/api/v1/map/route?start={_random_point(rand)}&finish={_random_point(rand)}&catigories=")
+
+
+async def _route_stream(client, rand):
+    return await client.get(
+        f"/api/v1/map/route/stream?start={_random_point(rand)}&finish={_random_point(rand)}&catigories="
+    )
+
+
+async def _routes_batch(client, rand):
+    routes = [
+        {"start": _random_point(rand), "finish": _random_point(rand), "catigories": ""}
+        for _ in range(rand.randint(2, 6))
+    ]
+    return await client.post("/api/v1/map/routes", json={"routes": routes})
+
+
+async def _categories(client, rand):
+    return await client.get("/api/v1/map/categories")
+
+
+# Endpoint of the report: (weight, request)
+REQUEST_MIX = {
+    "sector_points": (30, _sector_points),
+    "sector_points_binary": (10, _sector_points_binary),
+    "sector_points_stream": (5, _sector_points_stream),
+    "sector_tiles": (15, _sector_tiles),
+    "tile_points": (20, _tile_points),
+    "route": (10, _route),
+    "route_stream": (5, _route_stream),
+    "routes_batch": (1, _routes_batch),
+    "categories": (4, _categories)
+}
+
+
+async def run_load(app, users: int, duration: float, seed: int = 0) -> Dict[str, Dict]:
+    """
+    Sends requests of REQUEST_MIX from the virtual users (every user sends the next request, when the previous one is
+    answered) during duration seconds.
+    :return: {endpoint: {"latencies": List[float] (seconds), "statuses": Dict[int, int]}}
+    """
+    endpoints = list(REQUEST_MIX)
+    weights = [REQUEST_MIX[endpoint][0] for endpoint in endpoints]
+    stats = defaultdict(lambda: {"latencies": [], "statuses": defaultdict(int)})
+    finish_time = time.perf_counter() + duration
+
+    async def user(user_index: int):
+        rand = random.Random(seed * 100003 + user_index)
+        client = app.test_client()
+        while time.perf_counter() < finish_time:
+            endpoint = rand.choices(endpoints, weights)[0]
+            start_time = time.perf_counter()
+            response = await REQUEST_MIX[endpoint][1](client, rand)
+            await response.get_data()
+            stats[endpoint]["latencies"].append(time.perf_counter() - start_time)
+            stats[endpoint]["statuses"][response.status_code] += 1
+
+    await asyncio.gather(*[user(user_index) for user_index in range(users)])
+    return stats
+
+
+def format_report(stats: Dict[str, Dict], duration: float) -> str:
+    lines = [
+        f"{'endpoint':>22} {'requests':>9} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} "
+        f"{'503':>6} {'errors':>6}"
+    ]
+    total = 0
+    for endpoint in REQUEST_MIX:
+        if endpoint not in stats:
+            continue
+        latencies = np.asarray(stats[endpoint]["latencies"]) * 1000
+        statuses = stats[endpoint]["statuses"]
+        rejected = statuses.get(503, 0)
+        errors = sum(amount for status, amount in statuses.items() if status >= 400 and status != 503)
+        total += len(latencies)
+        lines.append(
+            f"{endpoint:>22} {len(latencies):>9} {len(latencies) / duration:>8.1f} "
+            f"{np.percentile(latencies, 50):>9.2f} {np.percentile(latencies, 95):>9.2f} "
+            f"{np.percentile(latencies, 99):>9.2f} {latencies.max():>9.2f} {rejected:>6} {errors:>6}"
+        )
+    lines.append(f"{'total':>22} {total:>9} {total / duration:>8.1f}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test of the gateway with stub agents")
+    parser.add_argument("--users", type=int, default=64, help="amount of virtual users")
+    parser.add_argument("--duration", type=float, default=20.0, help="duration of the test in seconds")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="multiplier of latency of the stub agents")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the requests of the users")
+    parser.add_argument(
+        "--in-process", action="store_true", help="execute stub tasks in the gateway process (without Redis)"
+    )
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)  # Worker process of start_worker
+    args = parser.parse_args()
+
+    if args.worker:
+        install_stub_agents(args.latency_scale, in_process=True)
+        asyncio.run(run_worker())
+        return
+
+    install_stub_agents(args.latency_scale, in_process=args.in_process)
+    from quart import Quart
+    from backend.main import RequestAgent
+
+    app = Quart(__name__)
+    # Tiles have only ETag without Redis
+    RequestAgent(app, tiles_redis_url=None if args.in_process else TILES_REDIS_URL)
+    worker = None if args.in_process else start_worker(args.latency_scale)
+
+    async def run():
+        start_time = time.perf_counter()
+        stats = await run_load(app, args.users, args.duration, args.seed)
+        return stats, time.perf_counter() - start_time
+
+    try:
+        stats, duration = asyncio.run(run())
+    finally:
+        if worker is not None:
+            worker.terminate()
+            worker.wait()
+    if args.in_process:
+        print("Stub tasks were executed in the gateway process, queueing through Redis is excluded")
+    else:
+        print("Stub tasks were executed by the worker process through Redis")
+    print(format_report(stats, duration))
+
+
+if __name__ == "__main__":
+    main()
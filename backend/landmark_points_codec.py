@@ -0,0 +1,117 @@
+"""
+Encodings of the landmark points, that are sent to the map.
+
+JSON: {"points": [{"name": str, "lat": float, "lng": float, "type": str}, ...]}, "type" is the map category of the
+point (the same category, that binary encoding gives)
+
+Binary (content type application/x-msgpack) is a msgpack map with columns of the points:
+    {
+        "v": 1,                      # version of the encoding
+        "sector": str | None,        # name of the map sector (tile), if points belong to one map sector
+        "names": List[str],
+        "lat": bytes,                # int32 little-endian, degrees * COORDINATES_SCALE
+        "lng": bytes,                # int32 little-endian, degrees * COORDINATES_SCALE
+        "category_codes": bytes,     # uint8, index of the category of the point in "categories"
+        "categories": List[str]      # categories of the map (the first one is "none")
+    }
+Coordinates are stored with precision of 1e-6 degrees (~0.1 m). Benchmark: python -m backend.landmark_points_codec_benchmark
+"""
+from typing import Dict, List
+
+import msgpack
+import numpy as np
+
+from backend.db_categories import system_categories
+
+BINARY_MIMETYPE = "application/x-msgpack"
+BINARY_VERSION = 1
+COORDINATES_SCALE = 1_000_000
+
+NO_CATEGORY = "none"
+# Categories of the map, code of the category is its index
+MAP_CATEGORIES = [NO_CATEGORY] + list(dict.fromkeys(system_categories.values()))
+_MAP_CATEGORIES_CODES = {category: code for code, category in enumerate(MAP_CATEGORIES)}
+# Categories of knowledge base (in lower case) to codes of the map categories
+_KB_CATEGORIES_CODES = {
+    kb_category.lower(): _MAP_CATEGORIES_CODES[map_category] for kb_category, map_category in system_categories.items()
+}
+
+
+def landmarks_to_points(landmarks: List[Dict]) -> List[Dict]:
+    """
+    Converts landmarks of the sectors to points of the map.
+    :param landmarks: result of get_landmarks_in_sector_task or landmarks_in_map_sectors_task
+    """
+    points = list()
+    for i in landmarks:
+        if i['landmark']:
+            points.append(
+                {
+                    "name": i['landmark']['name'].capitalize(),
+                    "lat": i['landmark']['latitude'],
+                    "lng": i['landmark']['longitude'],
+                    "type": MAP_CATEGORIES[category_code_of_landmark(i)]
+                }
+            )
+    return points
+
+
+def category_code_of_landmark(landmark: Dict) -> int:
+    """Returns code of the map category of the landmark (the first known category of the landmark)"""
+    for category_name in landmark.get('categories_names') or []:
+        code = _KB_CATEGORIES_CODES.get(category_name.lower())
+        if code is not None:
+            return code
+    return _MAP_CATEGORIES_CODES[NO_CATEGORY]
+
+
+def encode_landmarks_binary(landmarks: List[Dict], sector: str | None = None) -> bytes:
+    """
+    Packs landmarks to the binary encoding (check the module docstring).
+    :param landmarks: result of get_landmarks_in_sector_task or landmarks_in_map_sectors_task
+    :param sector: name of the map sector of the landmarks
+    """
+    landmarks = [i for i in landmarks if i['landmark']]
+    coordinates = np.asarray(
+        [(i['landmark']['latitude'], i['landmark']['longitude']) for i in landmarks], dtype=np.float64
+    ).reshape(-1, 2)
+    coordinates = np.rint(coordinates * COORDINATES_SCALE).astype("<i4")
+    return msgpack.packb(
+        {
+            "v": BINARY_VERSION,
+            "sector": sector,
+            "names": [i['landmark']['name'].capitalize() for i in landmarks],
+            "lat": coordinates[:, 0].tobytes(),
+            "lng": coordinates[:, 1].tobytes(),
+            "category_codes": np.asarray(
+                [category_code_of_landmark(i) for i in landmarks], dtype=np.uint8
+            ).tobytes(),
+            "categories": MAP_CATEGORIES
+        },
+        use_bin_type=True
+    )
+
+
+def decode_landmarks_binary(data: bytes) -> Dict:
+    """
+    Unpacks the binary encoding to the JSON form of the points.
+    :return: {"sector": str | None, "points": List[Dict]}, "type" of the point is its map category
+    """
+    packed = msgpack.unpackb(data, raw=False)
+    if packed["v"] != BINARY_VERSION:
+        raise ValueError(f"Unknown version of the binary encoding of the points: {packed['v']}")
+    latitudes = np.frombuffer(packed["lat"], dtype="<i4") / COORDINATES_SCALE
+    longitudes = np.frombuffer(packed["lng"], dtype="<i4") / COORDINATES_SCALE
+    category_codes = np.frombuffer(packed["category_codes"], dtype=np.uint8)
+    return {
+        "sector": packed["sector"],
+        "points": [
+            {
+                "name": packed["names"][i],
+                "lat": float(latitudes[i]),
+                "lng": float(longitudes[i]),
+                "type": packed["categories"][category_codes[i]]
+            }
+            for i in range(len(packed["names"]))
+        ]
+    }
@@ -0,0 +1,62 @@
+"""
+Benchmark of the encodings of the landmark points: JSON (as /api/v1/sector/points returns it) vs binary encoding of
+landmark_points_codec.py. Size is measured without and with gzip (as CDN or gateway compression would send it).
+Landmarks are generated, so the benchmark doesn't require knowledge base. Run from the directory of the project:
+
+    python -m backend.landmark_points_codec_benchmark
+"""
+import gzip
+import json
+import random
+import time
+
+from backend.db_categories import system_categories
+from backend.landmark_points_codec import decode_landmarks_binary, encode_landmarks_binary, landmarks_to_points
+
+LANDMARKS_AMOUNTS = (100, 1000, 10000)
+REPEATS = 20
+NAME_WORDS = ("озеро", "усадьба", "костёл", "парк", "памятник", "заказник", "церковь", "замок", "музей", "сквер")
+
+
+def _generate_landmarks(amount: int):
+    kb_categories = [category.lower() for category in system_categories]
+    return [
+        {
+            "landmark": {
+                "name": " ".join(random.choices(NAME_WORDS, k=random.randint(1, 4))) + f" {i}",
+                "latitude": random.uniform(51.2, 56.2),
+                "longitude": random.uniform(23.1, 32.8)
+            },
+            "categories_names": random.sample(kb_categories, k=random.randint(0, 2))
+        }
+        for i in range(amount)
+    ]
+
+
+def _encode_json(landmarks):
+    return json.dumps({"points": landmarks_to_points(landmarks)}, ensure_ascii=False).encode()
+
+
+def _measure(encode, landmarks):
+    start_time = time.perf_counter()
+    for _ in range(REPEATS):
+        body = encode(landmarks)
+    return body, (time.perf_counter() - start_time) / REPEATS * 1000
+
+
+def main():
+    for amount in LANDMARKS_AMOUNTS:
+        landmarks = _generate_landmarks(amount)
+        decoded_points = decode_landmarks_binary(encode_landmarks_binary(landmarks))["points"]
+        assert len(decoded_points) == amount
+        assert [point["type"] for point in decoded_points] == [point["type"] for point in landmarks_to_points(landmarks)]
+        for name, encode in (("json", _encode_json), ("binary", encode_landmarks_binary)):
+            body, encode_time = _measure(encode, landmarks)
+            print(
+                f"{amount:>6} points, {name:>6}: {len(body):>9} bytes, gzip {len(gzip.compress(body)):>8} bytes, "
+                f"encode {encode_time:8.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
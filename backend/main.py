@@ -1,18 +1,35 @@
 import asyncio
+import datetime
+import functools
+import inspect
+import hashlib
 import random
-from pprint import pprint
+import time
+from contextlib import nullcontext
+from typing import Callable, Coroutine, Dict, List
 
 import werkzeug.exceptions as wer_exp
-from quart import Quart, request, jsonify
+from quart import Quart, request, jsonify, make_response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from quart_cors import cors
+from redis.asyncio import Redis
+from taskiq.exceptions import TaskiqResultTimeoutError
 from werkzeug.datastructures import ImmutableMultiDict as imd
 
-from backend.broker.agents_tasks.route_builder_task import build_route
-from backend.broker.agents_tasks.landmarks_by_sectors_agent_tasks import get_landmarks_in_sector_task
+from backend.admission_control import AdmissionLimiter, GatewayOverloadedError
+from backend.agents.route_builder_agent.route_builder_agent import RouteBuilderAgent
+from backend.broker.agents_tasks.crud_agent_tasks import landmarks_in_map_sectors_task
+from backend.broker.agents_tasks.landmarks_by_sectors_agent_tasks import (
+    get_landmarks_in_sector_task, get_map_sectors_names_in_sector_task
+)
 
 from backend.db_categories import system_categories
+from backend.landmark_points_codec import BINARY_MIMETYPE, encode_landmarks_binary, landmarks_to_points
+from backend.response_encoding import encode_json, setup_response_encoding
 
 from backend.broker.abstract_agents_broker import AbstractAgentsBroker
+from backend.broker.hop_metrics import hop_trace
+from backend.broker.result_backend import AgentsResultBackend
 
 
 class RequestAgent:
@@ -21,19 +38,58 @@ class RequestAgent:
     It gets information of client's map position.
     The response must be a list of landmarks data in the requested sector.
     """
-
-    def __init__(self, flask_app: Quart):
+    SECTOR_POINTS_TIMEOUT = 10  # seconds
+    ROUTE_TIMEOUT = 60  # seconds
+    BATCH_ROUTES_TIMEOUT = 180  # seconds, timeout of the whole batch of routes
+    BATCH_ROUTES_MAX_AMOUNT = 100  # Maximum amount of routes in one batch
+    BATCH_ROUTES_CONCURRENCY = 8  # Maximum amount of routes of one batch, that are built at the same time
+    HOP_TRACE_HEADER = "X-Hop-Trace"  # If request has this header, latency of the hops of its calls is logged
+    NDJSON_MIMETYPE = "application/x-ndjson"
+    TILE_MAX_AGE = 300  # seconds, tiles can be cached by the clients and CDN for this time
+    TILES_VERSIONS_PREFIX = "gateway_tiles_versions:"  # Redis hashes with etag and Last-Modified of the tiles
+    # Limits of the endpoints: maximum amount of requests, that are handled at the same time, maximum amount of
+    # requests, that wait for the free slot, maximum waiting time (seconds), Retry-After of rejected requests (seconds)
+    ADMISSION_LIMITS = {
+        "sector_points": {"max_in_flight": 64, "max_queued": 128, "queue_timeout": 2.0, "retry_after": 1},
+        "sector_tiles": {"max_in_flight": 128, "max_queued": 256, "queue_timeout": 2.0, "retry_after": 1},
+        "route": {"max_in_flight": 16, "max_queued": 32, "queue_timeout": 5.0, "retry_after": 5},
+        "route_stream": {"max_in_flight": 16, "max_queued": 32, "queue_timeout": 5.0, "retry_after": 5},
+        "routes_batch": {"max_in_flight": 2, "max_queued": 4, "queue_timeout": 5.0, "retry_after": 30}
+    }
+
+    def __init__(
+        self,
+        flask_app: Quart,
+        admission_limits: Dict[str, Dict] | None = None,
+        tiles_redis_url: str | None = "redis://localhost:6379"
+    ):
+        """
+        :param flask_app: application of the gateway
+        :param admission_limits: limits of the endpoints, that replace ADMISSION_LIMITS
+        :param tiles_redis_url: url of Redis, that keeps Last-Modified of the tiles for all gateway processes. Tiles
+        have no Last-Modified (only ETag), if it's None
+        """
         self._asyncio_tasks = set()
+        self._tiles_redis = Redis.from_url(tiles_redis_url) if tiles_redis_url else None
+        self._limiters = {
+            endpoint: AdmissionLimiter(endpoint, **limits)
+            for endpoint, limits in {**self.ADMISSION_LIMITS, **(admission_limits or {})}.items()
+        }
         self.__app__ = flask_app
+        setup_response_encoding(self.__app__)
         self.__handle__()
 
     def __handle__(self):
         @self.__app__.route("/api/v1/sector/points", methods=["GET"])
+        @self.__admitted("sector_points")
         async def get_sector_points():
             """
             Method gets the request for receiving list
             of landmarks in a specific sector.
             Returns a response of json list of landmarks and it's data.
+            If request has header "Accept: application/x-ndjson", landmarks are streamed by map sectors
+            (check __stream_sector_points). If request has header "Accept: application/x-msgpack", landmarks are
+            returned in binary encoding (check landmark_points_codec.py).
             return: json response
             """
             received = request.args
@@ -50,7 +106,7 @@ class RequestAgent:
                 self.__app__.logger.error("get_sector_points() returned BadRequest")
                 return wer_exp.BadRequest().code
 
-            print("gotten json sectors", gotten_json)
+            self.__app__.logger.debug("gotten json sectors %s", gotten_json)
 
             param = {
                 "TL": {
@@ -63,33 +119,106 @@ class RequestAgent:
                 }
             }
 
-            task = asyncio.create_task(
-                AbstractAgentsBroker.call_agent_task(get_landmarks_in_sector_task, param)
-            )
-            self._asyncio_tasks.add(task)
-            task.add_done_callback(self._asyncio_tasks.discard)
+            mimetype = request.accept_mimetypes.best_match(["application/json", self.NDJSON_MIMETYPE, BINARY_MIMETYPE])
+            if mimetype == self.NDJSON_MIMETYPE:
+                return await self.__stream_sector_points(param)
 
-            res = await task
+            try:
+                res = await self.__call_traced(
+                    AbstractAgentsBroker.call_agent_task(
+                        get_landmarks_in_sector_task, param, timeout=self.SECTOR_POINTS_TIMEOUT
+                    )
+                )
+            except TaskiqResultTimeoutError:
+                self.__app__.logger.error("get_sector_points() timed out")
+                return wer_exp.GatewayTimeout()
             res = res.return_value
 
-            print("sector res", res)
-            landmarks = list()
-            for i in res:
-                if i['landmark']:
-                    landmarks.append(
-                        {
-                            "name": i['landmark']['name'].capitalize(),
-                            "lat": i['landmark']['latitude'],
-                            "lng": i['landmark']['longitude'],
-                            "type": "none"
-                                # self.__convert_categories_from(i['categories_names'][0]) #TODO: lol
-                        }
-                    )
-            pprint({"points": landmarks})
+            if mimetype == BINARY_MIMETYPE:
+                return encode_landmarks_binary(res), 200, {"Content-Type": BINARY_MIMETYPE}
+
+            self.__app__.logger.debug("sector res %s", res)
+            landmarks = landmarks_to_points(res)
 
 
             return jsonify({"points": landmarks})
 
+        @self.__app__.route("/api/v1/sector/tiles", methods=["GET"])
+        @self.__admitted("sector_tiles")
+        async def get_sector_tiles():
+            """
+            Method gets the request for receiving tiles (map sectors), that cover a specific sector.
+            Load landmarks of the tiles with /api/v1/sector/tiles/<tile>/points, their responses are cacheable.
+            return: json response {"tiles": List[str]}
+            """
+            gotten_json = imd.to_dict(request.args)
+            try:
+                param = {
+                    "TL": {"latitude": float(gotten_json['tl_lat']), "longitude": float(gotten_json['tl_lng'])},
+                    "BR": {"latitude": float(gotten_json['br_lat']), "longitude": float(gotten_json['br_lng'])}
+                }
+            except (KeyError, ValueError):
+                return wer_exp.BadRequest()
+
+            try:
+                res = await self.__call_traced(
+                    AbstractAgentsBroker.call_agent_task(
+                        get_map_sectors_names_in_sector_task, param, timeout=self.SECTOR_POINTS_TIMEOUT
+                    )
+                )
+            except TaskiqResultTimeoutError:
+                self.__app__.logger.error("get_sector_tiles() timed out")
+                return wer_exp.GatewayTimeout()
+
+            return jsonify({"tiles": sorted(res.return_value)})
+
+        @self.__app__.route("/api/v1/sector/tiles/<map_sector_name>/points", methods=["GET"])
+        @self.__admitted("sector_tiles")
+        async def get_tile_points(map_sector_name):
+            """
+            Method for getting landmarks of one tile (map sector).
+            Response is stable (points are sorted) and has ETag (hash of the content) and Last-Modified, so clients
+            and CDN can cache it. Request with If-None-Match or If-Modified-Since gets 304, if tile wasn't changed.
+            If request has header "Accept: application/x-msgpack", tile is returned in binary encoding
+            (check landmark_points_codec.py).
+            return: json response {"sector": str, "points": List}
+            """
+            try:
+                res = await self.__call_traced(
+                    AbstractAgentsBroker.call_agent_task(
+                        landmarks_in_map_sectors_task,
+                        {"map_sectors_names": [map_sector_name]},
+                        timeout=self.SECTOR_POINTS_TIMEOUT
+                    )
+                )
+            except TaskiqResultTimeoutError:
+                self.__app__.logger.error("get_tile_points() timed out")
+                return wer_exp.GatewayTimeout()
+            if res.is_err:
+                self.__app__.logger.error(f"get_tile_points() map sector {map_sector_name}: {res.error!r}")
+                return wer_exp.InternalServerError()
+
+            landmarks = sorted(
+                [i for i in res.return_value if i['landmark']],
+                key=lambda i: (i['landmark']['name'], i['landmark']['latitude'], i['landmark']['longitude'])
+            )
+            mimetype = request.accept_mimetypes.best_match(["application/json", BINARY_MIMETYPE])
+            if mimetype == BINARY_MIMETYPE:
+                body = encode_landmarks_binary(landmarks, map_sector_name)
+            else:
+                body = encode_json(
+                    {"sector": map_sector_name, "points": landmarks_to_points(landmarks)}, sort_keys=True
+                )
+                mimetype = "application/json"
+            etag = hashlib.sha256(body).hexdigest()[:32]
+
+            response = await make_response(body, 200, {"Content-Type": mimetype, "Vary": "Accept"})
+            response.set_etag(etag)
+            response.last_modified = await self.__tile_last_modified(f"{map_sector_name}:{mimetype}", etag)
+            response.cache_control.public = True
+            response.cache_control.max_age = self.TILE_MAX_AGE
+            return await response.make_conditional(request)
+
         @self.__app__.route("/api/v1/map/point", methods=["GET"])
         def get_point():
             """
@@ -110,6 +239,7 @@ class RequestAgent:
             return jsonify(landmark)
 
         @self.__app__.route("/api/v1/map/route", methods=["GET"])
+        @self.__admitted("route")
         async def get_route():
             """
             Method for getting list of routing points.
@@ -117,59 +247,139 @@ class RequestAgent:
             """
             received = request.args
             gotten_json = imd.to_dict(received)
-            print(gotten_json['start'][0])
-            print("gotten jason   ", gotten_json)
+            self.__app__.logger.debug("gotten json route %s", gotten_json)
             if gotten_json is None:
                 self.__app__.logger.error("get_rout() returned BadRequest")
                 return wer_exp.BadRequest()
 
-            param = dict()
-            param['user_login'] = ""
-            param['start_end_points'] = {
-                "coordinates": [
-                    {"latitude": float((gotten_json['start'].split(','))[0]),
-                     "longitude": float((gotten_json['start'].split(','))[1])},
-                    {"latitude": float((gotten_json['finish'].split(','))[0]),
-                     "longitude": float((gotten_json['finish'].split(','))[1])}
-                ]
-            }
+            param = self.__route_params(gotten_json)
 
-            if len(gotten_json['catigories']) != 0:
-                print("cats to send ", gotten_json['catigories'].lower().split(','))
-                categories = self.__convert_categories_to(gotten_json['catigories'].split(','))
-                param['categories_names'] = [i.lower() for i in categories]
-            else:
-                curr = self.__generate_cats()
-                for i in range(len(curr)):
-                    curr[i] = curr[i].lower()
-                param['categories_names'] = curr
-
-            print("param ", param)
-
-            task = asyncio.create_task(
-                AbstractAgentsBroker.call_agent_task(
-                    build_route, param
+            try:
+                # Steps of the route building are chained on the workers, only the route comes back
+                res = await self.__call_traced(
+                    AbstractAgentsBroker.call_task_graph(
+                        RouteBuilderAgent.route_graph(param), timeout=self.ROUTE_TIMEOUT
+                    )
                 )
-            )
-            self._asyncio_tasks.add(task)
-            task.add_done_callback(self._asyncio_tasks.discard)
-
-            res = await task
+            except TaskiqResultTimeoutError:
+                self.__app__.logger.error("get_route() timed out")
+                return wer_exp.GatewayTimeout()
 
             res = res.return_value
 
-            print("res ", res)
+            self.__app__.logger.debug("route res %s", res)
 
-            route = list()
-            for i in res[0]['coordinates']:
-                route.append([i['latitude'], i['longitude']])
+            return jsonify({'route': self.__route_coordinates(res[0]), 'points': self.__route_points(res[1])})
 
-            points = list()
-            for i in res[1]:
-                points.append({"name": i['recommendation']['name'],
-                               "latlng": [i['recommendation']['latitude'], i['recommendation']['longitude']]})
+        @self.__app__.route("/api/v1/map/routes", methods=["POST"])
+        @self.__admitted("routes_batch")
+        async def post_routes():
+            """
+            Method for planning many routes at once.
+            Body: {"routes": [{"start": "lat,lng", "finish": "lat,lng", "catigories": "category1,category2"}, ...]}
+            (the same params as in /api/v1/map/route, "catigories" can be empty).
+            Routes are built concurrently (at most BATCH_ROUTES_CONCURRENCY at the same time). Categories are resolved
+            once for equal specs, routes without categories share one set of generated categories. Equal routes of the
+            batch (the same start, finish and categories) are built once, their result is repeated in the response.
+            return: json response {"routes": [{"route": List, "points": List} | {"error": str}, ...]} in order of the
+            input routes
+            """
+            gotten_json = await request.get_json(silent=True)
+            if not isinstance(gotten_json, dict) or not isinstance(gotten_json.get("routes"), list):
+                return wer_exp.BadRequest()
+            routes_specs = gotten_json["routes"]
+            if len(routes_specs) > self.BATCH_ROUTES_MAX_AMOUNT:
+                return wer_exp.BadRequest(f"Batch can contain at most {self.BATCH_ROUTES_MAX_AMOUNT} routes")
+
+            categories_of_specs = {}
+            params = []
+            indexes_of_params = {}
+            route_indexes = []  # Index of the built route (in params) for every route of the batch
+            try:
+                for route_spec in routes_specs:
+                    catigories = route_spec.get('catigories', "")
+                    if catigories not in categories_of_specs:
+                        categories_of_specs[catigories] = self.__categories_names(catigories)
+                    param = {
+                        "user_login": "",
+                        "start_end_points": self.__start_end_points(route_spec),
+                        "categories_names": categories_of_specs[catigories]
+                    }
+                    param_key = encode_json(param, sort_keys=True)
+                    if param_key not in indexes_of_params:
+                        indexes_of_params[param_key] = len(params)
+                        params.append(param)
+                    route_indexes.append(indexes_of_params[param_key])
+            except (KeyError, ValueError, IndexError, TypeError, AttributeError):
+                self.__app__.logger.error("post_routes() returned BadRequest")
+                return wer_exp.BadRequest()
+
+            deadline = time.time() + self.BATCH_ROUTES_TIMEOUT
+            slots = asyncio.Semaphore(self.BATCH_ROUTES_CONCURRENCY)
+
+            async def build_route(param):
+                async with slots:
+                    timeout = min(self.ROUTE_TIMEOUT, deadline - time.time())
+                    if timeout <= 0:
+                        return {"error": "timeout"}
+                    try:
+                        res = await AbstractAgentsBroker.call_task_graph(
+                            RouteBuilderAgent.route_graph(param), timeout=timeout
+                        )
+                        res = res.raise_for_error().return_value
+                    except TaskiqResultTimeoutError:
+                        return {"error": "timeout"}
+                    except Exception as ex:
+                        self.__app__.logger.error(f"post_routes() route failed: {ex!r}")
+                        return {"error": "failed"}
+                    return {'route': self.__route_coordinates(res[0]), 'points': self.__route_points(res[1])}
+
+            async def build_routes():
+                routes = await asyncio.gather(*[build_route(param) for param in params])
+                return [routes[route_index] for route_index in route_indexes]
+
+            return jsonify({"routes": await self.__call_traced(build_routes())})
+
+        @self.__app__.route("/api/v1/map/route/stream", methods=["GET"])
+        @self.__admitted("route_stream")
+        async def get_route_stream():
+            """
+            Method for getting routing points progressively, params are the same as in /api/v1/map/route.
+            Returns Server-Sent Events stream, every stage of the route building is sent as soon as it's ready:
+                event: pre_route     data: {"route": [[lat, lng], ...]} - main points of the route
+                event: points        data: {"points": [{"name": str, "latlng": [lat, lng]}, ...]} - landmarks
+                event: route         data: {"route": [[lat, lng], ...]} - final route, the last event
+                event: error         data: {"error": "timeout" | "failed"} - route wasn't built
+            return: text/event-stream response
+            """
+            gotten_json = imd.to_dict(request.args)
+            try:
+                param = self.__route_params(gotten_json)
+            except (KeyError, ValueError, IndexError):
+                self.__app__.logger.error("get_route_stream() returned BadRequest")
+                return wer_exp.BadRequest()
 
-            return jsonify({'route': route, 'points': points})
+            async def stream():
+                try:
+                    async for stage, output in RouteBuilderAgent.build_route_stages(param, timeout=self.ROUTE_TIMEOUT):
+                        if stage == "pre_route":
+                            yield self.__sse_event("pre_route", {"route": self.__route_coordinates(output)})
+                        elif stage == "landmarks":
+                            yield self.__sse_event("points", {"points": self.__route_points(output)})
+                        else:
+                            yield self.__sse_event("route", {"route": self.__route_coordinates(output)})
+                except TaskiqResultTimeoutError:
+                    self.__app__.logger.error("get_route_stream() timed out")
+                    yield self.__sse_event("error", {"error": "timeout"})
+                except Exception as ex:
+                    self.__app__.logger.error(f"get_route_stream() failed: {ex!r}")
+                    yield self.__sse_event("error", {"error": "failed"})
+
+            return stream(), 200, {
+                "Content-Type": "text/event-stream",
+                "Cache-Control": "no-cache",
+                "X-Accel-Buffering": "no"  # Events mustn't be buffered by the proxy
+            }
 
         @self.__app__.route("/api/v1/map/categories", methods=['GET'])
         def get_categories():
@@ -177,9 +387,214 @@ class RequestAgent:
             for value in system_categories.values():
                 if value not in lst:
                     lst.append(value)
-            print(lst)
             return lst
 
+        @self.__app__.route("/metrics", methods=["GET"])
+        async def get_metrics():
+            """
+            Prometheus metrics of the gateway (latency of the hops of agents calls, memory of result backend).
+            return: metrics in prometheus text format
+            """
+            result_backend = get_landmarks_in_sector_task.broker.result_backend
+            if isinstance(result_backend, AgentsResultBackend):
+                await result_backend.update_memory_metric()
+            return generate_latest(), 200, {"Content-Type": CONTENT_TYPE_LATEST}
+
+    def __route_params(self, gotten_json: Dict) -> Dict:
+        """
+        Params of the route building from the query of the route request (start, finish, catigories).
+        """
+        param = dict()
+        param['user_login'] = ""
+        param['start_end_points'] = self.__start_end_points(gotten_json)
+        param['categories_names'] = self.__categories_names(gotten_json['catigories'])
+
+        self.__app__.logger.debug("route param %s", param)
+        return param
+
+    @staticmethod
+    def __start_end_points(gotten_json: Dict) -> Dict:
+        """Start and finish of the route ("lat,lng" strings of the route request)"""
+        return {
+            "coordinates": [
+                {"latitude": float((gotten_json['start'].split(','))[0]),
+                 "longitude": float((gotten_json['start'].split(','))[1])},
+                {"latitude": float((gotten_json['finish'].split(','))[0]),
+                 "longitude": float((gotten_json['finish'].split(','))[1])}
+            ]
+        }
+
+    def __categories_names(self, catigories: str) -> List[str]:
+        """
+        Categories of knowledge base from the categories of the route request (comma separated front categories).
+        Random categories are generated, if catigories is empty.
+        """
+        if len(catigories) != 0:
+            self.__app__.logger.debug("cats to send %s", catigories)
+            categories = self.__convert_categories_to(catigories.split(','))
+            return [i.lower() for i in categories]
+
+        curr = self.__generate_cats()
+        for i in range(len(curr)):
+            curr[i] = curr[i].lower()
+        return curr
+
+    @staticmethod
+    def __route_coordinates(route: Dict) -> List[List[float]]:
+        """Converts route of the routing agent to the list of [lat, lng]"""
+        return [[i['latitude'], i['longitude']] for i in route['coordinates']]
+
+    @staticmethod
+    def __route_points(landmarks: List[Dict]) -> List[Dict]:
+        """Converts recommended landmarks to the points of the route"""
+        points = list()
+        for i in landmarks:
+            if i['recommendation'] is not None:
+                points.append({"name": i['recommendation']['name'],
+                               "latlng": [i['recommendation']['latitude'], i['recommendation']['longitude']]})
+        return points
+
+    @staticmethod
+    def __sse_event(event: str, data: Dict) -> str:
+        """Formats Server-Sent Event"""
+        return f"event: {event}\ndata: {encode_json(data).decode()}\n\n"
+
+    async def __tile_last_modified(self, tile: str, etag: str) -> datetime.datetime | None:
+        """
+        Returns time, when any gateway process got current content of the tile (with this etag) for the first time.
+        Time is kept in Redis together with the etag, so all gateway processes give the same Last-Modified.
+        Returns None, if Redis isn't available (response has only ETag then).
+        """
+        if self._tiles_redis is None:
+            return None
+        key = f"{self.TILES_VERSIONS_PREFIX}{tile}"
+
+        async def update_version(pipe) -> float:
+            stored_etag, last_modified = await pipe.hmget(key, "etag", "last_modified")
+            if stored_etag is not None and stored_etag.decode() == etag:
+                return float(last_modified)
+            last_modified = float(int(time.time()))
+            pipe.multi()
+            pipe.hset(key, mapping={"etag": etag, "last_modified": last_modified})
+            return last_modified
+
+        try:
+            stored_etag, last_modified = await self._tiles_redis.hmget(key, "etag", "last_modified")
+            if stored_etag is None or stored_etag.decode() != etag:
+                last_modified = await self._tiles_redis.transaction(update_version, key, value_from_callable=True)
+        except Exception as ex:
+            self.__app__.logger.warning(f"Versions of the tiles aren't available: {ex!r}")
+            return None
+        return datetime.datetime.fromtimestamp(float(last_modified), datetime.timezone.utc)
+
+    async def __stream_sector_points(self, param: Dict):
+        """
+        Streams landmarks of the sector as NDJSON. Landmarks of every map sector are loaded separately, line
+        {"sector": str, "points": List} is sent as soon as landmarks of the map sector are loaded, so map can draw them
+        before the whole sector is loaded. If map sector wasn't loaded, its line is {"sector": str, "error": str}.
+        If time is over, the last line is {"error": "timeout"}.
+        :param param: sector in the form of get_landmarks_in_sector_task params
+        """
+        deadline = time.time() + self.SECTOR_POINTS_TIMEOUT
+        try:
+            sectors_names = await self.__call_traced(
+                AbstractAgentsBroker.call_agent_task(
+                    get_map_sectors_names_in_sector_task, param, timeout=self.SECTOR_POINTS_TIMEOUT
+                )
+            )
+        except TaskiqResultTimeoutError:
+            self.__app__.logger.error("get_sector_points() timed out")
+            return wer_exp.GatewayTimeout()
+        sectors_names = sectors_names.return_value
+
+        async def load_map_sector(sector_name: str):
+            res = await AbstractAgentsBroker.call_agent_task(
+                landmarks_in_map_sectors_task,
+                {"map_sectors_names": [sector_name]},
+                timeout=max(deadline - time.time(), 0)
+            )
+            return sector_name, res
+
+        async def stream():
+            map_sectors_tasks = [asyncio.create_task(load_map_sector(sector_name)) for sector_name in sectors_names]
+            try:
+                for map_sector_task in asyncio.as_completed(map_sectors_tasks):
+                    try:
+                        sector_name, res = await map_sector_task
+                    except TaskiqResultTimeoutError:
+                        self.__app__.logger.error("get_sector_points() stream timed out")
+                        yield encode_json({"error": "timeout"}) + b"\n"
+                        return
+                    if res.is_err:
+                        self.__app__.logger.error(f"get_sector_points() map sector {sector_name}: {res.error!r}")
+                        line = {"sector": sector_name, "error": "map sector wasn't loaded"}
+                    else:
+                        line = {"sector": sector_name, "points": landmarks_to_points(res.return_value)}
+                    yield encode_json(line) + b"\n"
+            finally:
+                # Client closed the stream or time is over
+                for map_sector_task in map_sectors_tasks:
+                    map_sector_task.cancel()
+
+        return stream(), 200, {"Content-Type": self.NDJSON_MIMETYPE}
+
+    def __admitted(self, endpoint: str):
+        """
+        Decorator of the handler of the endpoint, that applies admission control (check admission_control.py).
+        Saturated endpoint answers with 503 and Retry-After. Slot of streamed response is held until the stream ends.
+        :param endpoint: name of the limiter of the endpoint (key of ADMISSION_LIMITS)
+        """
+        limiter = self._limiters[endpoint]
+
+        def decorator(handler: Callable):
+            @functools.wraps(handler)
+            async def admitted_handler(*args, **kwargs):
+                try:
+                    await limiter.acquire()
+                except GatewayOverloadedError as ex:
+                    self.__app__.logger.warning(str(ex))
+                    return "Service is overloaded, retry later", 503, {"Retry-After": str(ex.retry_after)}
+
+                try:
+                    response = await handler(*args, **kwargs)
+                except BaseException:
+                    limiter.release()
+                    raise
+                if isinstance(response, tuple) and inspect.isasyncgen(response[0]):
+                    return (self.__released_after(response[0], limiter),) + response[1:]
+                limiter.release()
+                return response
+
+            return admitted_handler
+
+        return decorator
+
+    @staticmethod
+    async def __released_after(stream, limiter: AdmissionLimiter):
+        """Streams the response and frees the slot of the request, when stream ends or client disconnects"""
+        try:
+            async for chunk in stream:
+                yield chunk
+        finally:
+            limiter.release()
+            await stream.aclose()
+
+    async def __call_traced(self, call: Coroutine):
+        """
+        Runs the call of the agents. If request has header X-Hop-Trace, breakdown of the hops of the call is logged.
+        :param call: AbstractAgentsBroker.call_agent_task(...) or AbstractAgentsBroker.call_task_graph(...)
+        """
+        with hop_trace() if request.headers.get(self.HOP_TRACE_HEADER) else nullcontext() as trace:
+            task = asyncio.create_task(call)
+            self._asyncio_tasks.add(task)
+            task.add_done_callback(self._asyncio_tasks.discard)
+
+            try:
+                return await task
+            finally:
+                if trace is not None:
+                    self.__app__.logger.info(f"{request.path} hops:\n{trace.format()}")
+
     def __convert_categories_to(self, curr_list_cat):
         """
         From front categories to system
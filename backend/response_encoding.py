@@ -0,0 +1,100 @@
+"""
+Encoding of the gateway responses.
+
+JSON is serialized with orjson (jsonify and encode_json use it). Responses, that are larger than min_size bytes, are
+compressed with brotli or gzip, if the client accepts it (Accept-Encoding). Streamed responses (NDJSON, SSE) are not
+compressed, so their chunks aren't delayed. brotli is optional, only gzip is used without it.
+Benchmark: python -m backend.response_encoding_benchmark
+"""
+import asyncio
+import gzip
+from typing import Any
+
+import orjson
+from flask.json.provider import JSONProvider
+from quart import Quart, Response, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+COMPRESSIBLE_MIMETYPES = ("application/json", "application/x-msgpack", "text/plain", "text/html")
+THREAD_COMPRESSION_SIZE = 1 << 20  # Responses of this size (in bytes) are compressed in a thread
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+
+def _default(value: Any):
+    """Hook for objects that orjson can't serialize by itself"""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_json(value: Any, sort_keys: bool = False) -> bytes:
+    """Serializes value to compact UTF-8 JSON"""
+    return orjson.dumps(value, default=_default, option=ORJSON_OPTIONS | (orjson.OPT_SORT_KEYS if sort_keys else 0))
+
+
+class OrjsonProvider(JSONProvider):
+    """JSON provider of Quart, that uses orjson"""
+    mimetype = "application/json"
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return encode_json(obj, sort_keys=kwargs.get("sort_keys", False)).decode()
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        return self._app.response_class(encode_json(self._prepare_response_obj(args, kwargs)), mimetype=self.mimetype)
+
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+
+def setup_response_encoding(app: Quart, min_size: int = 1024):
+    """
+    Sets orjson as JSON provider of the application and compresses its responses.
+    :param app: application of the gateway
+    :param min_size: responses of this size (in bytes) and larger are compressed
+    """
+    app.json = OrjsonProvider(app)
+    encodings = ["br", "gzip"] if brotli is not None else ["gzip"]
+
+    @app.after_request
+    async def compress_response(response: Response) -> Response:
+        if not isinstance(response, Response):
+            return response  # Werkzeug responses (e.g. wer_exp.BadRequest() of the handlers) are sent as they are
+        if (
+            response.status_code < 200 or response.status_code in (204, 304)
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or not isinstance(response.response, response.data_body_class)
+        ):
+            return response
+        response.vary.add("Accept-Encoding")
+        encoding = request.accept_encodings.best_match(encodings)
+        if encoding is None:
+            return response
+        data = await response.get_data()
+        if len(data) < min_size:
+            return response
+
+        if len(data) >= THREAD_COMPRESSION_SIZE:
+            compressed_data = await asyncio.to_thread(_compress, data, encoding)
+        else:
+            compressed_data = _compress(data, encoding)
+        response.set_data(compressed_data)
+        response.headers["Content-Encoding"] = encoding
+        etag, is_weak = response.get_etag()
+        if etag is not None and not is_weak:
+            response.set_etag(etag, weak=True)  # Compressed body isn't byte-equal to the identity one
+        return response
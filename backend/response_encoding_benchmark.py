@@ -0,0 +1,65 @@
+"""
+Benchmark of the encoding of the gateway responses: bytes and CPU time per response of /api/v1/sector/points.
+    before - stdlib json (as default JSON provider of Quart encodes it) and stdout dumps of the landmarks (print,
+             pprint)
+    after  - orjson (response_encoding.py) without stdout dumps, without and with compression (gzip, brotli)
+Stdout dumps are written to os.devnull, so the benchmark measures only their formatting and writes. Landmarks are
+generated, so the benchmark doesn't require knowledge base. Run from the directory of the project:
+
+    python -m backend.response_encoding_benchmark
+"""
+import json
+import os
+import time
+from contextlib import redirect_stdout
+from pprint import pprint
+
+from backend.landmark_points_codec import landmarks_to_points
+from backend.landmark_points_codec_benchmark import _generate_landmarks
+from backend.response_encoding import _compress, brotli, encode_json
+
+LANDMARKS_AMOUNTS = (100, 1000, 10000)
+REPEATS = 20
+
+
+def _before(landmarks):
+    print("sector res", landmarks)
+    points = landmarks_to_points(landmarks)
+    pprint({"points": points})
+    return json.dumps({"points": points}, ensure_ascii=True, sort_keys=True, separators=(",", ":")).encode()
+
+
+def _after(landmarks):
+    return encode_json({"points": landmarks_to_points(landmarks)})
+
+
+def _after_compressed(encoding: str):
+    def encode(landmarks):
+        return _compress(_after(landmarks), encoding)
+    return encode
+
+
+def _measure(encode, landmarks):
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        start_time = time.process_time()
+        for _ in range(REPEATS):
+            body = encode(landmarks)
+        cpu_time = (time.process_time() - start_time) / REPEATS * 1000
+    return body, cpu_time
+
+
+def main():
+    variants = [("before", _before), ("after", _after), ("after gzip", _after_compressed("gzip"))]
+    if brotli is not None:
+        variants.append(("after br", _after_compressed("br")))
+    else:
+        print("Brotli isn't installed, brotli is skipped")
+    for amount in LANDMARKS_AMOUNTS:
+        landmarks = _generate_landmarks(amount)
+        for name, encode in variants:
+            body, cpu_time = _measure(encode, landmarks)
+            print(f"{amount:>6} points, {name:>10}: {len(body):>9} bytes, cpu {cpu_time:8.2f} ms per response")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Checks of the encoding of the gateway responses with the stub agents of gateway_load_benchmark (without Neo4j, Redis,
+ORS and TensorFlow): error responses of the handlers keep their status, large JSON is compressed.
+Run from the directory of the project:
+
+    python -m backend.response_encoding_test
+"""
+import asyncio
+import gzip
+
+import orjson
+
+from backend.gateway_load_benchmark import install_stub_agents
+
+
+if __name__ == '__main__':
+
+    async def test():
+        install_stub_agents(latency_scale=0.1)
+        from quart import Quart
+        from backend.main import RequestAgent
+
+        app = Quart(__name__)
+        request_agent = RequestAgent(app, tiles_redis_url=None)
+        client = app.test_client()
+
+        # Werkzeug responses of the handlers (wer_exp.BadRequest(), wer_exp.GatewayTimeout()) aren't compressed
+        for body in ({"routes": "not a list"}, {"routes": [{"start": "53.9"}]}, {"not routes": []}):
+            response = await client.post("/api/v1/map/routes", json=body, headers={"Accept-Encoding": "gzip"})
+            assert response.status_code == 400, (body, response.status_code)
+        response = await client.post(
+            "/api/v1/map/routes", data=b"{broken json", headers={"Content-Type": "application/json"}
+        )
+        assert response.status_code == 400, response.status_code
+        response = await client.get("/api/v1/sector/points?tl_lat=abc", headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 400, response.status_code
+
+        request_agent.ROUTE_TIMEOUT = 0.001
+        response = await client.get(
+            "/api/v1/map/route?start=53.9,27.5&finish=53.95,27.6&catigories=", headers={"Accept-Encoding": "gzip"}
+        )
+        assert response.status_code == 504, response.status_code
+        print("Error statuses are fine")
+
+        # Large JSON is compressed, small one is sent as it is
+        response = await client.get(
+            "/api/v1/sector/points?tl_lat=53.95&tl_lng=27.5&br_lat=53.85&br_lng=27.6",
+            headers={"Accept-Encoding": "gzip"}
+        )
+        assert response.status_code == 200 and response.headers["Content-Encoding"] == "gzip", response.headers
+        assert "points" in orjson.loads(gzip.decompress(await response.get_data()))
+        response = await client.get("/api/v1/map/categories", headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200, response.status_code
+        if len(await response.get_data()) < 1024:
+            assert "Content-Encoding" not in response.headers, response.headers
+        print("Compression is fine")
+
+    asyncio.run(test())
@@ -144,6 +144,8 @@ except ImportError as e:
 CONSTRAINTS_QUERIES = [
     """CREATE CONSTRAINT landmark_name_longitude_latitude_uniqueness IF NOT EXISTS
             FOR (landmark: Landmark) REQUIRE (landmark.name, landmark.longitude, landmark.latitude) IS UNIQUE;""",
+    """CREATE CONSTRAINT landmark_path_uniqueness IF NOT EXISTS
+            FOR (landmark: Landmark) REQUIRE landmark.path IS UNIQUE;""",
     """CREATE CONSTRAINT region_name_uniqueness IF NOT EXISTS
             FOR (region: Region) REQUIRE region.name IS UNIQUE;""",
     """CREATE CONSTRAINT landmark_category_name_uniqueness IF NOT EXISTS
@@ -160,7 +162,9 @@ CONSTRAINTS_QUERIES = [
             FOR (note: Note) REQUIRE note.title IS UNIQUE;""",
     """CREATE CONSTRAINT route_index_id_uniqueness IF NOT EXISTS
             FOR (route: Route) REQUIRE route.index_id IS UNIQUE;
-    """
+    """,
+    """CREATE CONSTRAINT sequence_name_uniqueness IF NOT EXISTS
+            FOR (sequence: Sequence) REQUIRE sequence.name IS UNIQUE;"""
 ]
 
 
@@ -199,6 +203,11 @@ INDEXES_QUERIES = [
     );
     """,
     """
+    CREATE POINT INDEX landmark_location_point_index IF NOT EXISTS
+    FOR (landmark:Landmark)
+    ON (landmark.location);
+    """,
+    """
     CREATE TEXT INDEX map_sector_name_text_index IF NOT EXISTS
     FOR (mapSector: MapSector)
     ON (mapSector.name);
@@ -226,6 +235,11 @@ INDEXES_QUERIES = [
     FOR (note: Note)
     ON (note.title);
     """,
+    """
+    CREATE INDEX note_last_update_range_index IF NOT EXISTS
+    FOR (note: Note)
+    ON (note.last_update);
+    """,
     """  
     CREATE INDEX route_index_id_range_index IF NOT EXISTS
     FOR (route: Route)
@@ -567,6 +581,9 @@ def import_landmarks(driver, filename="landmarks.json"):
                             latitude: toFloat(landmark_json.coordinates.latitude),
                             longitude: toFloat(landmark_json.coordinates.longitude)}
                     )  // CREATE or MATCH landmark (landmark uniqueness is defined by (name, latitude, longitude)) 
+                    SET landmark.location = point({
+                        latitude: landmark.latitude, longitude: landmark.longitude, crs:'WGS-84'
+                    })  // Indexed by landmark_location_point_index
                     MERGE (category: LandmarkCategory {name: landmark_json.category})
                     MERGE (landmark)-[refer:REFERS]->(category)
                         SET refer.main_category_flag = True
@@ -744,32 +761,38 @@ def import_map_sectors(driver, filename="map_sectors.json"):
         )
 
 
-def connect_landmarks_with_map_sectors(driver):
+def set_landmarks_locations(driver):
     with driver.session() as session:
         session.run(
             """
-            // Connects all landmarks with their map sectors
+            // Sets location (point, indexed by landmark_location_point_index) of the landmarks, that don't have it
             MATCH (landmark: Landmark)
-                WHERE NOT (landmark)-[:IN_SECTOR]->(:MapSector)
+                WHERE landmark.location IS NULL
+            CALL {
+                WITH landmark
+                SET landmark.location = point({
+                    latitude: landmark.latitude, longitude: landmark.longitude, crs:'WGS-84'
+                })
+            } IN TRANSACTIONS OF 10000 ROWS
+            """
+        )
+
+
+def connect_landmarks_with_map_sectors(driver):
+    with driver.session() as session:
+        session.run(
+            """
+            // Connects all landmarks with their map sectors (landmarks in the bounding box of the sector are found
+            // with landmark_location_point_index)
             MATCH (mapSector: MapSector)
-            CALL apoc.do.when(
-                point.withinBBox(
-                    point({latitude: landmark.latitude, longitude: landmark.longitude, crs:'WGS-84'}),
+            MATCH (landmark: Landmark)
+                WHERE point.withinBBox(
+                    landmark.location,
                     point({latitude: mapSector.br_latitude, longitude: mapSector.tl_longitude, crs:'WGS-84'}),
                     point({latitude: mapSector.tl_latitude, longitude: mapSector.br_longitude, crs:'WGS-84'})
-                ) = True,
-                "
-                    MERGE (landmark)-[:IN_SECTOR]->(mapSector)
-                    RETURN True;
-                ",
-                "
-                    RETURN False;
-                ",
-                {landmark: landmark, mapSector: mapSector}
-            ) YIELD value AS added_to_sector
-            WITH added_to_sector
-                WHERE added_to_sector = True
-            RETURN count(added_to_sector) AS added_amount
+                ) AND NOT (landmark)-[:IN_SECTOR]->(:MapSector)
+            MERGE (landmark)-[:IN_SECTOR]->(mapSector)
+            RETURN count(landmark) AS added_amount
             """
         )
 
@@ -1135,6 +1158,10 @@ def run_cypher_scripts(
         import_landmarks(driver, landmarks_filename)
         print(f"Landmarks have been imported in {datetime.datetime.now() - last_operation}")
         last_operation = datetime.datetime.now()
+        print("Setting locations of landmarks...")
+        set_landmarks_locations(driver)
+        print(f"Locations of landmarks have been set in {datetime.datetime.now() - last_operation}")
+        last_operation = datetime.datetime.now()
         print("Connecting map sectors with landmarks...")
         connect_landmarks_with_map_sectors(driver)
         print(f"Landmarks have been connected with map sectors in {datetime.datetime.now() - last_operation}")